@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the GitHub and Azure DevOps APIs used by the scanner.
+
+Serves a deterministic synthetic organization for the endpoints that
+GitHubAPI, GitHubGraphQLAPI and AzureDevOpsAPI call, with configurable
+latency, Link-header pagination, ETags / 304 revalidation and rate limiting.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+# Named organization sizes: repositories, members, teams
+PRESETS = {
+    '1k': (1000, 2000, 100),
+    '10k': (10000, 20000, 1000),
+    '50k': (50000, 60000, 3000),
+}
+LANGUAGES = ['Python', 'Go', 'TypeScript', 'Java', 'C#', 'Rust', None]
+PERMISSIONS = ['pull', 'triage', 'push', 'maintain', 'admin']
+ROLE_NAMES = {'pull': 'read', 'triage': 'triage', 'push': 'write', 'maintain': 'maintain', 'admin': 'admin'}
+GRAPHQL_PERMISSIONS = {'pull': 'READ', 'triage': 'TRIAGE', 'push': 'WRITE', 'maintain': 'MAINTAIN', 'admin': 'ADMIN'}
+BASE_TIME = 1700000000
+
+
+class SyntheticOrg:
+    """Deterministic synthetic organization; entities are generated on demand"""
+
+    def __init__(self, name: str, repos: int, members: int, teams: int, seed: int = 42):
+        self.name = name
+        self.repo_count = repos
+        self.member_count = members
+        self.team_count = teams
+        self.seed = seed
+        self._fork_indices: Dict[bool, List[int]] = {}
+
+    def _rng(self, kind: str, index: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{index}")
+
+    def user(self, index: int) -> Dict[str, Any]:
+        login = f"user{index:06d}"
+        url = f"https://api.github.com/users/{login}"
+        return {
+            'login': login,
+            'id': 100000 + index,
+            'node_id': f"U_{index}",
+            'avatar_url': f"https://avatars.githubusercontent.com/u/{100000 + index}?v=4",
+            'gravatar_id': '',
+            'url': url,
+            'html_url': f"https://github.com/{login}",
+            'followers_url': f"{url}/followers",
+            'following_url': f"{url}/following{{/other_user}}",
+            'gists_url': f"{url}/gists{{/gist_id}}",
+            'starred_url': f"{url}/starred{{/owner}}{{/repo}}",
+            'subscriptions_url': f"{url}/subscriptions",
+            'organizations_url': f"{url}/orgs",
+            'repos_url': f"{url}/repos",
+            'events_url': f"{url}/events{{/privacy}}",
+            'received_events_url': f"{url}/received_events",
+            'type': 'User',
+            'site_admin': False,
+        }
+
+    def team(self, index: int) -> Dict[str, Any]:
+        slug = f"team-{index:05d}"
+        url = f"https://api.github.com/organizations/1/team/{5000 + index}"
+        parent_index = index // 10 if index >= 10 else None
+        return {
+            'name': f"Team {index:05d}",
+            'id': 5000 + index,
+            'node_id': f"T_{index}",
+            'slug': slug,
+            'description': f"Synthetic team {index}",
+            'privacy': 'closed',
+            'notification_setting': 'notifications_enabled',
+            'url': url,
+            'html_url': f"https://github.com/orgs/{self.name}/teams/{slug}",
+            'members_url': f"{url}/members{{/member}}",
+            'repositories_url': f"{url}/repos",
+            'permission': 'pull',
+            'parent': {'id': 5000 + parent_index, 'slug': f"team-{parent_index:05d}"} if parent_index is not None else None,
+        }
+
+    def repo_indices(self, fork: Optional[bool] = None) -> List[int]:
+        """Repository indices, optionally only forks (True) or only sources (False)"""
+        if fork is None:
+            return list(range(self.repo_count))
+        if fork not in self._fork_indices:
+            self._fork_indices[fork] = [i for i in range(self.repo_count) if self.repo(i)['fork'] == fork]
+        return self._fork_indices[fork]
+
+    def repo_name(self, index: int) -> str:
+        return f"repo-{index:06d}"
+
+    def repo(self, index: int) -> Dict[str, Any]:
+        rng = self._rng('repo', index)
+        name = self.repo_name(index)
+        full_name = f"{self.name}/{name}"
+        url = f"https://api.github.com/repos/{full_name}"
+        created = BASE_TIME + rng.randint(0, 10 ** 8)
+        pushed = created + rng.randint(0, 5 * 10 ** 7)
+        repo = {
+            'id': 900000 + index,
+            'node_id': f"R_{index}",
+            'name': name,
+            'full_name': full_name,
+            'private': rng.random() < 0.6,
+            'owner': {'login': self.name, 'id': 1, 'type': 'Organization'},
+            'html_url': f"https://github.com/{full_name}",
+            'description': f"Synthetic repository {index}",
+            'fork': rng.random() < 0.1,
+            'url': url,
+            'clone_url': f"https://github.com/{full_name}.git",
+            'created_at': _iso(created),
+            'updated_at': _iso(pushed),
+            'pushed_at': _iso(pushed),
+            'size': int(rng.lognormvariate(7, 2)),
+            'stargazers_count': rng.randint(0, 50),
+            'language': rng.choice(LANGUAGES),
+            'forks_count': rng.randint(0, 10),
+            'archived': rng.random() < 0.15,
+            'disabled': False,
+            'open_issues_count': rng.randint(0, 30),
+            'default_branch': 'main',
+        }
+        repo['watchers_count'] = repo['stargazers_count']
+        for field in ('forks', 'keys', 'collaborators', 'teams', 'hooks', 'issue_events', 'events', 'assignees',
+                      'branches', 'tags', 'blobs', 'git_tags', 'git_refs', 'trees', 'statuses', 'languages',
+                      'stargazers', 'contributors', 'subscribers', 'subscription', 'commits', 'git_commits',
+                      'comments', 'issue_comment', 'contents', 'compare', 'merges', 'archive', 'downloads',
+                      'issues', 'pulls', 'milestones', 'notifications', 'labels', 'releases', 'deployments'):
+            repo[f"{field}_url"] = f"{url}/{field}"
+        return repo
+
+    def repo_teams(self, index: int) -> List[Dict[str, Any]]:
+        rng = self._rng('repo-teams', index)
+        teams = []
+        for team_index in sorted(set(rng.randrange(self.team_count) for _ in range(rng.randint(0, 3)))):
+            team = self.team(team_index)
+            team['permission'] = rng.choice(PERMISSIONS)
+            teams.append(team)
+        return teams
+
+    def repo_collaborators(self, index: int) -> List[Dict[str, Any]]:
+        rng = self._rng('repo-collaborators', index)
+        collaborators = []
+        for user_index in sorted(set(rng.randrange(self.member_count) for _ in range(rng.randint(1, 8)))):
+            user = self.user(user_index)
+            permission = rng.choice(PERMISSIONS)
+            level = PERMISSIONS.index(permission)
+            user['permissions'] = {name: PERMISSIONS.index(name) <= level for name in PERMISSIONS}
+            user['role_name'] = ROLE_NAMES[permission]
+            collaborators.append(user)
+        return collaborators
+
+    def team_members(self, index: int) -> List[Dict[str, Any]]:
+        rng = self._rng('team-members', index)
+        return [self.user(i) for i in sorted(set(rng.randrange(self.member_count) for _ in range(rng.randint(1, 20))))]
+
+    def repo_index(self, name: str) -> Optional[int]:
+        match = re.fullmatch(r'repo-(\d{6})', name)
+        if match and int(match.group(1)) < self.repo_count:
+            return int(match.group(1))
+        return None
+
+    def team_index(self, slug: str) -> Optional[int]:
+        match = re.fullmatch(r'team-(\d{5})', slug)
+        if match and int(match.group(1)) < self.team_count:
+            return int(match.group(1))
+        return None
+
+
+def _iso(timestamp: int) -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+class RateLimitBucket:
+    """Fixed-window request budget per token"""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.reset = time.time() + window
+        self.remaining = limit
+
+    def take(self, charge: bool) -> Tuple[bool, int, int]:
+        with self.lock:
+            now = time.time()
+            if now >= self.reset:
+                self.reset = now + self.window
+                self.remaining = self.limit
+            if self.remaining <= 0:
+                return False, 0, int(self.reset)
+            if charge:
+                self.remaining -= 1
+            return True, self.remaining, int(self.reset)
+
+
+class FakeServerState:
+    """Configuration, synthetic data, mutable Azure DevOps state and request statistics"""
+
+    def __init__(self, org: SyntheticOrg, latency: float = 0.0, rate_limit: int = 0, rate_window: float = 3600,
+                 rate_limit_mode: str = '403', azure_project: str = 'bench'):
+        self.org = org
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.rate_limit_mode = rate_limit_mode
+        self.azure_project = azure_project
+        self.lock = threading.Lock()
+        self.buckets: Dict[str, RateLimitBucket] = {}
+        self.stats: Dict[str, Any] = {'requests': 0, 'not_modified': 0, 'rate_limited': 0, 'bytes': 0, 'endpoints': {}}
+        self.azure_teams: Dict[str, Dict[str, Any]] = {}
+        self.azure_memberships: Dict[str, set] = {}
+
+    def bucket(self, token: str) -> RateLimitBucket:
+        with self.lock:
+            if token not in self.buckets:
+                self.buckets[token] = RateLimitBucket(self.rate_limit, self.rate_window)
+            return self.buckets[token]
+
+    def record(self, endpoint: str, status: int, size: int):
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += size
+            if status == 304:
+                self.stats['not_modified'] += 1
+            if status in (403, 429):
+                self.stats['rate_limited'] += 1
+            self.stats['endpoints'][endpoint] = self.stats['endpoints'].get(endpoint, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+
+def _page_bounds(query: Dict[str, List[str]], total: int) -> Tuple[int, int, int, int]:
+    per_page = min(int(query.get('per_page', ['30'])[0]), 100)
+    page = max(int(query.get('page', ['1'])[0]), 1)
+    last = max(1, -(-total // per_page))
+    return page, per_page, last, (page - 1) * per_page
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeAPI/1.0'
+    # Headers and body are written separately; without TCP_NODELAY delayed ACKs add ~40 ms per request
+    disable_nagle_algorithm = True
+    state: FakeServerState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    # Routing
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method: str):
+        state = self.state
+        if state.latency:
+            time.sleep(state.latency)
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip('/')
+        query = parse_qs(parsed.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        if path == '/__stats':
+            return self._send('stats', 200, state.snapshot(), rate_headers=False)
+        if '/_apis/' in path:
+            return self._azure(method, path, query, body)
+        return self._github(method, path, query, body)
+
+    def _send(self, endpoint: str, status: int, payload: Any, headers: Optional[Dict[str, str]] = None,
+              rate_headers: bool = True, etag: bool = False):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        headers = dict(headers or {})
+        if etag and status == 200:
+            tag = f'W/"{hashlib.md5(data).hexdigest()}"'
+            headers['ETag'] = tag
+            if self.headers.get('If-None-Match') == tag:
+                status, data = 304, b''
+
+        if rate_headers and self.state.rate_limit:
+            allowed, remaining, reset = self.state.bucket(self.headers.get('Authorization', '')).take(charge=status != 304)
+            headers.update({
+                'X-RateLimit-Limit': str(self.state.rate_limit),
+                'X-RateLimit-Remaining': str(remaining),
+                'X-RateLimit-Reset': str(reset),
+            })
+            if not allowed:
+                status = 429 if self.state.rate_limit_mode == '429' else 403
+                data = json.dumps({'message': 'API rate limit exceeded'}).encode('utf-8')
+                if self.state.rate_limit_mode == '429':
+                    headers['Retry-After'] = str(max(1, reset - int(time.time())))
+                headers.pop('ETag', None)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.state.record(endpoint, status, len(data))
+
+    def _send_page(self, endpoint: str, query: Dict[str, List[str]], total: int, make, base_path: str):
+        page, per_page, last, start = _page_bounds(query, total)
+        items = [make(i) for i in range(start, min(start + per_page, total))]
+        links = []
+        # Like GitHub, links keep the request's other query parameters
+        extra = ''.join(f"&{key}={values[0]}" for key, values in query.items() if key not in ('page', 'per_page'))
+        base = f"http://{self.headers.get('Host')}{base_path}?per_page={per_page}{extra}"
+        if page < last:
+            links.append(f'<{base}&page={page + 1}>; rel="next"')
+            links.append(f'<{base}&page={last}>; rel="last"')
+        if page > 1:
+            links.append(f'<{base}&page=1>; rel="first"')
+            links.append(f'<{base}&page={page - 1}>; rel="prev"')
+        headers = {'Link': ', '.join(links)} if links else {}
+        self._send(endpoint, 200, items, headers=headers, etag=True)
+
+    # GitHub
+
+    def _github(self, method: str, path: str, query: Dict[str, List[str]], body: Any):
+        org = self.state.org
+        not_found = {'message': 'Not Found'}
+
+        if method == 'POST' and path.endswith('/graphql'):
+            return self._graphql(body or {})
+
+        if path == '/user':
+            return self._send('GET /user', 200, {'login': 'benchmark-bot', 'id': 1})
+        match = re.fullmatch(r'/orgs/([^/]+)(/[^/]+)?', path)
+        if match and match.group(1) == org.name:
+            kind = match.group(2)
+            if kind is None:
+                return self._send('GET /orgs/{org}', 200, {
+                    'login': org.name, 'id': 1, 'name': f"{org.name} (synthetic)", 'description': 'Benchmark organization',
+                    'public_repos': org.repo_count // 2, 'total_private_repos': org.repo_count - org.repo_count // 2,
+                }, etag=True)
+            if kind == '/repos':
+                # type=sources/forks filters forks on the server, like GitHub
+                repo_type = query.get('type', ['all'])[0]
+                indices = org.repo_indices({'sources': False, 'forks': True}.get(repo_type))
+                return self._send_page('GET /orgs/{org}/repos', query, len(indices),
+                                       lambda i: org.repo(indices[i]), path)
+            if kind == '/members':
+                return self._send_page('GET /orgs/{org}/members', query, org.member_count, org.user, path)
+            if kind == '/teams':
+                return self._send_page('GET /orgs/{org}/teams', query, org.team_count, org.team, path)
+
+        match = re.fullmatch(r'/orgs/([^/]+)/teams/([^/]+)/(members|teams)', path)
+        if match and match.group(1) == org.name:
+            index = org.team_index(match.group(2))
+            if index is None:
+                return self._send('GET /orgs/{org}/teams/{team}', 404, not_found)
+            if match.group(3) == 'members':
+                members = org.team_members(index)
+                return self._send_page('GET /orgs/{org}/teams/{team}/members', query, len(members),
+                                       lambda i: members[i], path)
+            children = [i for i in range(index * 10, min(index * 10 + 10, org.team_count)) if i >= 10]
+            return self._send_page('GET /orgs/{org}/teams/{team}/teams', query, len(children),
+                                   lambda i: org.team(children[i]), path)
+
+        match = re.fullmatch(r'/repos/([^/]+)/([^/]+)(/teams|/collaborators)?', path)
+        if match and match.group(1) == org.name:
+            index = org.repo_index(match.group(2))
+            if index is None:
+                return self._send('GET /repos/{org}/{repo}', 404, not_found)
+            if match.group(3) == '/teams':
+                teams = org.repo_teams(index)
+                return self._send_page('GET /repos/{org}/{repo}/teams', query, len(teams), lambda i: teams[i], path)
+            if match.group(3) == '/collaborators':
+                collaborators = org.repo_collaborators(index)
+                return self._send_page('GET /repos/{org}/{repo}/collaborators', query, len(collaborators),
+                                       lambda i: collaborators[i], path)
+            return self._send('GET /repos/{org}/{repo}', 200, org.repo(index), etag=True)
+
+        return self._send(f"{method} (unknown)", 404, not_found)
+
+    def _graphql(self, body: Dict[str, Any]):
+        org = self.state.org
+        query = body.get('query', '')
+        variables = body.get('variables', {})
+        after = int(variables.get('after') or 0)
+
+        if 'team(slug' in query:
+            index = org.team_index(variables.get('slug', ''))
+            repos = self._team_repositories(index) if index is not None else []
+            end = min(after + variables.get('nestedSize', 100), len(repos))
+            data = {'organization': {'team': {'repositories': {
+                'pageInfo': {'hasNextPage': end < len(repos), 'endCursor': str(end)},
+                'edges': repos[after:end],
+            }}}}
+            return self._send('POST /graphql (team repositories)', 200, {'data': data})
+
+        if 'teams(first' not in query:
+            indices = org.repo_indices(variables.get('isFork'))
+            end = min(after + variables.get('pageSize', 50), len(indices))
+            nodes = []
+            for i in indices[after:end]:
+                repo = org.repo(i)
+                nodes.append({
+                    'name': repo['name'], 'nameWithOwner': repo['full_name'], 'description': repo['description'],
+                    'diskUsage': repo['size'], 'primaryLanguage': {'name': repo['language']} if repo['language'] else None,
+                    'defaultBranchRef': {'name': 'main'}, 'isPrivate': repo['private'], 'isFork': repo['fork'],
+                    'isArchived': repo['archived'], 'isDisabled': False, 'url': repo['html_url'],
+                    'createdAt': repo['created_at'], 'updatedAt': repo['updated_at'], 'pushedAt': repo['pushed_at'],
+                    'stargazerCount': repo['stargazers_count'], 'forkCount': repo['forks_count'],
+                    'issues': {'totalCount': repo['open_issues_count']}, 'pullRequests': {'totalCount': 0},
+                    'collaborators': {'pageInfo': {'hasNextPage': False}, 'edges': [
+                        {'permission': GRAPHQL_PERMISSIONS[{v: k for k, v in ROLE_NAMES.items()}[c['role_name']]],
+                         'node': {'login': c['login'], 'databaseId': c['id'], 'id': c['node_id'],
+                                  'avatarUrl': c['avatar_url'], 'url': c['html_url'], 'isSiteAdmin': False}}
+                        for c in org.repo_collaborators(i)
+                    ]},
+                })
+            data = {'organization': {'repositories': {
+                'pageInfo': {'hasNextPage': end < len(indices), 'endCursor': str(end)}, 'nodes': nodes,
+            }}}
+            return self._send('POST /graphql (repositories)', 200, {'data': data})
+
+        end = min(after + 50, org.team_count)
+        nested = variables.get('nestedSize', 100)
+        nodes = []
+        for i in range(after, end):
+            team = org.team(i)
+            repos = self._team_repositories(i)
+            nodes.append({
+                'databaseId': team['id'], 'id': team['node_id'], 'name': team['name'], 'slug': team['slug'],
+                'description': team['description'], 'privacy': 'CLOSED', 'url': team['html_url'],
+                'repositories': {'pageInfo': {'hasNextPage': len(repos) > nested, 'endCursor': str(nested)},
+                                 'edges': repos[:nested]},
+            })
+        data = {'organization': {'teams': {'pageInfo': {'hasNextPage': end < org.team_count, 'endCursor': str(end)},
+                                           'nodes': nodes}}}
+        return self._send('POST /graphql (teams)', 200, {'data': data})
+
+    def _team_repositories(self, team_index: int) -> List[Dict[str, Any]]:
+        """Invert repo -> teams for one team (cached per server)"""
+        cache = getattr(self.server, 'team_repositories', None)
+        if cache is None:
+            cache = {}
+            org = self.state.org
+            for i in range(org.repo_count):
+                for team in org.repo_teams(i):
+                    cache.setdefault(team['id'] - 5000, []).append(
+                        {'permission': GRAPHQL_PERMISSIONS[team['permission']], 'node': {'name': org.repo_name(i)}})
+            self.server.team_repositories = cache
+        return cache.get(team_index, [])
+
+    # Azure DevOps
+
+    def _azure(self, method: str, path: str, query: Dict[str, List[str]], body: Any):
+        state = self.state
+        top = int(query.get('$top', ['100'])[0])
+        skip = int(query.get('$skip', ['0'])[0])
+
+        if path.endswith('/_apis/projects'):
+            return self._send('GET /_apis/projects', 200, {'count': 1, 'value': [{'id': 'p1', 'name': state.azure_project}]})
+
+        match = re.search(r'/_apis/projects/([^/]+)/teams$', path)
+        if match:
+            if method == 'POST':
+                with state.lock:
+                    team = {'id': f"team-{len(state.azure_teams) + 1}", 'name': body['name'],
+                            'description': body.get('description', '')}
+                    state.azure_teams[body['name']] = team
+                return self._send('POST /_apis/projects/{project}/teams', 200, team)
+            with state.lock:
+                teams = list(state.azure_teams.values())
+            return self._send('GET /_apis/projects/{project}/teams', 200,
+                              {'count': len(teams[skip:skip + top]), 'value': teams[skip:skip + top]})
+
+        if path.endswith('/_apis/userentitlements'):
+            start = int(query.get('continuationToken', [str(skip)])[0])
+            end = min(start + top, state.org.member_count)
+            users = [{'id': f"entitlement-{i}", 'user': {
+                'principalName': f"{state.org.user(i)['login']}@example.com",
+                'mailAddress': f"{state.org.user(i)['login']}@example.com",
+                'displayName': f"User {i}", 'descriptor': f"aad.user{i}",
+            }} for i in range(start, end)]
+            headers = {'x-ms-continuationtoken': str(end)} if end < state.org.member_count else {}
+            return self._send('GET /_apis/userentitlements', 200, {'value': users}, headers=headers)
+
+        match = re.search(r'/_apis/graph/descriptors/([^/]+)$', path)
+        if match:
+            return self._send('GET /_apis/graph/descriptors/{id}', 200, {'value': f"vssgp.{match.group(1)}"})
+
+        match = re.search(r'/_apis/graph/memberships/([^/]+)(?:/([^/]+))?$', path)
+        if match:
+            subject, container = match.groups()
+            with state.lock:
+                if container is None:
+                    members = sorted(state.azure_memberships.get(subject, set()))
+                    payload = {'count': len(members), 'value': [
+                        {'memberDescriptor': m, 'containerDescriptor': subject} for m in members]}
+                elif method == 'PUT':
+                    state.azure_memberships.setdefault(container, set()).add(subject)
+                    payload = {'memberDescriptor': subject, 'containerDescriptor': container}
+                else:
+                    state.azure_memberships.get(container, set()).discard(subject)
+                    payload = None
+            return self._send(f"{method} /_apis/graph/memberships", 200, payload)
+
+        return self._send(f"{method} (unknown azure)", 404, {'message': 'Not Found'})
+
+
+def start_server(state: FakeServerState, host: str = '127.0.0.1', port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the fake API server in a background thread; returns the server and its base URL"""
+    handler = type('BoundFakeAPIHandler', (FakeAPIHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake GitHub / Azure DevOps API server for benchmarks')
+    parser.add_argument('--size', choices=sorted(PRESETS), default='1k', help='Synthetic organization size')
+    parser.add_argument('--org', default='bench-org', help='Synthetic organization name')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Added latency per request')
+    parser.add_argument('--rate-limit', type=int, default=0, help='Requests per window per token (0 = unlimited)')
+    parser.add_argument('--rate-window', type=float, default=3600, help='Rate-limit window in seconds')
+    parser.add_argument('--rate-limit-mode', choices=['403', '429'], default='403')
+    args = parser.parse_args()
+
+    repos, members, teams = PRESETS[args.size]
+    state = FakeServerState(SyntheticOrg(args.org, repos, members, teams), latency=args.latency_ms / 1000,
+                            rate_limit=args.rate_limit, rate_window=args.rate_window,
+                            rate_limit_mode=args.rate_limit_mode)
+    server, url = start_server(state, port=args.port)
+    print(f"Serving '{args.org}' ({repos} repos, {members} members, {teams} teams) at {url}")
+    print(f"Statistics: {url}/__stats")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the organization scanner.
+
+Starts the local fake API server (benchmarks/fake_server.py) and runs
+src/main.py against it for each combination of organization size, worker
+count and extra scanner arguments, reporting wall time, request count,
+peak RSS and throughput.
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, Any, List
+
+from fake_server import PRESETS, FakeServerState, SyntheticOrg, start_server
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(REPO_ROOT, 'src', 'main.py')
+
+
+def fetch_stats(base_url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.load(response)
+
+
+def run_scan(base_url: str, org_name: str, workers: int, extra_args: List[str], work_dir: str,
+             warm_cache: bool) -> Dict[str, Any]:
+    """Run one scan against the fake server and measure it"""
+    cache_dir = os.path.join(work_dir, 'http-cache')
+    env = dict(os.environ)
+    env.update({
+        'GITHUB_TOKEN': 'benchmark-token',
+        'GITHUB_API_URL': base_url,
+        'GITHUB_GRAPHQL_URL': f"{base_url}/graphql",
+        'AZURE_DEVOPS_TOKEN': 'benchmark-token',
+        'AZURE_DEVOPS_ORG': 'bench',
+        'AZURE_DEVOPS_URL': base_url,
+        'AZURE_DEVOPS_GRAPH_URL': base_url,
+        'HTTP_CACHE_DIR': cache_dir,
+        'RATE_LIMIT_STATE_FILE': os.path.join(work_dir, 'rate-limit-state.json'),
+    })
+    command = [sys.executable, MAIN_SCRIPT, '--org', org_name, '--workers', str(workers),
+               '--output-dir', os.path.join(work_dir, 'output')] + extra_args
+
+    if warm_cache:
+        # Populate the response cache so the measured run revalidates with ETags
+        subprocess.run(command, env=env, cwd=work_dir, stdout=subprocess.DEVNULL, check=True)
+
+    before = fetch_stats(base_url)
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env=env, cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                               text=True)
+    stderr = process.stderr.read()
+    process.stderr.close()
+    # wait4 reports the resource usage of this scan alone; ru_maxrss is KiB on Linux
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    after = fetch_stats(base_url)
+
+    if process.returncode != 0:
+        raise RuntimeError(f"Scan failed ({process.returncode}): {stderr.strip()[-2000:]}")
+
+    endpoints = {name: count - before['endpoints'].get(name, 0)
+                 for name, count in after['endpoints'].items() if count != before['endpoints'].get(name, 0)}
+    return {
+        'wall_seconds': round(elapsed, 3),
+        'requests': after['requests'] - before['requests'],
+        'not_modified': after['not_modified'] - before['not_modified'],
+        'rate_limited': after['rate_limited'] - before['rate_limited'],
+        'bytes': after['bytes'] - before['bytes'],
+        'peak_rss_mb': round(usage.ru_maxrss / 1024, 1),
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run offline scanner benchmarks against a local fake API server')
+    parser.add_argument('--sizes', default='1k', help=f"Comma-separated organization sizes ({', '.join(PRESETS)})")
+    parser.add_argument('--workers', default='1,8', help='Comma-separated --workers values')
+    parser.add_argument('--variant', action='append', default=None, metavar='ARGS',
+                        help="Extra scanner arguments for one variant, e.g. --variant '--backend graphql' "
+                             "(repeatable; default: a single variant without extra arguments)")
+    parser.add_argument('--latency-ms', type=float, default=0, help='Latency added by the fake server per request')
+    parser.add_argument('--rate-limit', type=int, default=0, help='Fake server requests per window (0 = unlimited)')
+    parser.add_argument('--rate-window', type=float, default=3600, help='Fake server rate-limit window in seconds')
+    parser.add_argument('--rate-limit-mode', choices=['403', '429'], default='403')
+    parser.add_argument('--warm-cache', action='store_true', help='Measure a second run with a populated HTTP cache')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    variants = args.variant or ['']
+    results = []
+    print(f"{'size':>5} {'workers':>7} {'variant':<28} {'wall s':>8} {'requests':>9} {'304s':>6} "
+          f"{'peak MB':>8} {'repos/s':>8}")
+    for size in args.sizes.split(','):
+        repos, members, teams = PRESETS[size]
+        org_name = f"bench-{size}"
+        state = FakeServerState(SyntheticOrg(org_name, repos, members, teams), latency=args.latency_ms / 1000,
+                                rate_limit=args.rate_limit, rate_window=args.rate_window,
+                                rate_limit_mode=args.rate_limit_mode)
+        server, base_url = start_server(state)
+        try:
+            for workers in (int(w) for w in args.workers.split(',')):
+                for variant in variants:
+                    with tempfile.TemporaryDirectory(prefix='scanner-bench-') as work_dir:
+                        measurement = run_scan(base_url, org_name, workers, shlex.split(variant), work_dir,
+                                               args.warm_cache)
+                    measurement.update({
+                        'size': size,
+                        'repositories': repos,
+                        'workers': workers,
+                        'variant': variant,
+                        'repos_per_second': round(repos / measurement['wall_seconds'], 1),
+                    })
+                    results.append(measurement)
+                    print(f"{size:>5} {workers:>7} {variant or '(default)':<28} {measurement['wall_seconds']:>8.2f} "
+                          f"{measurement['requests']:>9} {measurement['not_modified']:>6} "
+                          f"{measurement['peak_rss_mb']:>8} {measurement['repos_per_second']:>8}")
+        finally:
+            server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
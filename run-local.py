@@ -1,18 +1,42 @@
 #!/usr/bin/env python3
 """
 Local runner for GitHub Organization Analysis
-This script runs the analysis locally without needing Azure DevOps pipelines
+This script runs the analysis locally without needing Azure DevOps pipelines.
+Extra command line options are passed through to the scanner, e.g.
+    python run-local.py --workers 8 --incremental
 """
 
+import hashlib
+import json
 import os
 import sys
 import subprocess
+from importlib.util import find_spec
 from pathlib import Path
 
+REQUIREMENTS_FILE = Path('requirements.txt')
+# Records which requirements.txt was last installed into which interpreter
+DEPENDENCY_STAMP_FILE = Path('.run-local-deps.json')
+# Import names of the packages the scanner needs at runtime
+REQUIRED_MODULES = ('requests', 'dotenv')
+
+def _dependency_stamp():
+    """Hash of requirements.txt plus the interpreter it is installed for"""
+    digest = hashlib.sha256(REQUIREMENTS_FILE.read_bytes()).hexdigest()
+    return {'requirements_sha256': digest, 'python': sys.executable, 'version': sys.version}
+
+def dependencies_current():
+    """Whether requirements.txt is unchanged since the last install and its modules still import"""
+    try:
+        stamp = json.loads(DEPENDENCY_STAMP_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return False
+    return stamp == _dependency_stamp() and all(find_spec(module) for module in REQUIRED_MODULES)
+
 def setup_environment():
     """Setup local environment for running the analysis"""
     print("🔧 Setting up local environment...")
-    
+
     # Check if .env file exists
     env_file = Path('.env')
     if not env_file.exists():
@@ -20,125 +44,100 @@ def setup_environment():
         print("   cp .env.template .env")
         print("   # Then edit .env with your actual tokens")
         return False
-    
-    # Install dependencies
+
+    # Install dependencies only when requirements.txt changed since the last run
+    if dependencies_current():
+        print("✅ Dependencies up to date")
+        return True
+
     print("📦 Installing dependencies...")
     try:
-        subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'], 
+        subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', str(REQUIREMENTS_FILE)],
                       check=True, capture_output=True, text=True)
+        DEPENDENCY_STAMP_FILE.write_text(json.dumps(_dependency_stamp()), encoding='utf-8')
         print("✅ Dependencies installed successfully")
     except subprocess.CalledProcessError as e:
         print(f"❌ Failed to install dependencies: {e}")
+        print(e.stderr)
         return False
-    
+
     return True
 
 def validate_environment():
     """Validate that all required environment variables are set"""
     print("🔍 Validating environment variables...")
-    
+
     required_vars = ['GITHUB_TOKEN', 'GITHUB_ORG', 'AZURE_DEVOPS_TOKEN', 'AZURE_DEVOPS_ORG', 'AZURE_DEVOPS_PROJECT']
     missing_vars = []
-    
+
     for var in required_vars:
         if not os.getenv(var):
             missing_vars.append(var)
-    
+
     if missing_vars:
         print(f"❌ Missing environment variables: {', '.join(missing_vars)}")
         print("   Please check your .env file")
         return False
-    
+
     print("✅ All environment variables are set")
     return True
 
-def test_github_connection():
-    """Test GitHub API connection"""
+def load_scanner():
+    """Import the scanner in process; its heavier modules load on first use"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent / 'src'))
+    import main as scanner
+    return scanner
+
+def test_github_connection(clients):
+    """Test GitHub API connection with the scanner's own client"""
     print("🔗 Testing GitHub connection...")
-    
+
     try:
-        import requests
-        token = os.getenv('GITHUB_TOKEN')
-        headers = {'Authorization': f'token {token}'}
-        response = requests.get('https://api.github.com/user', headers=headers)
-        
-        if response.status_code == 200:
-            user = response.json()
-            print(f"✅ GitHub connection successful - authenticated as: {user.get('login', 'Unknown')}")
-            return True
-        else:
-            print(f"❌ GitHub authentication failed: {response.status_code}")
-            return False
+        user = clients.github_api.get_authenticated_user()
+        print(f"✅ GitHub connection successful - authenticated as: {user.get('login', 'Unknown')}")
+        return True
     except Exception as e:
         print(f"❌ GitHub connection error: {e}")
         return False
 
-def test_azure_devops_connection():
-    """Test Azure DevOps API connection"""
+def test_azure_devops_connection(clients):
+    """Test Azure DevOps API connection with the scanner's own client"""
     print("🔗 Testing Azure DevOps connection...")
-    
+
     try:
-        import requests
-        import base64
-        
-        token = os.getenv('AZURE_DEVOPS_TOKEN')
-        org = os.getenv('AZURE_DEVOPS_ORG')
-        
-        auth = base64.b64encode(f':{token}'.encode()).decode()
-        headers = {'Authorization': f'Basic {auth}'}
-        response = requests.get(f'https://dev.azure.com/{org}/_apis/projects?api-version=6.0', headers=headers)
-        
-        if response.status_code == 200:
-            projects = response.json().get('value', [])
-            print(f"✅ Azure DevOps connection successful - found {len(projects)} projects")
-            return True
-        else:
-            print(f"❌ Azure DevOps authentication failed: {response.status_code}")
-            return False
+        project_count = sum(1 for _ in clients.azure_devops_api.iter_projects())
+        print(f"✅ Azure DevOps connection successful - found {project_count} projects")
+        return True
     except Exception as e:
         print(f"❌ Azure DevOps connection error: {e}")
         return False
 
-def run_analysis():
-    """Run the GitHub organization analysis"""
+def run_analysis(scanner, args, clients):
+    """Run the GitHub organization analysis in process, reusing the preflight's clients"""
     print("🚀 Running GitHub Organization Analysis...")
-    
-    github_org = os.getenv('GITHUB_ORG')
-    azure_project = os.getenv('AZURE_DEVOPS_PROJECT')
-    
-    print(f"   GitHub Organization: {github_org}")
-    print(f"   Azure DevOps Project: {azure_project}")
-    
-    # Create output directory
-    os.makedirs('output', exist_ok=True)
-    
+    print(f"   GitHub Organization: {args.org}")
+    print(f"   Azure DevOps Project: {args.azure_project}")
+
     try:
-        # Run the main analysis script
-        cmd = [sys.executable, 'src/main.py', '--org', github_org, '--azure-project', azure_project]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ Analysis completed successfully!")
-            print("\n📊 Output:")
-            print(result.stdout)
-            
-            # List output files
-            output_path = Path('output')
-            if output_path.exists():
-                output_files = list(output_path.glob('*'))
-                if output_files:
-                    print(f"\n📁 Generated files in output/:")
-                    for file in output_files:
-                        print(f"   - {file.name}")
-                else:
-                    print("   No output files generated")
-            
-            return True
-        else:
+        if scanner.run_scan(args, clients) != 0:
             print("❌ Analysis failed!")
-            print(f"Error: {result.stderr}")
             return False
-            
+
+        print("✅ Analysis completed successfully!")
+
+        # List output files
+        output_path = Path(args.output_dir)
+        if output_path.exists():
+            output_files = list(output_path.glob('*'))
+            if output_files:
+                print(f"\n📁 Generated files in {args.output_dir}/:")
+                for file in output_files:
+                    print(f"   - {file.name}")
+            else:
+                print("   No output files generated")
+
+        return True
+
     except Exception as e:
         print(f"❌ Analysis error: {e}")
         return False
@@ -147,34 +146,44 @@ def main():
     """Main execution function"""
     print("🎯 GitHub Organization Analysis - Local Runner")
     print("=" * 50)
-    
+
     # Load environment variables from .env file
     try:
         from dotenv import load_dotenv
         load_dotenv()
     except ImportError:
         print("⚠️  python-dotenv not installed. Make sure your environment variables are set manually.")
-    
+
     # Setup and validation steps
     if not setup_environment():
         return 1
-    
+
     if not validate_environment():
         return 1
-    
-    if not test_github_connection():
+
+    # The scanner runs in this process; the clients created for the preflight are reused for the scan
+    scanner = load_scanner()
+    args = scanner.parse_args(['--org', os.getenv('GITHUB_ORG'), '--azure-project', os.getenv('AZURE_DEVOPS_PROJECT'),
+                               '--progress'] + sys.argv[1:])
+    try:
+        clients = scanner.ScanClients(args)
+    except Exception as e:
+        print(f"❌ Could not create API clients: {e}")
+        return 1
+
+    if not test_github_connection(clients):
         return 1
-    
-    if not test_azure_devops_connection():
+
+    if not test_azure_devops_connection(clients):
         return 1
-    
+
     # Run the analysis
-    if not run_analysis():
+    if not run_analysis(scanner, args, clients):
         return 1
-    
+
     print("\n🎉 All tasks completed successfully!")
     return 0
 
 if __name__ == "__main__":
     exit_code = main()
-    sys.exit(exit_code)
\ No newline at end of file
+    sys.exit(exit_code)
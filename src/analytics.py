@@ -0,0 +1,94 @@
+import os
+from datetime import datetime, timezone
+from typing import List, Dict, Any
+
+import pandas as pd
+
+ANALYTICS_COLUMNS = (
+    'name', 'size', 'language', 'private', 'fork', 'archived', 'disabled',
+    'stargazers_count', 'forks_count', 'open_issues_count',
+    'created_at', 'updated_at', 'pushed_at', 'team_count', 'collaborator_count',
+)
+STALENESS_BINS = [-float('inf'), 30, 90, 365, float('inf')]
+STALENESS_LABELS = ['<30d', '30-90d', '90-365d', '>365d']
+TOP_N = 10
+
+
+class RepositoryTable:
+    """Column-oriented repository table, filled one repository at a time"""
+
+    def __init__(self):
+        self.columns: Dict[str, List[Any]] = {column: [] for column in ANALYTICS_COLUMNS}
+
+    def add(self, repo: Dict[str, Any]):
+        """Append one repository's analytics columns"""
+        for column in ANALYTICS_COLUMNS:
+            self.columns[column].append(repo.get(column))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Build a typed DataFrame from the collected columns"""
+        df = pd.DataFrame(self.columns)
+        for column in ('size', 'stargazers_count', 'forks_count', 'open_issues_count', 'team_count', 'collaborator_count'):
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype('int64')
+        for column in ('private', 'fork', 'archived', 'disabled'):
+            df[column] = df[column].fillna(False).astype(bool)
+        for column in ('created_at', 'updated_at', 'pushed_at'):
+            df[column] = pd.to_datetime(df[column].replace('', None), utc=True, errors='coerce', format='ISO8601')
+        df['language'] = df['language'].fillna('Unknown').astype('category')
+        return df
+
+
+def compute_analytics(df: pd.DataFrame, top_n: int = TOP_N) -> Dict[str, Any]:
+    """Compute vectorized aggregates over the repository table"""
+    if df.empty:
+        return {'total_repositories': 0}
+
+    now = pd.Timestamp(datetime.now(timezone.utc))
+    days_since_push = (now - df['pushed_at']).dt.days
+    staleness = pd.cut(days_since_push, bins=STALENESS_BINS, labels=STALENESS_LABELS, right=False)
+    staleness_counts = staleness.value_counts().reindex(STALENESS_LABELS, fill_value=0)
+
+    by_language = df.groupby('language', observed=True)['size'].agg(['count', 'sum']).sort_values('sum', ascending=False)
+    percentiles = df['size'].quantile([0.5, 0.9, 0.99])
+    breakdown = df.groupby(['fork', 'archived']).size()
+    largest = df.nlargest(top_n, 'size')[['name', 'size', 'language']]
+
+    return {
+        'total_repositories': int(len(df)),
+        'size_kb': {
+            'total': int(df['size'].sum()),
+            'mean': float(df['size'].mean()),
+            'p50': float(percentiles[0.5]),
+            'p90': float(percentiles[0.9]),
+            'p99': float(percentiles[0.99]),
+            'max': int(df['size'].max()),
+        },
+        'languages': {
+            str(language): {'repositories': int(row['count']), 'size_kb': int(row['sum'])}
+            for language, row in by_language.iterrows()
+        },
+        'staleness_by_pushed_at': {
+            **{label: int(count) for label, count in staleness_counts.items()},
+            'never_pushed': int(days_since_push.isna().sum()),
+        },
+        'fork_archived_breakdown': [
+            {'fork': bool(fork), 'archived': bool(archived), 'repositories': int(count)}
+            for (fork, archived), count in breakdown.items()
+        ],
+        'largest_repositories': [
+            {'name': row['name'], 'size_kb': int(row['size']), 'language': str(row['language'])}
+            for _, row in largest.iterrows()
+        ],
+        'access': {
+            'repositories_without_teams': int((df['team_count'] == 0).sum()),
+            'mean_collaborators': float(df['collaborator_count'].mean()),
+        },
+    }
+
+
+def save_to_parquet(df: pd.DataFrame, filename: str, output_dir: str = "output") -> str:
+    """Save the repository table to a Parquet file"""
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, filename)
+    df.to_parquet(filepath, index=False)
+    return filepath
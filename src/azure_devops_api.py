@@ -1,10 +1,26 @@
 import os
+import time
+import threading
 import requests
 import base64
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Any, Optional
+from http_session import create_session, get_shared_session
+from rate_limit import RateLimiter
+from metrics import ScanMetrics
+from console import get_logger
+from pagination import iter_azure_devops_pages
+from azure_sync import PermissionSyncEngine, plan_has_changes
+
+DEFAULT_TEAM_CACHE_TTL = 300
+GRAPH_API_VERSION = "6.0-preview.1"
+
+log = get_logger('azure_devops')
 
 class AzureDevOpsAPI:
-    def __init__(self):
+    def __init__(self, pool_size: Optional[int] = None, rate_limiter: Optional[RateLimiter] = None,
+                 user_map: Optional[Dict[str, str]] = None, metrics: Optional[ScanMetrics] = None,
+                 force_removals: bool = False):
         self.api_version = "6.0"
         self.token = os.getenv('AZURE_DEVOPS_TOKEN')
         self.organization = os.getenv('AZURE_DEVOPS_ORG')
@@ -25,55 +41,138 @@ class AzureDevOpsAPI:
             'Accept': 'application/json'
         }
         
-        self.base_url = f"https://dev.azure.com/{self.organization}"
+        azure_devops_url = os.getenv('AZURE_DEVOPS_URL', "https://dev.azure.com").rstrip('/')
+        graph_url = os.getenv('AZURE_DEVOPS_GRAPH_URL', "https://vssps.dev.azure.com").rstrip('/')
+        self.base_url = f"{azure_devops_url}/{self.organization}"
+        self.graph_url = f"{graph_url}/{self.organization}"
+        self.session = create_session(pool_size=pool_size, rate_limiter=rate_limiter, metrics=metrics)
+        self.session.headers.update(self.headers)
+
+        # Per-project team name -> team index: project -> (loaded_at, index)
+        self.team_cache_ttl = float(os.getenv('AZURE_DEVOPS_TEAM_CACHE_TTL', DEFAULT_TEAM_CACHE_TTL))
+        self._team_index: Dict[str, tuple] = {}
+        self._team_index_lock = threading.Lock()
+        self.sync_engine = PermissionSyncEngine(self, user_map=user_map, max_workers=pool_size or 4,
+                                                force_removals=force_removals)
+
+    def _get_page(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        return self.session.get(url, params=params)
+
+    def iter_projects(self) -> Iterator[Dict[str, Any]]:
+        """Lazily yield all projects in the organization"""
+        url = f"{self.base_url}/_apis/projects?api-version={self.api_version}"
+        return iter_azure_devops_pages(self._get_page, url)
+
+    def iter_teams(self, project_name: str) -> Iterator[Dict[str, Any]]:
+        """Lazily yield all teams in a project"""
+        url = f"{self.base_url}/{project_name}/_apis/projects/{project_name}/teams?api-version={self.api_version}"
+        return iter_azure_devops_pages(self._get_page, url)
+
+    def iter_users(self) -> Iterator[Dict[str, Any]]:
+        """Lazily yield all user entitlements in the organization"""
+        url = f"{self.base_url}/_apis/userentitlements?api-version={self.api_version}"
+        return iter_azure_devops_pages(self._get_page, url)
 
     def get_projects(self) -> List[Dict[str, Any]]:
         """Get all projects in the organization"""
-        url = f"{self.base_url}/_apis/projects?api-version={self.api_version}"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json().get('value', [])
+        return list(self.iter_projects())
 
     def get_teams(self, project_name: str) -> List[Dict[str, Any]]:
         """Get all teams in a project"""
-        url = f"{self.base_url}/{project_name}/_apis/projects/{project_name}/teams?api-version={self.api_version}"
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json().get('value', [])
+            return list(self.iter_teams(project_name))
         except requests.exceptions.RequestException as e:
-            print(f"Warning: Could not fetch teams for project {project_name}: {e}")
+            log.warning(f"Warning: Could not fetch teams for project {project_name}: {e}")
             return []
 
     def get_users(self) -> List[Dict[str, Any]]:
         """Get all users in the organization"""
-        url = f"{self.base_url}/_apis/userentitlements?api-version={self.api_version}"
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json().get('value', [])
+            return list(self.iter_users())
         except requests.exceptions.RequestException as e:
-            print(f"Warning: Could not fetch users: {e}")
+            log.warning(f"Warning: Could not fetch users: {e}")
             return []
 
-    def sync_repository_permissions(self, project_name: str, repo_name: str, teams: List[Dict], collaborators: List[Dict]):
-        """Sync repository permissions - placeholder implementation"""
-        print(f"Syncing permissions for repository: {repo_name}")
-        print(f"  Teams: {len(teams)}")
-        print(f"  Collaborators: {len(collaborators)}")
-        
-        # TODO: Implement actual permission synchronization logic
-        # This would involve creating/updating teams and user permissions in Azure DevOps
-        return True
+    def get_descriptor(self, storage_key: str) -> str:
+        """Get the Graph subject descriptor for an identity id (e.g. a team id)"""
+        url = f"{self.graph_url}/_apis/graph/descriptors/{storage_key}?api-version={GRAPH_API_VERSION}"
+        response = self.session.get(url)
+        response.raise_for_status()
+        return response.json()['value']
+
+    def get_group_member_descriptors(self, group_descriptor: str) -> List[str]:
+        """Get the descriptors of the direct members of a Graph group"""
+        url = f"{self.graph_url}/_apis/graph/memberships/{group_descriptor}?direction=down&api-version={GRAPH_API_VERSION}"
+        response = self.session.get(url)
+        response.raise_for_status()
+        return [membership['memberDescriptor'] for membership in response.json().get('value', [])]
+
+    def add_membership(self, subject_descriptor: str, container_descriptor: str) -> bool:
+        """Add a user or group to a Graph group"""
+        url = f"{self.graph_url}/_apis/graph/memberships/{subject_descriptor}/{container_descriptor}?api-version={GRAPH_API_VERSION}"
+        try:
+            response = self.session.put(url)
+            response.raise_for_status()
+            return True
+        except requests.exceptions.RequestException as e:
+            log.warning(f"Warning: Could not add {subject_descriptor} to {container_descriptor}: {e}")
+            return False
+
+    def remove_membership(self, subject_descriptor: str, container_descriptor: str) -> bool:
+        """Remove a user or group from a Graph group"""
+        url = f"{self.graph_url}/_apis/graph/memberships/{subject_descriptor}/{container_descriptor}?api-version={GRAPH_API_VERSION}"
+        try:
+            response = self.session.delete(url)
+            response.raise_for_status()
+            return True
+        except requests.exceptions.RequestException as e:
+            log.warning(f"Warning: Could not remove {subject_descriptor} from {container_descriptor}: {e}")
+            return False
+
+    def sync_repository_permissions(self, project_name: str, repo_name: str, teams: List[Dict], collaborators: List[Dict],
+                                    dry_run: bool = False) -> Dict[str, Any]:
+        """Sync repository permissions by applying only the differences from the current Azure DevOps state.
+
+        Returns the change plan; when changes were applied it also holds their result.
+        """
+        plan = self.sync_engine.plan(project_name, repo_name, teams, collaborators)
+        if dry_run or not plan_has_changes(plan):
+            return plan
+
+        plan['result'] = self.sync_engine.apply(plan)
+        return plan
+
+    def get_team_index(self, project_name: str) -> Dict[str, Dict[str, Any]]:
+        """Get the cached team name -> team index for a project, loading it when missing or expired.
+
+        Load errors propagate instead of caching an empty index, which would make
+        every plan recreate the project's teams until the cache expires.
+        """
+        with self._team_index_lock:
+            cached = self._team_index.get(project_name)
+            if cached and time.monotonic() - cached[0] < self.team_cache_ttl:
+                return cached[1]
+
+        index = {team['name']: team for team in self.iter_teams(project_name)}
+        with self._team_index_lock:
+            self._team_index[project_name] = (time.monotonic(), index)
+        return index
+
+    def invalidate_team_index(self, project_name: Optional[str] = None):
+        """Drop the cached team index for a project, or for all projects"""
+        with self._team_index_lock:
+            if project_name is None:
+                self._team_index.clear()
+            else:
+                self._team_index.pop(project_name, None)
 
     def create_or_update_team(self, project_name: str, team_name: str, description: str = "") -> Dict[str, Any]:
         """Create or update a team in Azure DevOps"""
         # Check if team exists
-        teams = self.get_teams(project_name)
-        existing_team = next((team for team in teams if team['name'] == team_name), None)
+        existing_team = self.get_team_index(project_name).get(team_name)
         
         if existing_team:
-            print(f"Team '{team_name}' already exists")
+            log.info(f"Team '{team_name}' already exists")
             return existing_team
         
         # Create new team
@@ -84,25 +183,46 @@ class AzureDevOpsAPI:
         }
         
         try:
-            response = requests.post(url, headers=self.headers, json=data)
+            response = self.session.post(url, json=data)
             response.raise_for_status()
-            print(f"Created team: {team_name}")
-            return response.json()
+            log.info(f"Created team: {team_name}")
+            team = response.json()
         except requests.exceptions.RequestException as e:
-            print(f"Error creating team {team_name}: {e}")
+            log.error(f"Error creating team {team_name}: {e}")
             return {}
 
+        # Keep the cached index current instead of reloading it
+        with self._team_index_lock:
+            cached = self._team_index.get(project_name)
+            if cached:
+                cached[1][team_name] = team
+        return team
+
+    def ensure_teams(self, project_name: str, team_names: List[str], max_workers: int = 1) -> Dict[str, Dict[str, Any]]:
+        """Make sure every named team exists, creating only the missing ones.
+
+        Returns a team name -> team map; teams that could not be created are omitted.
+        """
+        index = self.get_team_index(project_name)
+        wanted = list(dict.fromkeys(team_names))
+        missing = [name for name in wanted if name not in index]
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                list(executor.map(lambda name: self.create_or_update_team(project_name, name), missing))
+
+        index = self.get_team_index(project_name)
+        return {name: index[name] for name in wanted if name in index}
+
 # Legacy functions for backward compatibility
 def add_repository_to_team(organization, project, team, repository, pat):
-    import requests
-
     url = f"https://dev.azure.com/{organization}/{project}/_apis/projects/{project}/teams/{team}/repositories/{repository}?api-version=6.0"
     headers = {
         'Content-Type': 'application/json',
         'Authorization': f'Basic {pat}'
     }
 
-    response = requests.put(url, headers=headers)
+    response = get_shared_session().put(url, headers=headers)
 
     if response.status_code == 200:
         return True
@@ -111,15 +231,13 @@ def add_repository_to_team(organization, project, team, repository, pat):
 
 
 def add_repository_to_user(organization, user_id, repository, pat):
-    import requests
-
     url = f"https://dev.azure.com/{organization}/_apis/userentitlements/{user_id}/repositories/{repository}?api-version=6.0"
     headers = {
         'Content-Type': 'application/json',
         'Authorization': f'Basic {pat}'
     }
 
-    response = requests.put(url, headers=headers)
+    response = get_shared_session().put(url, headers=headers)
 
     if response.status_code == 200:
         return True
@@ -128,34 +246,30 @@ def add_repository_to_user(organization, user_id, repository, pat):
 
 
 def get_azure_devops_teams(organization, project, pat):
-    import requests
-
     url = f"https://dev.azure.com/{organization}/{project}/_apis/projects/{project}/teams?api-version=6.0"
     headers = {
         'Content-Type': 'application/json',
         'Authorization': f'Basic {pat}'
     }
 
-    response = requests.get(url, headers=headers)
+    session = get_shared_session()
 
-    if response.status_code == 200:
-        return response.json()['value']
-    else:
+    try:
+        return list(iter_azure_devops_pages(lambda page_url, params: session.get(page_url, headers=headers, params=params), url))
+    except requests.exceptions.RequestException:
         return None
 
 
 def get_azure_devops_users(organization, project, pat):
-    import requests
-
     url = f"https://dev.azure.com/{organization}/_apis/userentitlements?api-version=6.0"
     headers = {
         'Content-Type': 'application/json',
         'Authorization': f'Basic {pat}'
     }
 
-    response = requests.get(url, headers=headers)
+    session = get_shared_session()
 
-    if response.status_code == 200:
-        return response.json()['value']
-    else:
+    try:
+        return list(iter_azure_devops_pages(lambda page_url, params: session.get(page_url, headers=headers, params=params), url))
+    except requests.exceptions.RequestException:
         return None
\ No newline at end of file
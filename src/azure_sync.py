@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from console import get_logger
+
+log = get_logger('azure_devops')
+
+DEFAULT_REPO_TEAM_PREFIX = 'gh-repo-'
+
+
+def load_user_map(path: Optional[str]) -> Dict[str, str]:
+    """Load an optional GitHub login -> Azure DevOps principal name map from a JSON file"""
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {login.lower(): principal for login, principal in json.load(f).items()}
+
+
+def plan_has_changes(plan: Dict[str, Any]) -> bool:
+    """Whether a sync plan requires any write"""
+    return bool(plan['create_teams'] or plan['add_members'] or plan['remove_members'])
+
+
+class PermissionSyncEngine:
+    """Diff-based synchronisation of GitHub repository access into Azure DevOps teams.
+
+    Each repository maps to an Azure DevOps team named <prefix><repo>. Its
+    desired members are the Azure DevOps teams named after the GitHub teams
+    with access plus the Azure DevOps users matching the repository's
+    collaborators. Current team and user state is fetched once per project and
+    cached, the change plan is computed locally, and only the differences are
+    written. A plan that would remove every member of a repository team is
+    withheld unless force_removals is set, since it usually means the GitHub
+    side came back empty rather than that all access was revoked.
+    """
+
+    def __init__(self, azure_devops_api: 'AzureDevOpsAPI', user_map: Optional[Dict[str, str]] = None,
+                 repo_team_prefix: Optional[str] = None, max_workers: int = 4, force_removals: bool = False):
+        self.api = azure_devops_api
+        self.user_map = user_map or {}
+        self.repo_team_prefix = repo_team_prefix if repo_team_prefix is not None else \
+            os.getenv('AZURE_DEVOPS_REPO_TEAM_PREFIX', DEFAULT_REPO_TEAM_PREFIX)
+        self.max_workers = max_workers
+        self.force_removals = force_removals
+        self._lock = threading.Lock()
+        self._users_by_name: Optional[Dict[str, Dict[str, Any]]] = None
+        # team id -> set of member descriptors
+        self._memberships: Dict[str, set] = {}
+        # team id -> group descriptor
+        self._descriptors: Dict[str, str] = {}
+        # project -> team names already in the create_teams of an earlier plan
+        self._planned_teams: Dict[str, set] = {}
+
+    def _load_users(self) -> Dict[str, Dict[str, Any]]:
+        """Index Azure DevOps users by lower-cased principal name and its local part"""
+        with self._lock:
+            if self._users_by_name is not None:
+                return self._users_by_name
+        users_by_name = {}
+        for entitlement in self.api.iter_users():
+            user = entitlement.get('user', {})
+            principal = (user.get('principalName') or user.get('mailAddress') or '').lower()
+            if not principal or not user.get('descriptor'):
+                continue
+            users_by_name[principal] = user
+            users_by_name.setdefault(principal.split('@')[0], user)
+        with self._lock:
+            self._users_by_name = users_by_name
+        return users_by_name
+
+    def _resolve_user(self, login: str) -> Optional[Dict[str, Any]]:
+        """Find the Azure DevOps user for a GitHub login"""
+        users = self._load_users()
+        name = self.user_map.get(login.lower(), login).lower()
+        return users.get(name)
+
+    def _team_descriptor(self, team: Dict[str, Any]) -> str:
+        with self._lock:
+            if team['id'] in self._descriptors:
+                return self._descriptors[team['id']]
+        descriptor = self.api.get_descriptor(team['id'])
+        with self._lock:
+            self._descriptors[team['id']] = descriptor
+        return descriptor
+
+    def _team_members(self, team: Dict[str, Any]) -> set:
+        with self._lock:
+            if team['id'] in self._memberships:
+                return self._memberships[team['id']]
+        members = set(self.api.get_group_member_descriptors(self._team_descriptor(team)))
+        with self._lock:
+            self._memberships[team['id']] = members
+        return members
+
+    def plan(self, project_name: str, repo_name: str, teams: List[Dict], collaborators: List[Dict]) -> Dict[str, Any]:
+        """Compute the minimal set of changes that brings Azure DevOps in line with GitHub"""
+        team_index = self.api.get_team_index(project_name)
+        repo_team_name = f"{self.repo_team_prefix}{repo_name}"
+        github_team_names = list(dict.fromkeys(team['name'] for team in teams if team.get('name')))
+
+        # A team shared by several repositories is created by the first plan that needs it
+        with self._lock:
+            planned = self._planned_teams.setdefault(project_name, set())
+            create_teams = [name for name in [repo_team_name] + github_team_names
+                            if name not in team_index and name not in planned]
+            planned.update(create_teams)
+
+        plan = {
+            'project': project_name,
+            'repository': repo_name,
+            'repo_team': repo_team_name,
+            'create_teams': create_teams,
+            'add_members': [],
+            'remove_members': [],
+            'unmapped_collaborators': [],
+        }
+
+        # Desired members of the repository team, keyed by descriptor when already known
+        desired = {}
+        pending = []
+        for name in github_team_names:
+            if name in team_index:
+                desired[self._team_descriptor(team_index[name])] = {'type': 'team', 'name': name}
+            else:
+                pending.append({'type': 'team', 'name': name})
+        for collaborator in collaborators:
+            login = collaborator.get('login')
+            if not login:
+                continue
+            user = self._resolve_user(login)
+            if user:
+                desired[user['descriptor']] = {'type': 'user', 'name': user.get('principalName'), 'login': login}
+            else:
+                plan['unmapped_collaborators'].append(login)
+
+        current = self._team_members(team_index[repo_team_name]) if repo_team_name in team_index else set()
+        plan['add_members'] = [
+            dict(member, descriptor=descriptor) for descriptor, member in desired.items() if descriptor not in current
+        ] + pending
+        removals = [{'descriptor': descriptor} for descriptor in sorted(current - set(desired))]
+        if removals and len(removals) == len(current) and not self.force_removals:
+            plan['withheld_removals'] = removals
+        else:
+            plan['remove_members'] = removals
+        return plan
+
+    def apply(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a plan: create missing teams, then add and remove memberships concurrently"""
+        project_name = plan['project']
+        created = {}
+        if plan['create_teams']:
+            created = self.api.ensure_teams(project_name, plan['create_teams'], max_workers=self.max_workers)
+            with self._lock:
+                # Teams that could not be created are planned again by the next repository that needs them
+                self._planned_teams.get(project_name, set()).difference_update(
+                    name for name in plan['create_teams'] if name not in created)
+        team_index = self.api.get_team_index(project_name)
+        repo_team = team_index.get(plan['repo_team'])
+        if not repo_team:
+            raise RuntimeError(f"Azure DevOps team '{plan['repo_team']}' could not be created")
+
+        container = self._team_descriptor(repo_team)
+        current = self._team_members(repo_team)
+
+        additions = []
+        missing = 0
+        for member in plan['add_members']:
+            descriptor = member.get('descriptor')
+            if not descriptor:
+                # Team created by this plan; its descriptor is known only now
+                team = team_index.get(member['name'])
+                if not team:
+                    log.warning(f"Warning: Could not add {member['name']} to {plan['repo_team']}: "
+                                f"the team was not created")
+                    missing += 1
+                    continue
+                descriptor = self._team_descriptor(team)
+            if descriptor not in current:
+                additions.append(descriptor)
+        removals = [member['descriptor'] for member in plan['remove_members'] if member['descriptor'] in current]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            added = list(executor.map(lambda d: self.api.add_membership(d, container), additions))
+            removed = list(executor.map(lambda d: self.api.remove_membership(d, container), removals))
+
+        with self._lock:
+            current.update(d for d, ok in zip(additions, added) if ok)
+            current.difference_update(d for d, ok in zip(removals, removed) if ok)
+
+        return {
+            'teams_created': len(created),
+            'members_added': sum(added),
+            'members_removed': sum(removed),
+            'failed': missing + added.count(False) + removed.count(False),
+        }
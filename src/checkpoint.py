@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from report_writer import read_ndjson_records
+
+CHECKPOINT_VERSION = 1
+
+
+def _terminate_last_line(path: str, f):
+    """Terminate a line left truncated by a crash so appended records start cleanly"""
+    if f.tell() > 0:
+        with open(path, 'rb') as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b'\n':
+                f.write('\n')
+
+
+class ListingPages:
+    """Completed pages of one organization listing, restored on resume and recorded as they arrive.
+
+    REST listings key pages by page number. Cursor-paginated (GraphQL)
+    listings key them by position and keep the cursor that follows each page,
+    None after the last one.
+    """
+
+    def __init__(self, checkpoint: 'ScanCheckpoint', name: str, records: List[Dict[str, Any]]):
+        self._checkpoint = checkpoint
+        self.name = name
+        self.completed: Dict[int, List[Any]] = {record['page']: record['items'] for record in records}
+        self._cursors: Dict[int, Optional[str]] = {record['page']: record.get('cursor') for record in records}
+        self._extra: Dict[int, Any] = {record['page']: record.get('extra') for record in records}
+
+    def record(self, page: int, items: List[Any]):
+        """Record a completed numbered page"""
+        self._checkpoint._append_page({'listing': self.name, 'page': page, 'items': items})
+        self.completed[page] = items
+
+    def record_cursor_page(self, page: int, items: List[Any], next_cursor: Optional[str], extra: Any = None):
+        """Record a completed cursor page with the cursor of the page that follows it"""
+        self._checkpoint._append_page({'listing': self.name, 'page': page, 'items': items,
+                                       'cursor': next_cursor, 'extra': extra})
+        self.completed[page] = items
+        self._cursors[page] = next_cursor
+        self._extra[page] = extra
+
+    def resume_point(self) -> Tuple[List[Tuple[List[Any], Any]], Optional[str], bool]:
+        """Restored cursor pages as (items, extra), the cursor to continue from, and whether the listing finished"""
+        pages = []
+        cursor = None
+        while len(pages) in self.completed:
+            page = len(pages)
+            pages.append((self.completed[page], self._extra.get(page)))
+            cursor = self._cursors.get(page)
+            if cursor is None:
+                return pages, None, True
+        return pages, cursor, False
+
+
+class ScanCheckpoint:
+    """Checkpoint of an in-progress organization scan in the output directory.
+
+    {org}_checkpoint.json holds the organization listing (details, repositories,
+    members and teams) and is replaced atomically. While the listing is still
+    being fetched, each completed listing page is appended to
+    {org}_checkpoint_pages.ndjson, so an interrupted listing resumes from its
+    pages instead of page 1. Completed repositories are appended to
+    {org}_checkpoint.ndjson one line at a time and flushed, so a crash loses
+    at most the repository being written.
+    """
+
+    def __init__(self, output_dir: str, org_name: str):
+        self.output_dir = output_dir
+        self.state_path = os.path.join(output_dir, f"{org_name}_checkpoint.json")
+        self.repos_path = os.path.join(output_dir, f"{org_name}_checkpoint.ndjson")
+        self.pages_path = os.path.join(output_dir, f"{org_name}_checkpoint_pages.ndjson")
+        self._repos_file = None
+        self._pages_file = None
+        self._pages: Dict[str, List[Dict[str, Any]]] = {}
+        self._pages_lock = threading.Lock()
+
+    def load_listing(self) -> Optional[Dict[str, Any]]:
+        """Load the checkpointed organization listing, if any"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('version') != CHECKPOINT_VERSION:
+            return None
+        return state
+
+    def open_pages(self, resume: bool):
+        """Open the listing page log, keeping the pages of an interrupted listing when resuming"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._pages = {}
+        if resume and os.path.exists(self.pages_path):
+            for record in read_ndjson_records(self.pages_path):
+                self._pages.setdefault(record['listing'], []).append(record)
+        self._pages_file = open(self.pages_path, 'a' if resume else 'w', encoding='utf-8')
+        _terminate_last_line(self.pages_path, self._pages_file)
+
+    def listing_pages(self, name: str) -> ListingPages:
+        """Pages of a listing; name identifies the endpoint and its parameters"""
+        return ListingPages(self, name, self._pages.get(name, []))
+
+    def _append_page(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._pages_lock:
+            self._pages_file.write(line)
+            self._pages_file.flush()
+
+    def save_listing(self, listing: Dict[str, Any]):
+        """Atomically write the organization listing; its page log is no longer needed"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(listing, version=CHECKPOINT_VERSION), f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+        self._close_pages()
+        if os.path.exists(self.pages_path):
+            os.remove(self.pages_path)
+
+    def load_repositories(self) -> Dict[str, Dict[str, Any]]:
+        """Load completed repositories keyed by name"""
+        if not os.path.exists(self.repos_path):
+            return {}
+        return {record['name']: record for record in read_ndjson_records(self.repos_path)}
+
+    def open(self, resume: bool):
+        """Open the repository log, keeping completed entries when resuming"""
+        self._repos_file = open(self.repos_path, 'a' if resume else 'w', encoding='utf-8')
+        _terminate_last_line(self.repos_path, self._repos_file)
+
+    def append_repository(self, repo_info: Dict[str, Any]):
+        """Record a completed repository"""
+        self._repos_file.write(json.dumps(repo_info, ensure_ascii=False))
+        self._repos_file.write('\n')
+        self._repos_file.flush()
+
+    def _close_pages(self):
+        with self._pages_lock:
+            if self._pages_file:
+                self._pages_file.close()
+                self._pages_file = None
+
+    def close(self):
+        if self._repos_file:
+            self._repos_file.close()
+            self._repos_file = None
+        self._close_pages()
+
+    def clear(self):
+        """Remove the checkpoint after a successful run"""
+        self.close()
+        for path in (self.state_path, self.repos_path, self.pages_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,155 @@
+import json
+import logging
+import sys
+import time
+from typing import Optional, TextIO
+
+LOGGER_NAME = 'scanner'
+# Seconds between progress updates on a terminal and in captured logs
+PROGRESS_INTERVAL_INTERACTIVE = 0.5
+PROGRESS_INTERVAL = 15.0
+
+# Attributes every LogRecord has; anything else was passed through extra= and is structured data
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_active_progress: Optional['ProgressReporter'] = None
+
+
+def get_logger(name: Optional[str] = None) -> logging.Logger:
+    """Logger in the scanner hierarchy, e.g. get_logger('github') -> scanner.github"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record with time, level, logger, message and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage().strip(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """Stream handler that keeps a live progress line intact and flushes only when it matters.
+
+    Routine records are left in the stream's buffer, so thousands of lines do
+    not each cost a synchronous write when output is piped; warnings, errors
+    and terminals are flushed immediately.
+    """
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = self.format(record)
+            if _active_progress and _active_progress.stream is self.stream:
+                _active_progress.clear()
+            self.stream.write(message + self.terminator)
+            if record.levelno >= logging.WARNING or self.stream.isatty():
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+def configure_logging(quiet: bool = False, progress: bool = False, log_format: str = 'text',
+                      stream: Optional[TextIO] = None) -> logging.Logger:
+    """Configure scanner logging.
+
+    quiet shows only warnings and errors. progress hides the per-repository
+    lines (scanner.repository) in favour of a throttled progress line.
+    log_format 'json' writes one structured JSON object per record.
+    """
+    logger = get_logger()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = ConsoleHandler(stream or sys.stdout)
+    handler.setFormatter(JSONFormatter() if log_format == 'json' else logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING if quiet else logging.INFO)
+    logger.propagate = False
+    get_logger('repository').setLevel(logging.WARNING if progress else logging.NOTSET)
+    get_logger('progress').setLevel(logging.INFO if progress else logging.WARNING)
+    return logger
+
+
+class ProgressReporter:
+    """Throttled progress line with completion rate, ETA and error count.
+
+    On a terminal the line is redrawn in place; otherwise (pipelines, JSON
+    logs) it is logged through scanner.progress at most every interval
+    seconds, so progress costs a handful of lines instead of one per item.
+    """
+
+    def __init__(self, total: int, label: str = 'repositories', enabled: bool = True,
+                 stream: Optional[TextIO] = None, interval: Optional[float] = None, log_format: str = 'text'):
+        self.total = total
+        self.label = label
+        self.enabled = enabled
+        self.stream = stream or sys.stdout
+        self.interactive = log_format == 'text' and self.stream.isatty()
+        if interval is None:
+            interval = PROGRESS_INTERVAL_INTERACTIVE if self.interactive else PROGRESS_INTERVAL
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self._start = time.monotonic()
+        self._last = self._start
+        self._width = 0
+        self._log = get_logger('progress')
+
+    def update(self, count: int = 1, failed: bool = False):
+        """Record completed items and redraw the line if the interval has passed"""
+        if failed:
+            self.failed += count
+        self.done += count
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last >= self.interval or self.done >= self.total:
+            self._last = now
+            self._emit(now)
+
+    def _emit(self, now: float):
+        global _active_progress
+        elapsed = max(now - self._start, 1e-6)
+        rate = self.done / elapsed
+        remaining = self.total - self.done
+        eta = time.strftime('%H:%M:%S', time.gmtime(remaining / rate)) if rate > 0 and remaining > 0 else '--:--:--'
+        percent = 100.0 * self.done / self.total if self.total else 100.0
+        line = (f"⏳ {self.done}/{self.total} {self.label} ({percent:.1f}%), {rate:.1f}/s, "
+                f"ETA {eta}, {self.failed} errors")
+        if self.interactive:
+            self.stream.write('\r' + line.ljust(self._width))
+            self.stream.flush()
+            self._width = len(line)
+            _active_progress = self
+        else:
+            self._log.info(line, extra={'progress': {'done': self.done, 'total': self.total, 'failed': self.failed,
+                                                     'rate': round(rate, 2), 'elapsed': round(elapsed, 1)}})
+
+    def clear(self):
+        """Erase the live line so a log record can be written in its place"""
+        global _active_progress
+        if self.interactive and self._width:
+            self.stream.write('\r' + ' ' * self._width + '\r')
+            self._width = 0
+        if _active_progress is self:
+            _active_progress = None
+
+    def finish(self):
+        """Draw the final state and end the live line"""
+        global _active_progress
+        if not self.enabled:
+            return
+        if self.done < self.total:
+            self._emit(time.monotonic())
+        if self.interactive and _active_progress is self:
+            self.stream.write('\n')
+            self.stream.flush()
+            self._width = 0
+            _active_progress = None
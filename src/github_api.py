@@ -1,10 +1,27 @@
 import os
+import threading
 import requests
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from http_session import create_session, get_shared_session
+from rate_limit import RateLimiter
+from pagination import paginate, DEFAULT_PAGE_WORKERS
+from http_cache import ResponseCache
+from metrics import ScanMetrics
+from checkpoint import ListingPages
+from console import get_logger
+from projection import PROJECTIONS, projector
+
+log = get_logger('github')
+
+# Teams whose members and child teams are fetched concurrently (GITHUB_TEAM_WORKERS)
+DEFAULT_TEAM_WORKERS = 8
 
 class GitHubAPI:
-    def __init__(self):
-        self.api_url = "https://api.github.com"
+    def __init__(self, pool_size: Optional[int] = None, cache: Optional[ResponseCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None, metrics: Optional[ScanMetrics] = None,
+                 fields: str = 'minimal'):
+        self.api_url = os.getenv('GITHUB_API_URL', "https://api.github.com").rstrip('/')
         self.token = os.getenv('GITHUB_TOKEN')
         if not self.token:
             raise ValueError("GITHUB_TOKEN environment variable is required")
@@ -14,109 +31,153 @@ class GitHubAPI:
             "Authorization": f"token {self.token}",
             "User-Agent": "GitHub-Org-Checker/1.0"
         }
+        self.page_workers = int(os.getenv('GITHUB_PAGE_WORKERS', DEFAULT_PAGE_WORKERS))
+        self.team_workers = int(os.getenv('GITHUB_TEAM_WORKERS', DEFAULT_TEAM_WORKERS))
+        # Follow-up pages of every listing share one bounded pool, so at most page_workers page
+        # requests run on top of the callers' own (--workers fan-out or team expansion);
+        # the connection pool is sized for both so no connection is discarded
+        self._page_executor = ThreadPoolExecutor(max_workers=max(1, self.page_workers),
+                                                 thread_name_prefix='github-pages')
+        if pool_size is not None:
+            pool_size = max(pool_size, self.team_workers) + self.page_workers
+        self.session = create_session(pool_size=pool_size, rate_limiter=rate_limiter, metrics=metrics)
+        self.session.headers.update(self.headers)
+        self.cache = cache
+        # Payloads are trimmed to the used fields as they are decoded unless fields == 'full'
+        self.fields = fields
+        self._projectors = {entity: projector(entity, fields) for entity in PROJECTIONS}
+        # (org, team slug) -> members and child teams, fetched once per run
+        self._team_memberships: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._team_lock = threading.Lock()
+
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """GET a GitHub URL, revalidating against the response cache when enabled"""
+        if not self.cache:
+            return self.session.get(url, params=params)
+
+        key = self.cache.make_key(url, params, self.token)
+        entry = self.cache.get(key)
+        response = self.session.get(url, params=params, headers=self.cache.conditional_headers(entry))
+        if response.status_code == 304 and entry:
+            self.cache.record(hit=True)
+            return self.cache.build_response(entry, response)
+
+        self.cache.record(hit=False)
+        if response.status_code == 200:
+            self.cache.store(key, response)
+        return response
+
+    def project(self, entity: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply an entity's field projection to a single payload"""
+        project = self._projectors[entity]
+        return project(item) if project else item
+
+    @staticmethod
+    def _page_log(pages: Optional[ListingPages]) -> Dict[str, Any]:
+        """paginate arguments that restore and record a checkpointed listing"""
+        return {'completed_pages': pages.completed, 'on_page': pages.record} if pages else {}
+
+    def get_authenticated_user(self) -> Dict[str, Any]:
+        """Get the user the token authenticates as"""
+        response = self.session.get(f"{self.api_url}/user")
+        response.raise_for_status()
+        return response.json()
+
+    def get_organization_repos(self, org_name: str, repo_type: str = 'all',
+                               pages: Optional[ListingPages] = None) -> List[Dict[str, Any]]:
+        """Get all repositories from a GitHub organization; repo_type 'sources' leaves out forks.
 
-    def get_organization_repos(self, org_name: str) -> List[Dict[str, Any]]:
-        """Get all repositories from a GitHub organization"""
+        With pages, completed pages are checkpointed and restored ones are not fetched again.
+        """
         url = f"{self.api_url}/orgs/{org_name}/repos"
         params = {
-            'type': 'all',
+            'type': repo_type,
             'sort': 'name',
             'per_page': 100
         }
-        
-        all_repos = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            repos = response.json()
-            if not repos:
-                break
-                
-            all_repos.extend(repos)
-            page += 1
-            
-            # GitHub API pagination limit
-            if page > 10:  # Safety limit
-                break
-                
-        return all_repos
+        return paginate(self._get, url, params, executor=self._page_executor,
+                        project=self._projectors['repository'], **self._page_log(pages))
+
+    def get_repository(self, org_name: str, repo_name: str) -> Dict[str, Any]:
+        """Get a single repository"""
+        url = f"{self.api_url}/repos/{org_name}/{repo_name}"
+        response = self._get(url)
+        response.raise_for_status()
+        return self.project('repository', response.json())
 
     def get_repo_teams(self, org_name: str, repo_name: str) -> List[Dict[str, Any]]:
         """Get teams with access to a repository"""
         url = f"{self.api_url}/repos/{org_name}/{repo_name}/teams"
-        try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Warning: Could not fetch teams for {repo_name}: {e}")
-            return []
+        return paginate(self._get, url, executor=self._page_executor,
+                        project=self._projectors['team'])
 
     def get_repo_collaborators(self, org_name: str, repo_name: str) -> List[Dict[str, Any]]:
         """Get collaborators for a repository"""
         url = f"{self.api_url}/repos/{org_name}/{repo_name}/collaborators"
-        try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Warning: Could not fetch collaborators for {repo_name}: {e}")
-            return []
+        return paginate(self._get, url, executor=self._page_executor,
+                        project=self._projectors['collaborator'])
 
     def get_organization_details(self, org_name: str) -> Dict[str, Any]:
         """Get organization details"""
         url = f"{self.api_url}/orgs/{org_name}"
-        response = requests.get(url, headers=self.headers)
+        response = self._get(url)
         response.raise_for_status()
-        return response.json()
+        return self.project('organization', response.json())
 
-    def get_organization_members(self, org_name: str) -> List[Dict[str, Any]]:
+    def get_organization_members(self, org_name: str, pages: Optional[ListingPages] = None) -> List[Dict[str, Any]]:
         """Get all members of an organization"""
         url = f"{self.api_url}/orgs/{org_name}/members"
-        params = {'per_page': 100}
-        
-        all_members = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            members = response.json()
-            if not members:
-                break
-                
-            all_members.extend(members)
-            page += 1
-            
-        return all_members
-
-    def get_organization_teams(self, org_name: str) -> List[Dict[str, Any]]:
+        return paginate(self._get, url, executor=self._page_executor,
+                        project=self._projectors['user'], **self._page_log(pages))
+
+    def get_organization_teams(self, org_name: str, pages: Optional[ListingPages] = None) -> List[Dict[str, Any]]:
         """Get all teams in an organization"""
         url = f"{self.api_url}/orgs/{org_name}/teams"
-        params = {'per_page': 100}
-        
-        all_teams = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            teams = response.json()
-            if not teams:
-                break
-                
-            all_teams.extend(teams)
-            page += 1
-            
-        return all_teams
+        return paginate(self._get, url, executor=self._page_executor,
+                        project=self._projectors['team'], **self._page_log(pages))
+
+    def get_team_members(self, org_name: str, team_slug: str) -> List[Dict[str, Any]]:
+        """Get members of a team, including the members of its child teams"""
+        url = f"{self.api_url}/orgs/{org_name}/teams/{team_slug}/members"
+        return paginate(self._get, url, executor=self._page_executor,
+                        project=self._projectors['user'])
+
+    def get_child_teams(self, org_name: str, team_slug: str) -> List[Dict[str, Any]]:
+        """Get the direct child teams of a team"""
+        url = f"{self.api_url}/orgs/{org_name}/teams/{team_slug}/teams"
+        return paginate(self._get, url, executor=self._page_executor,
+                        project=self._projectors['team'])
+
+    def expand_teams(self, org_name: str, teams: List[Dict[str, Any]],
+                     max_workers: Optional[int] = None, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Members and child teams of every team, keyed by slug.
+
+        Each unique team is fetched once per run, max_workers (default GITHUB_TEAM_WORKERS) at a
+        time, and memoized, so repositories sharing a team never cost extra member requests.
+        refresh fetches every team again (conditionally, when caching is enabled).
+        """
+        slugs = list(dict.fromkeys(team['slug'] for team in teams))
+        with self._team_lock:
+            pending = [slug for slug in slugs if refresh or (org_name, slug) not in self._team_memberships]
+        if pending:
+            max_workers = self.team_workers if max_workers is None else max_workers
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+                for slug, membership in zip(pending, executor.map(lambda slug: self._expand_team(org_name, slug), pending)):
+                    with self._team_lock:
+                        self._team_memberships[(org_name, slug)] = membership
+        return {slug: self._team_memberships[(org_name, slug)] for slug in slugs}
+
+    def _expand_team(self, org_name: str, team_slug: str) -> Dict[str, Any]:
+        try:
+            members = self.get_team_members(org_name, team_slug)
+            child_teams = self.get_child_teams(org_name, team_slug)
+        except requests.exceptions.RequestException as e:
+            log.warning(f"Warning: Could not fetch members of team {team_slug}: {e}")
+            return {'members': [], 'child_teams': [], 'error': str(e)}
+        return {
+            'members': [{'id': member.get('id'), 'login': member['login']} for member in members],
+            'child_teams': [child['slug'] for child in child_teams],
+        }
 
 # Legacy functions for backward compatibility
 GITHUB_API_URL = "https://api.github.com"
@@ -126,13 +187,12 @@ HEADERS = {
 
 def list_repositories(org_name):
     url = f"{GITHUB_API_URL}/orgs/{org_name}/repos"
-    response = requests.get(url, headers=HEADERS)
-    response.raise_for_status()
-    return response.json()
+    session = get_shared_session()
+    return paginate(lambda page_url, params: session.get(page_url, headers=HEADERS, params=params), url)
 
 def get_repository_details(repo_full_name):
     url = f"{GITHUB_API_URL}/repos/{repo_full_name}"
-    response = requests.get(url, headers=HEADERS)
+    response = get_shared_session().get(url, headers=HEADERS)
     response.raise_for_status()
     return response.json()
 
@@ -0,0 +1,287 @@
+import os
+from typing import List, Dict, Any, Optional
+from github_api import GitHubAPI
+from checkpoint import ListingPages
+from console import get_logger
+
+REPOS_PAGE_SIZE = 50
+NESTED_PAGE_SIZE = 100
+
+log = get_logger('github')
+
+REPOSITORIES_QUERY = """
+query($org: String!, $after: String, $pageSize: Int!, $nestedSize: Int!, $isFork: Boolean) {
+  organization(login: $org) {
+    repositories(first: $pageSize, after: $after, isFork: $isFork, orderBy: {field: NAME, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        nameWithOwner
+        description
+        diskUsage
+        primaryLanguage { name }
+        defaultBranchRef { name }
+        isPrivate
+        isFork
+        isArchived
+        isDisabled
+        url
+        createdAt
+        updatedAt
+        pushedAt
+        stargazerCount
+        forkCount
+        issues(states: OPEN) { totalCount }
+        pullRequests(states: OPEN) { totalCount }
+        collaborators(first: $nestedSize, affiliation: ALL) {
+          pageInfo { hasNextPage }
+          edges {
+            permission
+            node { login databaseId id avatarUrl url isSiteAdmin }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+TEAMS_QUERY = """
+query($org: String!, $after: String, $nestedSize: Int!) {
+  organization(login: $org) {
+    teams(first: 50, after: $after) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId
+        id
+        name
+        slug
+        description
+        privacy
+        url
+        repositories(first: $nestedSize) {
+          pageInfo { hasNextPage endCursor }
+          edges { permission node { name } }
+        }
+      }
+    }
+  }
+}
+"""
+
+TEAM_REPOSITORIES_QUERY = """
+query($org: String!, $slug: String!, $after: String, $nestedSize: Int!) {
+  organization(login: $org) {
+    team(slug: $slug) {
+      repositories(first: $nestedSize, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        edges { permission node { name } }
+      }
+    }
+  }
+}
+"""
+
+# GraphQL RepositoryPermission -> REST (collaborator role_name, team permission)
+PERMISSION_NAMES = {
+    'ADMIN': ('admin', 'admin'),
+    'MAINTAIN': ('maintain', 'maintain'),
+    'WRITE': ('write', 'push'),
+    'TRIAGE': ('triage', 'triage'),
+    'READ': ('read', 'pull'),
+}
+PERMISSION_LEVELS = ['READ', 'TRIAGE', 'WRITE', 'MAINTAIN', 'ADMIN']
+
+
+def _permission_flags(permission: str) -> Dict[str, bool]:
+    """Build the REST-style cumulative permissions object"""
+    level = PERMISSION_LEVELS.index(permission) if permission in PERMISSION_LEVELS else -1
+    return {
+        'admin': level >= PERMISSION_LEVELS.index('ADMIN'),
+        'maintain': level >= PERMISSION_LEVELS.index('MAINTAIN'),
+        'push': level >= PERMISSION_LEVELS.index('WRITE'),
+        'triage': level >= PERMISSION_LEVELS.index('TRIAGE'),
+        'pull': level >= PERMISSION_LEVELS.index('READ'),
+    }
+
+
+class GitHubGraphQLAPI(GitHubAPI):
+    """GitHub client that batches repository, collaborator and team access data through GraphQL.
+
+    get_organization_repos() fetches repositories with their collaborators in a
+    few cursor-paginated queries and derives per-repository teams from the
+    organization's team listing. get_repo_teams() and get_repo_collaborators()
+    then answer from those results and fall back to REST for repositories that
+    GraphQL could not fully cover.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.graphql_url = os.getenv('GITHUB_GRAPHQL_URL', f"{self.api_url}/graphql")
+        self._repo_collaborators: Dict[str, List[Dict[str, Any]]] = {}
+        self._repo_teams: Dict[str, List[Dict[str, Any]]] = {}
+        self._teams_loaded_for: Optional[str] = None
+
+    def _graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a GraphQL query and return its data, tolerating partial errors"""
+        response = self.session.post(self.graphql_url, json={'query': query, 'variables': variables})
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get('errors'):
+            if not payload.get('data'):
+                raise RuntimeError(f"GraphQL query failed: {payload['errors'][0].get('message')}")
+            log.warning(f"Warning: GraphQL returned partial data: {payload['errors'][0].get('message')}")
+        return payload['data']
+
+    def get_organization_repos(self, org_name: str, repo_type: str = 'all',
+                               pages: Optional[ListingPages] = None) -> List[Dict[str, Any]]:
+        """Get all repositories with their collaborators via GraphQL; repo_type 'sources'/'forks' maps to isFork.
+
+        With pages, each page is checkpointed with the cursor that follows it,
+        and a resumed listing continues after the last restored page.
+        """
+        all_repos = []
+        after = None
+        finished = False
+        page = 0
+        if pages:
+            restored, after, finished = pages.resume_point()
+            for page_repos, page_collaborators in restored:
+                all_repos.extend(page_repos)
+                self._repo_collaborators.update(page_collaborators or {})
+            page = len(restored)
+        while not finished:
+            data = self._graphql(REPOSITORIES_QUERY, {
+                'org': org_name,
+                'after': after,
+                'pageSize': REPOS_PAGE_SIZE,
+                'nestedSize': NESTED_PAGE_SIZE,
+                'isFork': {'sources': False, 'forks': True}.get(repo_type),
+            })
+            connection = data['organization']['repositories']
+            page_repos = []
+            page_collaborators = {}
+            for node in connection['nodes']:
+                if not node:
+                    continue
+                page_repos.append(self._repo_from_node(node))
+                collaborators = node.get('collaborators')
+                if collaborators and not collaborators['pageInfo']['hasNextPage']:
+                    page_collaborators[node['name']] = [
+                        self.project('collaborator', self._collaborator_from_edge(edge))
+                        for edge in collaborators['edges']
+                    ]
+            all_repos.extend(page_repos)
+            self._repo_collaborators.update(page_collaborators)
+
+            finished = not connection['pageInfo']['hasNextPage']
+            after = None if finished else connection['pageInfo']['endCursor']
+            if pages:
+                pages.record_cursor_page(page, page_repos, after, extra=page_collaborators)
+            page += 1
+
+        self._load_team_access(org_name)
+        return all_repos
+
+    def _load_team_access(self, org_name: str):
+        """Invert organization teams' repository lists into per-repository team lists"""
+        repo_teams: Dict[str, List[Dict[str, Any]]] = {}
+        after = None
+        while True:
+            data = self._graphql(TEAMS_QUERY, {'org': org_name, 'after': after, 'nestedSize': NESTED_PAGE_SIZE})
+            connection = data['organization']['teams']
+            for node in connection['nodes']:
+                edges = list(node['repositories']['edges'])
+                page_info = node['repositories']['pageInfo']
+                while page_info['hasNextPage']:
+                    team_data = self._graphql(TEAM_REPOSITORIES_QUERY, {
+                        'org': org_name,
+                        'slug': node['slug'],
+                        'after': page_info['endCursor'],
+                        'nestedSize': NESTED_PAGE_SIZE,
+                    })
+                    repositories = team_data['organization']['team']['repositories']
+                    edges.extend(repositories['edges'])
+                    page_info = repositories['pageInfo']
+
+                for edge in edges:
+                    repo_teams.setdefault(edge['node']['name'], []).append(
+                        self.project('team', self._team_from_node(node, edge['permission'])))
+
+            if not connection['pageInfo']['hasNextPage']:
+                break
+            after = connection['pageInfo']['endCursor']
+
+        self._repo_teams = repo_teams
+        self._teams_loaded_for = org_name
+
+    def get_repo_teams(self, org_name: str, repo_name: str) -> List[Dict[str, Any]]:
+        """Get teams with access to a repository from the GraphQL team index"""
+        if self._teams_loaded_for == org_name:
+            return self._repo_teams.get(repo_name, [])
+        return super().get_repo_teams(org_name, repo_name)
+
+    def get_repo_collaborators(self, org_name: str, repo_name: str) -> List[Dict[str, Any]]:
+        """Get collaborators for a repository, falling back to REST when GraphQL was incomplete"""
+        if repo_name in self._repo_collaborators:
+            return self._repo_collaborators[repo_name]
+        return super().get_repo_collaborators(org_name, repo_name)
+
+    @staticmethod
+    def _repo_from_node(node: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a GraphQL repository node into the REST repository shape"""
+        return {
+            'name': node['name'],
+            'full_name': node['nameWithOwner'],
+            'description': node['description'],
+            'size': node['diskUsage'] or 0,
+            'language': (node['primaryLanguage'] or {}).get('name'),
+            'default_branch': (node['defaultBranchRef'] or {}).get('name'),
+            'private': node['isPrivate'],
+            'fork': node['isFork'],
+            'archived': node['isArchived'],
+            'disabled': node['isDisabled'],
+            'html_url': node['url'],
+            'clone_url': f"{node['url']}.git",
+            'created_at': node['createdAt'],
+            'updated_at': node['updatedAt'],
+            'pushed_at': node['pushedAt'],
+            'stargazers_count': node['stargazerCount'],
+            # REST reports watchers_count as the stargazer count
+            'watchers_count': node['stargazerCount'],
+            'forks_count': node['forkCount'],
+            # REST open_issues_count includes open pull requests
+            'open_issues_count': node['issues']['totalCount'] + node['pullRequests']['totalCount'],
+        }
+
+    @staticmethod
+    def _collaborator_from_edge(edge: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a GraphQL collaborator edge into the REST collaborator shape"""
+        node = edge['node']
+        role_name = PERMISSION_NAMES.get(edge['permission'], ('read', 'pull'))[0]
+        return {
+            'login': node['login'],
+            'id': node['databaseId'],
+            'node_id': node['id'],
+            'avatar_url': node['avatarUrl'],
+            'html_url': node['url'],
+            'type': 'User',
+            'site_admin': node['isSiteAdmin'],
+            'permissions': _permission_flags(edge['permission']),
+            'role_name': role_name,
+        }
+
+    @staticmethod
+    def _team_from_node(node: Dict[str, Any], permission: str) -> Dict[str, Any]:
+        """Convert a GraphQL team node into the REST repository team shape"""
+        return {
+            'id': node['databaseId'],
+            'node_id': node['id'],
+            'name': node['name'],
+            'slug': node['slug'],
+            'description': node['description'],
+            'privacy': (node['privacy'] or '').lower(),
+            'html_url': node['url'],
+            'permission': PERMISSION_NAMES.get(permission, ('read', 'pull'))[1],
+            'permissions': _permission_flags(permission),
+        }
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Any, Optional
+
+import requests
+
+DEFAULT_CACHE_DIR = '.http-cache'
+DEFAULT_CACHE_MAX_MB = 512
+
+# Response headers replayed from the cache on a 304 so that callers see the
+# same pagination and metadata as on a fresh 200.
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Link', 'Content-Type')
+
+
+class ResponseCache:
+    """Persistent on-disk cache of GET responses for conditional requests.
+
+    Entries are keyed by URL, query parameters and a hash of the auth
+    identity, and hold the body together with its ETag/Last-Modified
+    validators. The cache is bounded by size and evicts least recently used
+    entries first.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv('HTTP_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(os.getenv('HTTP_CACHE_MAX_MB', DEFAULT_CACHE_MAX_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # key -> (last access time, size in bytes)
+        self._index: Dict[str, tuple] = {}
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.json'):
+                stat = entry.stat()
+                self._index[entry.name[:-5]] = (stat.st_mtime, stat.st_size)
+        self._total_bytes = sum(size for _, size in self._index.values())
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]], identity: str) -> str:
+        """Build the cache key for a request"""
+        query = '&'.join(f"{k}={params[k]}" for k in sorted(params)) if params else ''
+        identity_hash = hashlib.sha256(identity.encode('utf-8')).hexdigest()
+        raw = f"{identity_hash}|{url}?{query}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            if key in self._index:
+                try:
+                    os.utime(path, None)
+                    self._index[key] = (os.path.getmtime(path), self._index[key][1])
+                except OSError:
+                    pass
+        return entry
+
+    def record(self, hit: bool):
+        """Count a cache hit or miss"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Validator headers to send for a cached entry"""
+        headers = {}
+        if entry:
+            if entry['headers'].get('ETag'):
+                headers['If-None-Match'] = entry['headers']['ETag']
+            if entry['headers'].get('Last-Modified'):
+                headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def store(self, key: str, response: requests.Response):
+        """Store a 200 response if it carries a validator"""
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        if 'ETag' not in headers and 'Last-Modified' not in headers:
+            return
+        data = json.dumps({
+            'url': response.url,
+            'headers': headers,
+            'body': response.text,
+        }, ensure_ascii=False).encode('utf-8')
+
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            _, old_size = self._index.get(key, (0, 0))
+            self._index[key] = (os.path.getmtime(path), len(data))
+            self._total_bytes += len(data) - old_size
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, (_, size) in sorted(self._index.items(), key=lambda item: item[1][0]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del self._index[key]
+            self._total_bytes -= size
+
+    def build_response(self, entry: Dict[str, Any], original: requests.Response) -> requests.Response:
+        """Turn a cached entry into a 200 response for a 304 revalidation"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = original.url
+        response.request = original.request
+        response.encoding = 'utf-8'
+        response.headers.update(original.headers)
+        response.headers.update(entry['headers'])
+        response._content = entry['body'].encode('utf-8')
+        response.from_cache = True
+        return response
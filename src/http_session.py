@@ -0,0 +1,119 @@
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from rate_limit import RateLimiter, RateLimitError
+from metrics import ScanMetrics
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+MAX_RATE_LIMIT_RETRIES = 5
+
+
+class JitteredRetry(Retry):
+    """urllib3 Retry policy with full jitter added to the exponential backoff"""
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return backoff
+        return random.uniform(0, backoff)
+
+
+class ScheduledSession(requests.Session):
+    """Session that routes every request through a shared RateLimiter and records it in ScanMetrics"""
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None, metrics: Optional[ScanMetrics] = None):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+
+    def request(self, method, url, *args, **kwargs):
+        if not self.metrics:
+            return self._scheduled_request(method, url, *args, **kwargs)[0]
+
+        start = time.perf_counter()
+        response, retries = None, 0
+        try:
+            response, retries = self._scheduled_request(method, url, *args, **kwargs)
+            return response
+        finally:
+            self.metrics.record_request(method, url, response, time.perf_counter() - start, retries)
+
+    def _scheduled_request(self, method, url, *args, **kwargs):
+        """Send a request, waiting out rate limits; returns the response and the rate-limit retry count"""
+        if not self.rate_limiter:
+            return super().request(method, url, *args, **kwargs), 0
+
+        for attempt in range(MAX_RATE_LIMIT_RETRIES):
+            self.rate_limiter.acquire(url)
+            response = super().request(method, url, *args, **kwargs)
+            retry_after = self.rate_limiter.update(url, response)
+            if not retry_after:
+                return response, attempt
+            if retry_after > self.rate_limiter.max_wait:
+                break
+        raise RateLimitError(f"Rate limit not cleared for {method} {url} (HTTP {response.status_code})")
+
+
+def create_session(pool_size: Optional[int] = None,
+                   max_retries: Optional[int] = None,
+                   backoff_factor: Optional[float] = None,
+                   rate_limiter: Optional[RateLimiter] = None,
+                   metrics: Optional[ScanMetrics] = None) -> requests.Session:
+    """Create a keep-alive, connection-pooled session with transport-level retries.
+
+    Settings fall back to the HTTP_POOL_SIZE, HTTP_MAX_RETRIES and
+    HTTP_BACKOFF_FACTOR environment variables. Idempotent requests are retried
+    on 5xx responses and connection resets; the final response is returned
+    so callers can still use raise_for_status(). When a rate_limiter is given,
+    requests are scheduled against its per-host budgets and rate-limited
+    responses are retried once the limit clears. When metrics is given, every
+    request is recorded per endpoint.
+    """
+    if pool_size is None:
+        pool_size = int(os.getenv('HTTP_POOL_SIZE', DEFAULT_POOL_SIZE))
+    if max_retries is None:
+        max_retries = int(os.getenv('HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+    if backoff_factor is None:
+        backoff_factor = float(os.getenv('HTTP_BACKOFF_FACTOR', DEFAULT_BACKOFF_FACTOR))
+
+    retry = JitteredRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = ScheduledSession(rate_limiter, metrics)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session() -> requests.Session:
+    """Return the process-wide session used by the legacy helper functions"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
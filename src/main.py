@@ -1,135 +1,564 @@
 import os
+import sys
 import argparse
+import re
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from github_api import GitHubAPI
-from azure_devops_api import AzureDevOpsAPI
-from utils import format_repository_info, save_to_json, create_summary_report
-from types.index import RepositoryDetails
+from http_cache import ResponseCache
+from rate_limit import RateLimiter
+from metrics import ScanMetrics
+from utils import format_repository_info, process_repository, save_to_json, SummaryAggregator
+from report_writer import NDJSONReportWriter, latest_detailed_report, load_detailed_report
+from model import OrganizationModel, effective_access
+from azure_sync import plan_has_changes
+from checkpoint import ScanCheckpoint
+from shard import parse_shard, shard_for, shard_report_name, merge_main
+from console import configure_logging, get_logger, ProgressReporter
+from report_diff import diff_main
+from permission_index import PermissionIndex, query_main
+from projection import FIELD_MODES
+from repo_filter import RepositoryFilter, add_filter_arguments
+from webhook_server import serve_main
 
-def main():
-    # Parse command line arguments
+log = get_logger()
+repo_log = get_logger('repository')
+
+def reuse_previous_scan(previous: dict, repo: dict, max_age: timedelta) -> dict:
+    """Return the previous scan of a repository if it is still current, otherwise None.
+
+    A repository is current when its pushed_at/updated_at timestamps match the
+    listing and its teams and collaborators were fetched within max_age.
+    Team and collaborator changes do not bump updated_at, so max_age bounds
+    how stale reused permission data can get.
+    """
+    if not previous:
+        return None
+    if previous.get('pushed_at') != repo.get('pushed_at', '') or previous.get('updated_at') != repo.get('updated_at', ''):
+        return None
+    try:
+        scanned_at = datetime.fromisoformat(previous['scanned_at'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if datetime.now() - scanned_at > max_age:
+        return None
+
+    # Refresh listing fields; only the per-repo API results are reused
+    repo_info = format_repository_info(repo)
+    for key in ('teams', 'collaborators', 'team_count', 'collaborator_count', 'scanned_at'):
+        repo_info[key] = previous[key]
+    return repo_info
+
+def load_previous_repositories(org_name: str, output_dir: str) -> dict:
+    """Load repositories from the previous detailed report (the newer of JSON and NDJSON), keyed by name"""
+    path = latest_detailed_report(output_dir, org_name)
+    if path is None:
+        return None
+    previous_report = load_detailed_report(path)
+    if previous_report.get('layout') == 'normalized':
+        model = OrganizationModel.from_report(previous_report)
+        return {r['name']: model.expand_repository(r) for r in previous_report.get('repositories', [])}
+    return {r['name']: r for r in previous_report.get('repositories', [])}
+
+# Subcommands; anything else on the command line is a scan
+COMMANDS = {
+    'merge': merge_main,
+    'diff': diff_main,
+    'query': query_main,
+    'serve': serve_main,
+}
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options of a scan"""
     parser = argparse.ArgumentParser(description='GitHub Organization Repository Scanner')
     parser.add_argument('--org', required=True, help='GitHub organization name')
     parser.add_argument('--azure-project', help='Azure DevOps project name (optional)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Compute the Azure DevOps sync plan without applying it ({org}_sync_plan.json)')
+    parser.add_argument('--user-map', help='JSON file mapping GitHub logins to Azure DevOps principal names')
+    parser.add_argument('--force-removals', action='store_true',
+                        help='Allow a sync that removes every member of a repository team (withheld by default)')
     parser.add_argument('--output-dir', default='output', help='Output directory for reports')
-    args = parser.parse_args()
+    parser.add_argument('--output-format', choices=['json', 'ndjson'], default='json',
+                        help='Detailed report format; ndjson streams one record per repository as it completes')
+    parser.add_argument('--layout', choices=['full', 'normalized'], default='full',
+                        help='Detailed report layout; normalized stores users and teams once and references them by id')
+    parser.add_argument('--analytics', action='store_true',
+                        help='Write columnar analytics ({org}_analytics.json) and a Parquet repository table (requires pandas and pyarrow)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of repositories to fetch concurrently (default: 1)')
+    parser.add_argument('--backend', choices=['rest', 'graphql'], default='rest',
+                        help='GitHub API backend; graphql batches repository, collaborator and team access queries')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse teams and collaborators from the previous detailed report for unchanged repositories')
+    parser.add_argument('--max-age-hours', type=float, default=24 * 7,
+                        help='Re-fetch repositories in incremental mode when their previous scan is older than this (default: 168)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted scan from the checkpoint in --output-dir')
+    parser.add_argument('--shard', help='Only scan shard INDEX/COUNT (e.g. 2/8) of the repositories; '
+                                          'combine the partial reports with the merge subcommand')
+    parser.add_argument('--fields', choices=FIELD_MODES, default='minimal',
+                        help='GitHub payload fields to keep; minimal drops *_url templates and other unused fields '
+                             'as pages are decoded, full keeps complete payloads')
+    parser.add_argument('--expand-teams', action='store_true',
+                        help="Fetch members and child teams of every team once and report each repository's effective users")
+    parser.add_argument('--cache-dir', help='Directory for the GitHub conditional-request cache '
+                                               '(default: HTTP_CACHE_DIR or .http-cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the GitHub response cache')
+    parser.add_argument('--quiet', action='store_true', help='Only show warnings and errors')
+    parser.add_argument('--progress', action='store_true',
+                        help='Show a throttled progress line (rate, ETA, errors) instead of one line per repository')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                        help='Console log format; json writes one structured record per line')
+    add_filter_arguments(parser)
+    return parser
 
-    # Load environment variables
-    load_dotenv()
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """Parse and validate scan options; --shard becomes an (index, count) tuple"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    try:
+        RepositoryFilter.from_args(args)
+    except (re.error, ValueError) as e:
+        parser.error(f"invalid repository filter: {e}")
+    if args.shard:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+class ScanClients:
+    """API clients and the HTTP cache, rate limiter and metrics they share for one scan.
+
+    Created from the scan options; a caller that has already authenticated
+    (e.g. run-local.py's preflight) passes them to run_scan() so the scan
+    reuses the same sessions and connections.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.metrics = ScanMetrics()
+        self.cache = None if args.no_cache else ResponseCache(cache_dir=args.cache_dir)
+        self.rate_limiter = RateLimiter()
+        github_api_class = GitHubAPI
+        if args.backend == 'graphql':
+            from github_graphql import GitHubGraphQLAPI
+            github_api_class = GitHubGraphQLAPI
+        self.github_api = github_api_class(pool_size=args.workers, cache=self.cache, rate_limiter=self.rate_limiter,
+                                           metrics=self.metrics, fields=args.fields)
+        self.azure_devops_api = None
+        if args.azure_project:
+            # The Azure DevOps client and sync engine are only loaded when syncing
+            from azure_devops_api import AzureDevOpsAPI
+            from azure_sync import load_user_map
+            self.azure_devops_api = AzureDevOpsAPI(pool_size=args.workers, rate_limiter=self.rate_limiter,
+                                                   metrics=self.metrics, user_map=load_user_map(args.user_map),
+                                                   force_removals=args.force_removals)
 
-    print(f"🚀 Starting GitHub Organization Analysis")
-    print(f"Organization: {args.org}")
-    print(f"Azure DevOps Project: {args.azure_project or 'None'}")
-    print("-" * 50)
+def run_scan(args: argparse.Namespace, clients: ScanClients = None) -> int:
+    """Scan the organization and write the reports; returns the process exit code"""
+    shard = args.shard
+    # Base name of every report file; shards write partial reports under their own name
+    report_name = shard_report_name(args.org, *shard) if shard else args.org
+    configure_logging(quiet=args.quiet, progress=args.progress, log_format=args.log_format)
 
+    log.info(f"🚀 Starting GitHub Organization Analysis")
+    log.info(f"Organization: {args.org}")
+    log.info(f"Azure DevOps Project: {args.azure_project or 'None'}")
+    log.info(f"Workers: {args.workers}")
+    log.info(f"GitHub backend: {args.backend}")
+    if shard:
+        log.info(f"Shard: {shard[0]}/{shard[1]}")
+    log.info("-" * 50)
+
+    checkpoint = None
+    repo_filter = RepositoryFilter.from_args(args)
     try:
-        # Initialize API clients
-        print("🔧 Initializing API clients...")
-        github_api = GitHubAPI()
-        azure_devops_api = AzureDevOpsAPI() if args.azure_project else None
-
-        # Get organization details
-        print(f"📋 Fetching organization details for '{args.org}'...")
-        org_details = github_api.get_organization_details(args.org)
-        print(f"Organization: {org_details.get('name', args.org)}")
-        print(f"Description: {org_details.get('description', 'No description')}")
-        print(f"Public repos: {org_details.get('public_repos', 0)}")
-        print(f"Total repos: {org_details.get('total_private_repos', 0) + org_details.get('public_repos', 0)}")
-
-        # Fetch repositories from GitHub organization
-        print(f"\n📂 Fetching repositories from {args.org}...")
-        repositories = github_api.get_organization_repos(args.org)
-        print(f"Found {len(repositories)} repositories")
-
-        # Get organization members and teams
-        print(f"\n👥 Fetching organization members...")
-        members = github_api.get_organization_members(args.org)
-        print(f"Found {len(members)} members")
-
-        print(f"\n👤 Fetching organization teams...")
-        teams = github_api.get_organization_teams(args.org)
-        print(f"Found {len(teams)} teams")
-
-        # Process each repository
+        # Initialize API clients unless the caller already has them
+        if clients is None:
+            log.info("🔧 Initializing API clients...")
+            clients = ScanClients(args)
+        metrics = clients.metrics
+        cache = clients.cache
+        rate_limiter = clients.rate_limiter
+        github_api = clients.github_api
+        azure_devops_api = clients.azure_devops_api
+
+        # Resume from a checkpoint, or list the organization and checkpoint the listing
+        checkpoint = ScanCheckpoint(args.output_dir, report_name)
+        listing = checkpoint.load_listing() if args.resume else None
+        if listing and listing.get('github_org') == args.org:
+            org_details = listing['organization']
+            repositories = listing['repositories']
+            members = listing['members']
+            teams = listing['teams']
+            log.info(f"♻️  Resuming from checkpoint: {len(repositories)} repositories, {len(members)} members, {len(teams)} teams")
+        else:
+            listing = None
+            # Completed listing pages are checkpointed, so an interrupted listing resumes from them
+            checkpoint.open_pages(resume=args.resume)
+            repo_pages = checkpoint.listing_pages(f"{args.backend}:repositories:{repo_filter.listing_type}")
+            member_pages = checkpoint.listing_pages('members')
+            team_pages = checkpoint.listing_pages('teams')
+            restored_pages = len(repo_pages.completed) + len(member_pages.completed) + len(team_pages.completed)
+            if restored_pages:
+                log.info(f"♻️  Resuming the listing from {restored_pages} checkpointed pages")
+            elif args.resume:
+                log.info(f"♻️  No checkpoint found, starting a new scan")
+            # Get organization details
+            with metrics.phase('org_details'):
+                log.info(f"📋 Fetching organization details for '{args.org}'...")
+                org_details = github_api.get_organization_details(args.org)
+                log.info(f"Organization: {org_details.get('name', args.org)}")
+                log.info(f"Description: {org_details.get('description', 'No description')}")
+                log.info(f"Public repos: {org_details.get('public_repos', 0)}")
+                log.info(f"Total repos: {org_details.get('total_private_repos', 0) + org_details.get('public_repos', 0)}")
+
+            with metrics.phase('repo_listing'):
+                # Fetch repositories from GitHub organization
+                log.info(f"\n📂 Fetching repositories from {args.org}...")
+                repositories = github_api.get_organization_repos(args.org, repo_type=repo_filter.listing_type,
+                                                                 pages=repo_pages)
+                log.info(f"Found {len(repositories)} repositories"
+                         f"{' (forks left out by GitHub)' if repo_filter.listing_type == 'sources' else ''}")
+
+                # Get organization members and teams
+                log.info(f"\n👥 Fetching organization members...")
+                members = github_api.get_organization_members(args.org, pages=member_pages)
+                log.info(f"Found {len(members)} members")
+
+                log.info(f"\n👤 Fetching organization teams...")
+                teams = github_api.get_organization_teams(args.org, pages=team_pages)
+                log.info(f"Found {len(teams)} teams")
+
+            if restored_pages:
+                # Page boundaries shift when the organization changed in between; keep one entry per name
+                repositories = list({repo['name']: repo for repo in repositories}.values())
+                members = list({member['login']: member for member in members}.values())
+                teams = list({team['slug']: team for team in teams}.values())
+
+            checkpoint.save_listing({
+                'github_org': args.org,
+                'organization': org_details,
+                'repositories': repositories,
+                'members': members,
+                'teams': teams
+            })
+
+        # Members and child teams are fetched once per team, not once per repository the team can access
+        team_memberships = None
+        if args.expand_teams:
+            with metrics.phase('team_expansion'):
+                log.info(f"\n👥 Expanding {len(teams)} teams...")
+                team_memberships = github_api.expand_teams(args.org, teams)
+                log.info(f"Found {len({member['login'] for team in team_memberships.values() for member in team['members']})} "
+                         f"users across {len(team_memberships)} teams")
+
+        # Filters run on the listing, before any per-repository request
+        if repo_filter.active:
+            repositories = repo_filter.apply(repositories)
+            excluded = ', '.join(f"{count} {reason}" for reason, count in repo_filter.excluded.items()) or 'none'
+            log.info(f"🔎 Filters kept {len(repositories)} of {repo_filter.listed} repositories (excluded: {excluded})")
+
+        # Sharded runs keep only the repositories assigned to this shard
+        listing_order = [repo['name'] for repo in repositories]
+        if shard:
+            repositories = [repo for repo in repositories if shard_for(repo['name'], shard[1]) == shard[0]]
+            log.info(f"Shard {shard[0]}/{shard[1]}: {len(repositories)} of {len(listing_order)} repositories")
+
+        completed_repos = checkpoint.load_repositories() if listing else {}
+        if completed_repos:
+            log.info(f"♻️  {len(completed_repos)} repositories already completed")
+        checkpoint.open(resume=bool(listing))
+
+        # Load the previous scan for incremental mode
+        previous_repos = {}
+        if args.incremental:
+            previous_repos = load_previous_repositories(report_name, args.output_dir)
+            if previous_repos is not None:
+                log.info(f"\n♻️  Incremental mode: loaded {len(previous_repos)} repositories from previous report")
+            else:
+                previous_repos = {}
+                log.info(f"\n♻️  Incremental mode: no previous report found, running full scan")
+        max_age = timedelta(hours=args.max_age_hours)
+
+        # In ndjson mode records are streamed to disk as they complete instead of kept in memory
+        os.makedirs(args.output_dir, exist_ok=True)
+        writer = None
+        if args.output_format == 'ndjson':
+            writer = NDJSONReportWriter(os.path.join(args.output_dir, f"{report_name}_detailed_analysis.ndjson"))
+            writer.write_header(org_details, {
+                'github_org': args.org,
+                'azure_project': args.azure_project,
+                'layout': args.layout,
+                'started_at': datetime.now().isoformat()
+            })
+
+        # The normalized layout interns users and teams; new ones are streamed as they are first seen
+        model = None
+        if args.layout == 'normalized':
+            model = OrganizationModel(listener=writer.write_record if writer else None, keep_repositories=not writer)
+            member_ids = [model.intern_user(member) for member in members]
+            team_ids = [model.intern_team(team) for team in teams]
+            if writer:
+                for member_id in member_ids:
+                    writer.write_record('member', {'id': member_id})
+        elif writer:
+            for member in members:
+                writer.write_record('member', member)
+            for team in teams:
+                writer.write_record('team', team)
+        if writer and team_memberships is not None:
+            for slug, membership in team_memberships.items():
+                writer.write_record('team_membership', {'slug': slug, **membership})
+
+        # Analytics columns are collected alongside the scan; pandas is only imported when requested
+        repo_table = None
+        if args.analytics:
+            from analytics import RepositoryTable
+            repo_table = RepositoryTable()
+
+        # Process repositories concurrently; results are consumed in listing order
+        summary = SummaryAggregator()
+        permission_index = PermissionIndex(args.org)
+        sync_plans = []
         repo_details = []
-        for i, repo in enumerate(repositories, 1):
-            print(f"\n📄 Processing repository {i}/{len(repositories)}: {repo['name']}")
-            
-            # Get teams and collaborators for this repo
-            repo_teams = github_api.get_repo_teams(args.org, repo['name'])
-            collaborators = github_api.get_repo_collaborators(args.org, repo['name'])
-
-            # Format repository information
-            repo_info = format_repository_info(repo)
-            repo_info['teams'] = repo_teams
-            repo_info['collaborators'] = collaborators
-            repo_info['team_count'] = len(repo_teams)
-            repo_info['collaborator_count'] = len(collaborators)
-            
-            repo_details.append(repo_info)
-
-            # Print repository details
-            print(f"   Size: {repo_info['size']} KB")
-            print(f"   Language: {repo_info['language']}")
-            print(f"   Private: {repo_info['private']}")
-            print(f"   Teams with access: {len(repo_teams)}")
-            print(f"   Collaborators: {len(collaborators)}")
-
-            # Azure DevOps integration
-            if azure_devops_api and args.azure_project:
+        repo_errors = []
+
+        def previous_scan(repo: dict) -> dict:
+            """Checkpointed or still-current previous scan of a repository, or None to fetch it"""
+            repo_info = completed_repos.get(repo['name'])
+            if repo_info is None:
+                repo_info = reuse_previous_scan(previous_repos.get(repo['name']), repo, max_age)
+            return repo_info
+
+        reused_count = sum(1 for repo in repositories if previous_scan(repo) is not None)
+        if args.incremental:
+            log.info(f"Reusing {reused_count} unchanged repositories, fetching {len(repositories) - reused_count}")
+
+        with metrics.phase('repo_fanout'), ThreadPoolExecutor(max_workers=args.workers) as executor:
+            # At most 2 x workers repositories are in flight; each result is dropped once it has been
+            # written, summarized and indexed, so memory does not grow with the organization
+            pending = deque()
+            unscheduled = iter(repositories)
+
+            def schedule_next():
+                repo = next(unscheduled, None)
+                if repo is None:
+                    return
+                repo_info = previous_scan(repo)
+                if repo_info is not None:
+                    future = Future()
+                    future.set_result(repo_info)
+                else:
+                    future = executor.submit(process_repository, github_api, args.org, repo)
+                pending.append((repo, future))
+
+            for _ in range(2 * args.workers):
+                schedule_next()
+
+            # Two REST calls per fetched repository, unless the GraphQL backend already has the data
+            pending_requests = 0 if args.backend == 'graphql' else 2 * (len(repositories) - reused_count)
+            log.info(f"Rate limit: {rate_limiter.describe(github_api.api_url)}")
+            projected_wait = rate_limiter.projected_completion(github_api.api_url, pending_requests)
+            if projected_wait:
+                eta = datetime.now() + timedelta(seconds=projected_wait)
+                log.info(f"⏳ {pending_requests} requests exceed the current budget; projected completion after {eta:%H:%M:%S}")
+
+            progress = ProgressReporter(len(repositories), enabled=args.progress, log_format=args.log_format)
+            i = 0
+            while pending:
+                repo, future = pending.popleft()
+                schedule_next()
+                i += 1
                 try:
-                    azure_devops_api.sync_repository_permissions(
-                        project_name=args.azure_project,
-                        repo_name=repo['name'],
-                        teams=repo_teams,
-                        collaborators=collaborators
-                    )
+                    repo_info = future.result()
                 except Exception as e:
-                    print(f"   ⚠️  Azure DevOps sync warning: {e}")
-
-        # Create comprehensive report
-        print(f"\n📊 Generating analysis report...")
-        analysis_data = {
-            'organization': org_details,
-            'repositories': repo_details,
-            'members': members,
-            'teams': teams,
-            'analysis_metadata': {
+                    log.error(f"❌ [{i}/{len(repositories)}] {repo['name']}: failed to process repository: {e}",
+                              extra={'repository': repo['name']})
+                    repo_errors.append({'repository': repo['name'], 'error': str(e)})
+                    progress.update(failed=True)
+                    continue
+
+                if team_memberships is not None:
+                    repo_info['effective_access'] = effective_access(repo_info, team_memberships)
+                    repo_info['effective_user_count'] = len(repo_info['effective_access'])
+                else:
+                    # A reused previous scan may carry effective access from an earlier --expand-teams run
+                    repo_info.pop('effective_access', None)
+                    repo_info.pop('effective_user_count', None)
+                if repo['name'] not in completed_repos:
+                    checkpoint.append_repository(repo_info)
+                summary.add(repo_info)
+                permission_index.add_repository(repo_info, team_memberships)
+                if repo_table:
+                    repo_table.add(repo_info)
+                if model:
+                    record = model.add_repository(repo_info)
+                    if writer:
+                        writer.write_record('repository', record.to_dict())
+                elif writer:
+                    writer.write_record('repository', repo_info)
+                else:
+                    repo_details.append(repo_info)
+                repo_teams = repo_info['teams']
+                collaborators = repo_info['collaborators']
+
+                # One line per repository; hidden in --progress mode
+                effective_users = (f", {repo_info['effective_user_count']} effective users"
+                                   if 'effective_user_count' in repo_info else '')
+                repo_log.info(f"📄 [{i}/{len(repositories)}] {repo['name']}: {repo_info['size']} KB, "
+                              f"{repo_info['language']}, {'private' if repo_info['private'] else 'public'}, "
+                              f"{len(repo_teams)} teams, {len(collaborators)} collaborators"
+                              f"{effective_users}",
+                              extra={'repository': repo['name'], 'size': repo_info['size'],
+                                     'teams': len(repo_teams), 'collaborators': len(collaborators)})
+
+                # Azure DevOps integration
+                if azure_devops_api and args.azure_project:
+                    with metrics.phase('azure_sync'):
+                        try:
+                            plan = azure_devops_api.sync_repository_permissions(
+                                project_name=args.azure_project,
+                                repo_name=repo['name'],
+                                teams=repo_teams,
+                                collaborators=collaborators,
+                                dry_run=args.dry_run
+                            )
+                            if plan_has_changes(plan) or plan['unmapped_collaborators'] or plan.get('withheld_removals'):
+                                sync_plans.append(plan)
+                            if plan.get('withheld_removals'):
+                                log.warning(f"   ⚠️  Azure DevOps: not removing all {len(plan['withheld_removals'])} members of "
+                                            f"{plan['repo_team']}; pass --force-removals to allow it",
+                                            extra={'repository': repo['name']})
+                            if plan.get('result', {}).get('failed'):
+                                log.warning(f"   ⚠️  Azure DevOps: {plan['result']['failed']} membership changes of "
+                                            f"{plan['repo_team']} failed", extra={'repository': repo['name']})
+                            action = 'planned' if args.dry_run else 'applied'
+                            repo_log.info(f"   Azure DevOps: {len(plan['create_teams'])} teams to create, "
+                                          f"+{len(plan['add_members'])}/-{len(plan['remove_members'])} members {action}")
+                        except Exception as e:
+                            log.warning(f"   ⚠️  Azure DevOps sync warning for {repo['name']}: {e}")
+                progress.update()
+            progress.finish()
+
+        with metrics.phase('report_write'):
+            # Create comprehensive report
+            log.info(f"\n📊 Generating analysis report...")
+            analysis_metadata = {
                 'total_repositories': len(repositories),
                 'total_members': len(members),
                 'total_teams': len(teams),
+                'failed_repositories': len(repo_errors),
+                'reused_repositories': reused_count,
                 'github_org': args.org,
-                'azure_project': args.azure_project
+                'azure_project': args.azure_project,
+                'layout': args.layout
             }
-        }
+            if repo_filter.active:
+                analysis_metadata['filtering'] = repo_filter.describe()
+            if shard:
+                analysis_metadata['shard'] = {'index': shard[0], 'count': shard[1]}
+                analysis_metadata['listing_order'] = listing_order
 
-        # Save detailed report
-        os.makedirs(args.output_dir, exist_ok=True)
-        detailed_report_path = save_to_json(analysis_data, f"{args.org}_detailed_analysis.json", args.output_dir)
-        print(f"✅ Detailed report saved: {detailed_report_path}")
+            # Save detailed report
+            if writer:
+                writer.write_footer(analysis_metadata, repo_errors)
+                writer.close()
+                detailed_report_path = writer.filepath
+            elif model:
+                analysis_data = {
+                    'layout': 'normalized',
+                    'organization': org_details,
+                    **model.to_report(),
+                    'members': member_ids,
+                    'organization_teams': team_ids,
+                    **({'team_memberships': team_memberships} if team_memberships is not None else {}),
+                    'analysis_metadata': analysis_metadata,
+                    'errors': repo_errors
+                }
+                detailed_report_path = save_to_json(analysis_data, f"{report_name}_detailed_analysis.json", args.output_dir)
+            else:
+                analysis_data = {
+                    'organization': org_details,
+                    'repositories': repo_details,
+                    'members': members,
+                    'teams': teams,
+                    **({'team_memberships': team_memberships} if team_memberships is not None else {}),
+                    'analysis_metadata': analysis_metadata,
+                    'errors': repo_errors
+                }
+                detailed_report_path = save_to_json(analysis_data, f"{report_name}_detailed_analysis.json", args.output_dir)
+            log.info(f"✅ Detailed report saved: {detailed_report_path}")
+
+            if azure_devops_api:
+                sync_plan_path = save_to_json({'dry_run': args.dry_run, 'plans': sync_plans},
+                                              f"{report_name}_sync_plan.json", args.output_dir)
+                log.info(f"✅ Azure DevOps sync plan saved: {sync_plan_path}")
+
+            index_path = permission_index.save(args.output_dir, report_name)
+            log.info(f"✅ Permission index saved: {index_path}")
+
+            # Create summary report from the running aggregates
+            summary_report = summary.to_report(org_details.get('name', 'Unknown'))
+            if repo_filter.active:
+                summary_report['filtering'] = repo_filter.describe()
+            summary_report_path = save_to_json(summary_report, f"{report_name}_summary.json", args.output_dir)
+            log.info(f"✅ Summary report saved: {summary_report_path}")
 
-        # Create summary report
-        summary_report = create_summary_report(analysis_data)
-        summary_report_path = save_to_json(summary_report, f"{args.org}_summary.json", args.output_dir)
-        print(f"✅ Summary report saved: {summary_report_path}")
+            if repo_table:
+                from analytics import compute_analytics, save_to_parquet
+                repo_frame = repo_table.to_dataframe()
+                parquet_path = save_to_parquet(repo_frame, f"{report_name}_repositories.parquet", args.output_dir)
+                log.info(f"✅ Repository table saved: {parquet_path}")
+                analytics_path = save_to_json(compute_analytics(repo_frame), f"{report_name}_analytics.json", args.output_dir)
+                log.info(f"✅ Analytics report saved: {analytics_path}")
 
         # Print summary to console
-        print(f"\n📈 Analysis Summary:")
-        print(f"   Organization: {summary_report['organization']}")
-        print(f"   Total Repositories: {summary_report['summary']['total_repositories']}")
-        print(f"   Total Size: {summary_report['summary']['total_size_formatted']}")
-        print(f"   Public Repos: {summary_report['summary']['public_repos']}")
-        print(f"   Private Repos: {summary_report['summary']['private_repos']}")
-        print(f"   Most Popular Language: {summary_report['summary']['most_popular_language']}")
+        log.info(f"\n📈 Analysis Summary:")
+        log.info(f"   Organization: {summary_report['organization']}")
+        log.info(f"   Total Repositories: {summary_report['summary']['total_repositories']}")
+        log.info(f"   Total Size: {summary_report['summary']['total_size_formatted']}")
+        log.info(f"   Public Repos: {summary_report['summary']['public_repos']}")
+        log.info(f"   Private Repos: {summary_report['summary']['private_repos']}")
+        log.info(f"   Most Popular Language: {summary_report['summary']['most_popular_language']}")
 
-        print(f"\n🎉 Analysis completed successfully!")
+        if cache:
+            log.info(f"   Cache: {cache.hits} not modified, {cache.misses} fetched")
+        phases = ', '.join(f"{name} {phase['seconds']:.1f}s" for name, phase in metrics.to_dict()['phases'].items())
+        log.info(f"   Time: {phases}")
+        metrics_paths = metrics.save(args.output_dir, report_name)
+        log.info(f"✅ Metrics saved: {', '.join(metrics_paths)}")
+        rate_limiter.save()
+        checkpoint.clear()
+
+        log.info(f"\n🎉 Analysis completed successfully!")
+        return 0
 
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        exit(1)
+        log.error(f"❌ Error: {str(e)}", exc_info=True)
+        if clients:
+            clients.rate_limiter.save()
+            clients.metrics.save(args.output_dir, report_name)
+        if checkpoint:
+            checkpoint.close()
+        if checkpoint and os.path.exists(checkpoint.state_path):
+            log.warning(f"💾 Progress checkpointed in {args.output_dir}; rerun with --resume to continue")
+        return 1
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+
+    args = parse_args()
+    # Load environment variables
+    load_dotenv()
+    exit(run_scan(args))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,220 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Path segments that identify an object are replaced so requests group by endpoint
+ENDPOINT_PATTERNS = [
+    (re.compile(r'/orgs/[^/]+/teams/[^/]+'), '/orgs/{org}/teams/{team}'),
+    (re.compile(r'/orgs/[^/]+'), '/orgs/{org}'),
+    (re.compile(r'/repos/[^/]+/[^/]+'), '/repos/{owner}/{repo}'),
+    (re.compile(r'/users/[^/]+'), '/users/{user}'),
+    (re.compile(r'/organizations/[^/]+/team/[^/]+'), '/organizations/{org_id}/team/{team_id}'),
+    (re.compile(r'^/[^/]+/[^/]+/_apis/'), '/{organization}/{project}/_apis/'),
+    (re.compile(r'^/[^/]+/_apis/'), '/{organization}/_apis/'),
+    (re.compile(r'/_apis/projects/[^/]+'), '/_apis/projects/{project}'),
+    (re.compile(r'/teams/[^/]+/repositories/[^/]+'), '/teams/{team}/repositories/{repository}'),
+    (re.compile(r'/_apis/graph/descriptors/[^/]+'), '/_apis/graph/descriptors/{storage_key}'),
+    (re.compile(r'/_apis/graph/memberships/[^/]+/[^/]+'), '/_apis/graph/memberships/{subject}/{container}'),
+    (re.compile(r'/_apis/graph/memberships/[^/]+'), '/_apis/graph/memberships/{subject}'),
+    (re.compile(r'/_apis/userentitlements/[^/]+/repositories/[^/]+'),
+     '/_apis/userentitlements/{user}/repositories/{repository}'),
+]
+
+
+def endpoint_template(method: str, url: str) -> str:
+    """Group a request under its method, host and path template, e.g. GET api.github.com/repos/{owner}/{repo}/teams"""
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/') or '/'
+    for pattern, replacement in ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path, count=1)
+    return f"{method.upper()} {parsed.netloc}{path}"
+
+
+def _new_endpoint() -> Dict[str, Any]:
+    return {
+        'requests': 0,
+        'errors': 0,
+        'status_codes': {},
+        'bytes': 0,
+        'retries': 0,
+        'cache_hits': 0,
+        'latency_seconds_total': 0.0,
+        'latency_seconds_max': 0.0,
+        'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+        'rate_limit_remaining': None,
+        'rate_limit_remaining_min': None,
+    }
+
+
+class ScanMetrics:
+    """Per-endpoint HTTP request statistics and per-phase timings of a scan.
+
+    Requests are recorded by ScheduledSession, so both API clients are covered.
+    Each endpoint template keeps request and error counts, status codes, a
+    latency histogram, response bytes, transport and rate-limit retries, cache
+    hits (304 revalidations) and the rate-limit remaining seen. Phases are
+    timed from the main thread; a nested phase's time is excluded from the
+    enclosing phase so the breakdown adds up to the run time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self._phase_stack: List[List[Any]] = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+
+    def record_request(self, method: str, url: str, response: Optional[requests.Response], elapsed: float,
+                       retries: int = 0):
+        """Record one logical request (including its retries); response is None if it raised"""
+        key = endpoint_template(method, url)
+        if response is not None:
+            status = str(response.status_code)
+            size = len(response.content) if response._content_consumed else 0
+            remaining = response.headers.get('X-RateLimit-Remaining')
+            history = getattr(getattr(response.raw, 'retries', None), 'history', None)
+            retries += len(history) if history else 0
+        else:
+            status, size, remaining = 'error', 0, None
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if elapsed <= bound), len(LATENCY_BUCKETS))
+
+        with self._lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = _new_endpoint()
+            endpoint['requests'] += 1
+            endpoint['status_codes'][status] = endpoint['status_codes'].get(status, 0) + 1
+            if response is None or response.status_code >= 400:
+                endpoint['errors'] += 1
+            if status == '304':
+                endpoint['cache_hits'] += 1
+            endpoint['bytes'] += size
+            endpoint['retries'] += retries
+            endpoint['latency_seconds_total'] += elapsed
+            endpoint['latency_seconds_max'] = max(endpoint['latency_seconds_max'], elapsed)
+            endpoint['latency_buckets'][bucket] += 1
+            if remaining is not None and remaining.isdigit():
+                endpoint['rate_limit_remaining'] = int(remaining)
+                low = endpoint['rate_limit_remaining_min']
+                endpoint['rate_limit_remaining_min'] = int(remaining) if low is None else min(low, int(remaining))
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase of the run; repeated phases accumulate"""
+        self._phase_stack.append([name, time.perf_counter(), 0.0])
+        try:
+            yield
+        finally:
+            name, start, nested = self._phase_stack.pop()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                phase = self.phases.setdefault(name, {'seconds': 0.0, 'count': 0})
+                phase['seconds'] += elapsed - nested
+                phase['count'] += 1
+            if self._phase_stack:
+                self._phase_stack[-1][2] += elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot of all metrics, endpoints ordered by total latency"""
+        with self._lock:
+            endpoints = json.loads(json.dumps(self.endpoints))
+            phases = json.loads(json.dumps(self.phases))
+        for endpoint in endpoints.values():
+            count = endpoint['requests']
+            endpoint['latency_seconds_avg'] = round(endpoint['latency_seconds_total'] / count, 6) if count else 0.0
+            endpoint['latency_histogram'] = {
+                str(bound): n for bound, n in zip(list(LATENCY_BUCKETS) + ['+Inf'], endpoint.pop('latency_buckets'))
+            }
+        for phase in phases.values():
+            phase['seconds'] = round(phase['seconds'], 3)
+        ordered = sorted(endpoints.items(), key=lambda item: item[1]['latency_seconds_total'], reverse=True)
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'wall_seconds': round(time.perf_counter() - self._start, 3),
+            'totals': {
+                'requests': sum(e['requests'] for e in endpoints.values()),
+                'errors': sum(e['errors'] for e in endpoints.values()),
+                'bytes': sum(e['bytes'] for e in endpoints.values()),
+                'retries': sum(e['retries'] for e in endpoints.values()),
+                'cache_hits': sum(e['cache_hits'] for e in endpoints.values()),
+            },
+            'phases': phases,
+            'endpoints': dict(ordered),
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format"""
+        snapshot = self.to_dict()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[tuple]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_labels, value in samples:
+                lines.append(f"{name}{_format_labels(sample_labels)} {value}")
+
+        def labels(key: str, **extra) -> Dict[str, str]:
+            method, endpoint = key.split(' ', 1)
+            return dict(method=method, endpoint=endpoint, **extra)
+
+        endpoints = snapshot['endpoints']
+        metric('scanner_http_requests_total', 'counter', 'HTTP requests by endpoint and status',
+               [(labels(key, status=status), count)
+                for key, e in endpoints.items() for status, count in sorted(e['status_codes'].items())])
+        histogram = []
+        for key, e in endpoints.items():
+            cumulative = 0
+            for bound, count in e['latency_histogram'].items():
+                cumulative += count
+                histogram.append((labels(key, le=bound), cumulative))
+        lines.append('# HELP scanner_http_request_duration_seconds HTTP request latency including retries')
+        lines.append('# TYPE scanner_http_request_duration_seconds histogram')
+        for sample_labels, value in histogram:
+            lines.append(f"scanner_http_request_duration_seconds_bucket{_format_labels(sample_labels)} {value}")
+        for key, e in endpoints.items():
+            label_text = _format_labels(labels(key))
+            lines.append(f"scanner_http_request_duration_seconds_sum{label_text} {e['latency_seconds_total']:.6f}")
+            lines.append(f"scanner_http_request_duration_seconds_count{label_text} {e['requests']}")
+        metric('scanner_http_response_bytes_total', 'counter', 'Response body bytes',
+               [(labels(key), e['bytes']) for key, e in endpoints.items()])
+        metric('scanner_http_retries_total', 'counter', 'Transport and rate-limit retries',
+               [(labels(key), e['retries']) for key, e in endpoints.items()])
+        metric('scanner_http_cache_hits_total', 'counter', 'Responses served from the cache after a 304 revalidation',
+               [(labels(key), e['cache_hits']) for key, e in endpoints.items()])
+        metric('scanner_rate_limit_remaining_min', 'gauge', 'Lowest X-RateLimit-Remaining seen',
+               [(labels(key), e['rate_limit_remaining_min'])
+                for key, e in endpoints.items() if e['rate_limit_remaining_min'] is not None])
+        metric('scanner_phase_duration_seconds', 'gauge', 'Time spent in each scan phase',
+               [({'phase': name}, phase['seconds']) for name, phase in snapshot['phases'].items()])
+        metric('scanner_run_duration_seconds', 'gauge', 'Total run time', [({}, snapshot['wall_seconds'])])
+        return '\n'.join(lines) + '\n'
+
+    def save(self, output_dir: str, name: str) -> List[str]:
+        """Write {name}_metrics.json and {name}_metrics.prom; return their paths"""
+        os.makedirs(output_dir, exist_ok=True)
+        json_path = os.path.join(output_dir, f"{name}_metrics.json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        prometheus_path = os.path.join(output_dir, f"{name}_metrics.prom")
+        with open(prometheus_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        return [json_path, prometheus_path]
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    """Render Prometheus sample labels, escaping values"""
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
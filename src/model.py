@@ -0,0 +1,235 @@
+"""
+Normalized in-memory model for organization scans.
+
+Users and teams are interned once by id; repositories hold compact
+(id, permission) references instead of full GitHub payloads, which are
+otherwise repeated across every repository a person or team can access.
+"""
+
+import sys
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+REPOSITORY_FIELDS = (
+    'name', 'full_name', 'description', 'size', 'language', 'default_branch',
+    'private', 'fork', 'archived', 'disabled', 'html_url', 'clone_url',
+    'created_at', 'updated_at', 'pushed_at', 'stargazers_count',
+    'watchers_count', 'forks_count', 'open_issues_count', 'scanned_at',
+)
+
+# Collaborator permissions flags from most to least privileged, with their role names
+PERMISSION_FLAGS = (
+    ('admin', 'admin'),
+    ('maintain', 'maintain'),
+    ('push', 'write'),
+    ('triage', 'triage'),
+    ('pull', 'read'),
+)
+
+# Team permissions (pull/push) and collaborator role names (read/write) on one scale
+PERMISSION_RANKS = {'read': 0, 'pull': 0, 'triage': 1, 'write': 2, 'push': 2, 'maintain': 3, 'admin': 4}
+ROLE_NAMES = {'pull': 'read', 'push': 'write'}
+
+# Listener called with (record_type, data) the first time a user or team is interned
+Listener = Callable[[str, Dict[str, Any]], None]
+
+
+def collaborator_permission(collaborator: Dict[str, Any]) -> str:
+    """Return a collaborator's role name from role_name or the permissions flags"""
+    if collaborator.get('role_name'):
+        return collaborator['role_name']
+    permissions = collaborator.get('permissions') or {}
+    for flag, role_name in PERMISSION_FLAGS:
+        if permissions.get(flag):
+            return role_name
+    return 'read'
+
+
+def canonical_permission(permission: Optional[str]) -> str:
+    """Map REST team permissions onto role names (pull -> read, push -> write)"""
+    permission = permission or 'read'
+    return sys.intern(ROLE_NAMES.get(permission, permission))
+
+
+def effective_access(repo_info: Dict[str, Any], team_memberships: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Users with access to a repository directly or through its teams, with their highest permission.
+
+    team_memberships maps team slugs to {'members': [{'id', 'login'}], 'child_teams': [...]};
+    GitHub lists the members of child teams as members of the parent team as well.
+    """
+    access: Dict[str, Dict[str, Any]] = {}
+
+    def grant(user: Dict[str, Any], permission: str, source: str):
+        entry = access.get(user['login'])
+        if entry is None:
+            entry = access[user['login']] = {'id': user.get('id'), 'login': user['login'],
+                                             'permission': permission, 'sources': []}
+        elif PERMISSION_RANKS.get(permission, 0) > PERMISSION_RANKS.get(entry['permission'], 0):
+            entry['permission'] = permission
+        entry['sources'].append(source)
+
+    for collaborator in repo_info.get('collaborators', []):
+        grant(collaborator, canonical_permission(collaborator_permission(collaborator)), 'direct')
+    for team in repo_info.get('teams', []):
+        membership = team_memberships.get(team.get('slug'))
+        for member in membership['members'] if membership else ():
+            grant(member, canonical_permission(team.get('permission')), f"team:{team['slug']}")
+    return list(access.values())
+
+
+def descendant_teams(slug: str, team_memberships: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Slugs of all child teams below a team; they inherit the team's repository access"""
+    descendants = []
+    pending = list(team_memberships.get(slug, {}).get('child_teams', []))
+    while pending:
+        child = pending.pop()
+        if child not in descendants:
+            descendants.append(child)
+            pending.extend(team_memberships.get(child, {}).get('child_teams', []))
+    return descendants
+
+
+class UserRecord:
+    __slots__ = ('id', 'login', 'type', 'site_admin')
+
+    def __init__(self, id: int, login: str, type: str, site_admin: bool):
+        self.id = id
+        self.login = login
+        self.type = type
+        self.site_admin = site_admin
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'id': self.id, 'login': self.login, 'type': self.type, 'site_admin': self.site_admin}
+
+
+class TeamRecord:
+    __slots__ = ('id', 'name', 'slug', 'description', 'privacy', 'parent_id')
+
+    def __init__(self, id: Any, name: str, slug: str, description: Optional[str],
+                 privacy: Optional[str], parent_id: Optional[int]):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.description = description
+        self.privacy = privacy
+        self.parent_id = parent_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'slug': self.slug,
+            'description': self.description,
+            'privacy': self.privacy,
+            'parent_id': self.parent_id,
+        }
+
+
+class RepositoryRecord:
+    __slots__ = REPOSITORY_FIELDS + ('teams', 'collaborators', 'effective_access')
+
+    def __init__(self, fields: Dict[str, Any], teams: Tuple[Tuple[Any, str], ...],
+                 collaborators: Tuple[Tuple[int, str], ...],
+                 effective_access: Optional[Tuple[Tuple[int, str, Tuple[str, ...]], ...]] = None):
+        for field in REPOSITORY_FIELDS:
+            setattr(self, field, fields.get(field))
+        self.teams = teams
+        self.collaborators = collaborators
+        self.effective_access = effective_access
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in REPOSITORY_FIELDS}
+        data['teams'] = [{'id': team_id, 'permission': permission} for team_id, permission in self.teams]
+        data['collaborators'] = [{'id': user_id, 'permission': permission} for user_id, permission in self.collaborators]
+        data['team_count'] = len(self.teams)
+        data['collaborator_count'] = len(self.collaborators)
+        if self.effective_access is not None:
+            data['effective_access'] = [{'id': user_id, 'permission': permission, 'sources': list(sources)}
+                                        for user_id, permission, sources in self.effective_access]
+            data['effective_user_count'] = len(self.effective_access)
+        return data
+
+
+class OrganizationModel:
+    """Interned users and teams plus compact repository records"""
+
+    def __init__(self, listener: Optional[Listener] = None, keep_repositories: bool = True):
+        self.users: Dict[int, UserRecord] = {}
+        self.teams: Dict[Any, TeamRecord] = {}
+        self.repositories: List[RepositoryRecord] = []
+        self.listener = listener
+        self.keep_repositories = keep_repositories
+
+    def intern_user(self, user: Dict[str, Any]) -> int:
+        """Intern a GitHub user payload and return its id"""
+        user_id = user.get('id')
+        if user_id not in self.users:
+            record = UserRecord(user_id, user.get('login'), user.get('type', 'User'), user.get('site_admin', False))
+            self.users[user_id] = record
+            if self.listener:
+                self.listener('user', record.to_dict())
+        return user_id
+
+    def intern_team(self, team: Dict[str, Any]) -> Any:
+        """Intern a GitHub team payload and return its id"""
+        team_id = team.get('id') or team.get('slug')
+        if team_id not in self.teams:
+            parent = team.get('parent') or {}
+            record = TeamRecord(team_id, team.get('name'), team.get('slug'), team.get('description'),
+                                team.get('privacy'), parent.get('id'))
+            self.teams[team_id] = record
+            if self.listener:
+                self.listener('team', record.to_dict())
+        return team_id
+
+    def add_repository(self, repo_info: Dict[str, Any]) -> RepositoryRecord:
+        """Convert a scanned repository into a compact record"""
+        teams = tuple(
+            (self.intern_team(team), sys.intern(team.get('permission') or 'pull'))
+            for team in repo_info.get('teams', [])
+        )
+        collaborators = tuple(
+            (self.intern_user(user), sys.intern(collaborator_permission(user)))
+            for user in repo_info.get('collaborators', [])
+        )
+        effective = None
+        if 'effective_access' in repo_info:
+            effective = tuple(
+                (self.intern_user(user), sys.intern(user['permission']), tuple(user['sources']))
+                for user in repo_info['effective_access']
+            )
+        record = RepositoryRecord(repo_info, teams, collaborators, effective)
+        if self.keep_repositories:
+            self.repositories.append(record)
+        return record
+
+    def expand_repository(self, repo: Dict[str, Any]) -> Dict[str, Any]:
+        """Render a normalized repository dict with full user and team entries"""
+        expanded = dict(repo)
+        expanded['teams'] = [
+            dict(self.teams[ref['id']].to_dict(), permission=ref['permission']) if ref['id'] in self.teams else dict(ref)
+            for ref in repo.get('teams', [])
+        ]
+        expanded['collaborators'] = [
+            dict(self.users[ref['id']].to_dict(), role_name=ref['permission']) if ref['id'] in self.users else dict(ref)
+            for ref in repo.get('collaborators', [])
+        ]
+        return expanded
+
+    def to_report(self) -> Dict[str, Any]:
+        """Render the users, teams and repositories tables"""
+        return {
+            'users': [user.to_dict() for user in self.users.values()],
+            'teams': [team.to_dict() for team in self.teams.values()],
+            'repositories': [repo.to_dict() for repo in self.repositories],
+        }
+
+    @classmethod
+    def from_report(cls, report: Dict[str, Any]) -> 'OrganizationModel':
+        """Rebuild the user and team tables from a normalized report"""
+        model = cls()
+        for user in report.get('users', []):
+            model.users[user['id']] = UserRecord(user['id'], user['login'], user['type'], user['site_admin'])
+        for team in report.get('teams', []):
+            model.teams[team['id']] = TeamRecord(team['id'], team['name'], team['slug'], team['description'],
+                                                 team['privacy'], team['parent_id'])
+        return model
@@ -0,0 +1,138 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_PAGE_WORKERS = 4
+AZURE_DEVOPS_PAGE_SIZE = 100
+
+# Callable that performs a GET for (url, params) and returns the response
+Getter = Callable[[str, Optional[Dict[str, Any]]], requests.Response]
+# Callable that trims a decoded item to the fields that are used
+Projector = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def last_page_number(response: requests.Response) -> Optional[int]:
+    """Read the last page number from a response's Link header"""
+    last = response.links.get('last')
+    if not last:
+        return None
+    page = parse_qs(urlparse(last['url']).query).get('page')
+    if not page:
+        return None
+    try:
+        return int(page[0])
+    except ValueError:
+        return None
+
+
+def _decode_page(response: requests.Response, project: Optional[Projector]) -> List[Any]:
+    items = response.json()
+    return [project(item) for item in items] if project else list(items)
+
+
+def paginate(get: Getter, url: str, params: Optional[Dict[str, Any]] = None,
+             max_workers: int = DEFAULT_PAGE_WORKERS, project: Optional[Projector] = None,
+             executor: Optional[Executor] = None, completed_pages: Optional[Dict[int, List[Any]]] = None,
+             on_page: Optional[Callable[[int, List[Any]], None]] = None) -> List[Any]:
+    """Fetch every page of a GitHub list endpoint, preserving page order.
+
+    The first response's Link header tells how many pages there are; the
+    remaining pages are then fetched concurrently. Endpoints whose Link header
+    has no numbered rel="last" are followed sequentially through rel="next".
+    With project, each item is projected as its page is decoded, so only one
+    page of full payloads is alive at a time. With executor, the remaining
+    pages run on that shared pool instead of a pool of max_workers per call,
+    which bounds page concurrency across concurrent paginate calls.
+    completed_pages holds numbered pages restored from a checkpoint, which are
+    not fetched again, and on_page is called with each page fetched.
+    """
+    params = dict(params or {})
+    params.setdefault('per_page', DEFAULT_PAGE_SIZE)
+
+    response = get(url, params)
+    response.raise_for_status()
+    items = _decode_page(response, project)
+
+    last_page = last_page_number(response)
+    if last_page is None:
+        while 'next' in response.links:
+            response = get(response.links['next']['url'], None)
+            response.raise_for_status()
+            items.extend(_decode_page(response, project))
+        return items
+
+    def fetch_page(page: int) -> List[Any]:
+        if completed_pages and page in completed_pages:
+            return completed_pages[page]
+        page_response = get(url, dict(params, page=page))
+        page_response.raise_for_status()
+        page_items = _decode_page(page_response, project)
+        if on_page:
+            on_page(page, page_items)
+        return page_items
+
+    first_page = int(params.get('page', 1))
+    if on_page:
+        on_page(first_page, items)
+    pages = range(first_page + 1, last_page + 1)
+    if not pages:
+        return items
+    if executor is not None:
+        for page_items in executor.map(fetch_page, pages):
+            items.extend(page_items)
+        return items
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pages)))) as executor:
+        for page_items in executor.map(fetch_page, pages):
+            items.extend(page_items)
+    return items
+
+
+def _azure_devops_page(get: Getter, url: str, params: Dict[str, Any]) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+    """Fetch one Azure DevOps page; return its records and the params for the next page, if any"""
+    response = get(url, params)
+    response.raise_for_status()
+    payload = response.json()
+    records = payload.get('value', payload.get('members', payload.get('items', [])))
+
+    token = response.headers.get('x-ms-continuationtoken') or payload.get('continuationToken')
+    if token:
+        return records, dict(params, continuationToken=token)
+    if '$top' in params and len(records) >= int(params['$top']):
+        return records, dict(params, **{'$skip': int(params.get('$skip', 0)) + len(records)})
+    return records, None
+
+
+def iter_azure_devops_pages(get: Getter, url: str, params: Optional[Dict[str, Any]] = None,
+                            page_size: int = AZURE_DEVOPS_PAGE_SIZE, prefetch: bool = True) -> Iterator[Any]:
+    """Lazily yield records from an Azure DevOps list endpoint across all pages.
+
+    Follows the x-ms-continuationtoken header (or a continuationToken body
+    field) when the endpoint returns one, and otherwise advances $skip by
+    $top while pages come back full. With prefetch, the next page is
+    requested in the background while the current one is being consumed.
+    """
+    params = dict(params or {})
+    params.setdefault('$top', page_size)
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        records, next_params = _azure_devops_page(get, url, params)
+        while True:
+            pending = None
+            if next_params is not None and executor:
+                pending = executor.submit(_azure_devops_page, get, url, next_params)
+            yield from records
+
+            if next_params is None:
+                return
+            previous = records
+            records, next_params = pending.result() if pending else _azure_devops_page(get, url, next_params)
+            if not records or records == previous:
+                # Guard against endpoints that ignore paging parameters
+                return
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
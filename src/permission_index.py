@@ -0,0 +1,350 @@
+"""
+Inverted permission index: user/team -> repositories, per permission level.
+
+Repositories get dense ids in report order. Each principal holds one bitset
+per permission level (a Python int with bit i set for repository id i), so
+"what can X write to" is an OR of a few ints and set operations between
+principals are single AND/OR/AND NOT operations over whole organizations.
+
+On disk each bitset is a string: base64 of its little-endian bytes or, when
+shorter, '#' and the comma-separated hex repository ids. Strings keep the
+file fast to parse, and principals are decoded lazily on first use, so a
+query only pays for the principals it touches.
+"""
+
+import argparse
+import base64
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from console import configure_logging, get_logger
+from model import canonical_permission, collaborator_permission, descendant_teams
+from report_diff import ReportReader
+
+log = get_logger('index')
+
+INDEX_VERSION = 1
+# Permission levels from least to most privileged
+LEVELS = ('read', 'triage', 'write', 'maintain', 'admin')
+LEVEL_RANKS = {level: rank for rank, level in enumerate(LEVELS)}
+PRINCIPAL_KINDS = ('user', 'team')
+
+
+def index_filename(report_name: str) -> str:
+    return f"{report_name}_permission_index.json"
+
+
+def _bit_positions(bits: int) -> List[int]:
+    """Set bit positions of an int, lowest first"""
+    positions = []
+    while bits:
+        low = bits & -bits
+        positions.append(low.bit_length() - 1)
+        bits ^= low
+    return positions
+
+
+def _encode_bits(bits: int) -> str:
+    """'#'-prefixed hex repository ids for sparse bitsets, base64 of the raw bytes for dense ones"""
+    size = (bits.bit_length() + 7) // 8
+    dense_length = 4 * ((size + 2) // 3)
+    # Upper bound for one hex id plus its comma
+    id_length = len(format(size * 8, 'x')) + 1
+    positions = []
+    rest = bits
+    while rest and len(positions) * id_length < dense_length:
+        low = rest & -rest
+        positions.append(low.bit_length() - 1)
+        rest ^= low
+    if not rest:
+        return '#' + ','.join(format(position, 'x') for position in positions)
+    return base64.b64encode(bits.to_bytes(size, 'little')).decode('ascii')
+
+
+def _decode_bits(value: str) -> int:
+    if not value.startswith('#'):
+        return int.from_bytes(base64.b64decode(value), 'little')
+    if value == '#':
+        return 0
+    positions = [int(position, 16) for position in value[1:].split(',')]
+    raw = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        raw[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(raw, 'little')
+
+
+def _has_bit(value: Any, position: int) -> bool:
+    """Test one bit of a bitset or of its encoded form without decoding all of it"""
+    if isinstance(value, int):
+        return bool(value >> position & 1)
+    if value.startswith('#'):
+        return f",{position:x}," in f",{value[1:]},"
+    byte = position >> 3
+    group = value[byte // 3 * 4:byte // 3 * 4 + 4]
+    raw = base64.b64decode(group) if group else b''
+    return byte % 3 < len(raw) and bool(raw[byte % 3] >> (position & 7) & 1)
+
+
+class PermissionIndex:
+    """Per-level repository bitsets for every user and team with access"""
+
+    def __init__(self, organization: Optional[str] = None):
+        self.organization = organization
+        self.created_at = datetime.now().isoformat()
+        self.repositories: List[str] = []
+        self.repository_ids: Dict[str, int] = {}
+        # kind -> name -> level -> bitset; encoded entries are decoded on first access
+        self._principals: Dict[str, Dict[str, Any]] = {kind: {} for kind in PRINCIPAL_KINDS}
+
+    def repository_id(self, name: str) -> int:
+        repo_id = self.repository_ids.get(name)
+        if repo_id is None:
+            repo_id = self.repository_ids[name] = len(self.repositories)
+            self.repositories.append(name)
+        return repo_id
+
+    def grant(self, kind: str, name: str, repo_id: int, permission: Optional[str]):
+        """Record that a user or team has permission on a repository"""
+        levels = self._levels(kind, name, create=True)
+        level = canonical_permission(permission)
+        if level not in LEVEL_RANKS:
+            level = 'read'
+        levels[level] = levels.get(level, 0) | (1 << repo_id)
+
+    def add_repository(self, repo: Dict[str, Any], team_memberships: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Index a repository from the scan (full payloads with login/slug).
+
+        With expanded teams, users are indexed with their effective access and
+        child teams inherit the access of their parents.
+        """
+        repo_id = self.repository_id(repo['name'])
+        if 'effective_access' in repo:
+            for user in repo['effective_access']:
+                self.grant('user', user['login'], repo_id, user['permission'])
+        else:
+            for collaborator in repo.get('collaborators', []):
+                self.grant('user', collaborator['login'], repo_id, collaborator_permission(collaborator))
+        for team in repo.get('teams', []):
+            slug = team.get('slug') or team.get('name')
+            self.grant('team', slug, repo_id, team.get('permission'))
+            for child in descendant_teams(slug, team_memberships or {}):
+                self.grant('team', child, repo_id, team.get('permission'))
+
+    def _levels(self, kind: str, name: str, create: bool = False) -> Optional[Dict[str, int]]:
+        principals = self._principals[kind]
+        levels = principals.get(name)
+        if levels is None:
+            if not create:
+                return None
+            levels = principals[name] = {}
+        elif levels and isinstance(next(iter(levels.values())), str):
+            levels = principals[name] = {level: _decode_bits(value) for level, value in levels.items()}
+        return levels
+
+    def principals(self, kind: str) -> List[str]:
+        return list(self._principals[kind])
+
+    def repositories_of(self, kind: str, name: str, min_level: str = 'read') -> int:
+        """Bitset of repositories the principal can access at min_level or above"""
+        levels = self._levels(kind, name)
+        if levels is None:
+            raise KeyError(f"{kind} '{name}' not found in the index")
+        min_rank = LEVEL_RANKS[min_level]
+        bits = 0
+        for level, level_bits in levels.items():
+            if LEVEL_RANKS[level] >= min_rank:
+                bits |= level_bits
+        return bits
+
+    def permission_on(self, kind: str, name: str, repo_id: int) -> Optional[str]:
+        """Highest level the principal holds on a repository, or None; does not decode the principal"""
+        levels = self._principals[kind].get(name)
+        best = None
+        for level, bits in (levels or {}).items():
+            if _has_bit(bits, repo_id) and (best is None or LEVEL_RANKS[level] > LEVEL_RANKS[best]):
+                best = level
+        return best
+
+    def access_to(self, repo_name: str, min_level: str = 'read') -> Dict[Tuple[str, str], str]:
+        """(kind, name) -> highest permission for every principal with access to a repository"""
+        repo_id = self.repository_ids.get(repo_name)
+        if repo_id is None:
+            raise KeyError(f"repository '{repo_name}' not found in the index")
+        min_rank = LEVEL_RANKS[min_level]
+        access = {}
+        for kind in PRINCIPAL_KINDS:
+            for name in self._principals[kind]:
+                level = self.permission_on(kind, name, repo_id)
+                if level and LEVEL_RANKS[level] >= min_rank:
+                    access[(kind, name)] = level
+        return access
+
+    def repository_names(self, bits: int) -> List[str]:
+        return [self.repositories[repo_id] for repo_id in _bit_positions(bits)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        principals = {}
+        for kind in PRINCIPAL_KINDS:
+            principals[f"{kind}s"] = {
+                name: {level: value if isinstance(value, str) else _encode_bits(value)
+                       for level, value in levels.items()}
+                for name, levels in self._principals[kind].items()
+            }
+        return {
+            'version': INDEX_VERSION,
+            'organization': self.organization,
+            'created_at': self.created_at,
+            'levels': list(LEVELS),
+            'repositories': self.repositories,
+            **principals,
+        }
+
+    def save(self, output_dir: str, report_name: str) -> str:
+        """Write the index compactly; indenting would put every repository id on its own line"""
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, index_filename(report_name))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'), ensure_ascii=False)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'PermissionIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"{path}: unsupported permission index version {data.get('version')}")
+        index = cls(data.get('organization'))
+        index.created_at = data.get('created_at')
+        index.repositories = data['repositories']
+        index.repository_ids = {name: repo_id for repo_id, name in enumerate(index.repositories)}
+        for kind in PRINCIPAL_KINDS:
+            index._principals[kind] = data.get(f"{kind}s", {})
+        return index
+
+    @classmethod
+    def from_report(cls, path: str) -> 'PermissionIndex':
+        """Build the index from a detailed report (JSON or NDJSON, either layout)"""
+        reader = ReportReader()
+        index = cls()
+        for name, access, _ in reader.read(path):
+            repo_id = index.repository_id(name)
+            for user_id, permission in access.get('effective', access['collaborators']).items():
+                index.grant('user', reader.user_names.get(user_id, str(user_id)), repo_id, permission)
+            for team_id, permission in access['teams'].items():
+                slug = reader.team_names.get(team_id, str(team_id))
+                index.grant('team', slug, repo_id, permission)
+                for child in descendant_teams(slug, reader.team_memberships):
+                    index.grant('team', child, repo_id, permission)
+        index.organization = reader.metadata.get('github_org') or reader.metadata.get('organization', {}).get('login')
+        return index
+
+
+# Set operators between operands; '-' needs surrounding spaces since names often contain dashes
+_OPERATOR = re.compile(r'\s*([&|])\s*|\s+(-)\s+')
+
+
+def parse_expression(expression: str) -> List[Tuple[str, str]]:
+    """Split 'a & b | c - d' into [('|', 'a'), ('&', 'b'), ('|', 'c'), ('-', 'd')]"""
+    parts = _OPERATOR.split(expression.strip())
+    terms = [('|', parts[0])]
+    for i in range(1, len(parts), 3):
+        terms.append((parts[i] or parts[i + 1], parts[i + 2]))
+    # GitHub names never contain whitespace; a dangling operator would otherwise end up in a name
+    if not all(term and not re.search(r'\s', term) for _, term in terms):
+        raise ValueError(f"invalid expression: {expression!r}")
+    return terms
+
+
+def evaluate(terms: List[Tuple[str, str]], operand):
+    """Fold operands left to right with the set operator before each one"""
+    result = operand(terms[0][1])
+    for operator, term in terms[1:]:
+        value = operand(term)
+        if operator == '|':
+            result = result | value
+        elif operator == '&':
+            result = result & value
+        else:
+            result = result & ~value if isinstance(value, int) else result - value
+    return result
+
+
+def _principal(term: str) -> Tuple[str, str]:
+    """'user:login' or 'team:slug'; bare names are users"""
+    kind, _, name = term.partition(':')
+    if not name:
+        return 'user', kind
+    if kind not in PRINCIPAL_KINDS:
+        raise ValueError(f"unknown principal kind '{kind}' in '{term}' (use user: or team:)")
+    return kind, name
+
+
+def query_main(argv: List[str]) -> int:
+    """query subcommand: who can access repositories, and what users and teams can access"""
+    parser = argparse.ArgumentParser(
+        prog='main.py query', description='Query the permission index',
+        epilog="Expressions combine operands with & (and), | (or) and - (and not), left to right, e.g. "
+               "what 'team:platform - user:alice' or who 'api & web'.")
+    parser.add_argument('index', help='Permission index ({org}_permission_index.json), or a detailed report to index')
+    parser.add_argument('mode', choices=['who', 'what', 'build'],
+                        help='who: principals with access to repositories; what: repositories users/teams can access; '
+                             'build: write the index for a detailed report')
+    parser.add_argument('expression', nargs='?',
+                        help="who: repository names; what: user:LOGIN / team:SLUG (bare names are users)")
+    parser.add_argument('--min-permission', choices=LEVELS, default='read',
+                        help='Only count access at this level or above (default: read)')
+    parser.add_argument('--output-dir', default='output', help='Output directory for build')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    parser.add_argument('--quiet', action='store_true', help='Only show warnings and errors')
+    args = parser.parse_args(argv)
+    # Results go to stdout; log lines go to stderr so the output can be piped
+    configure_logging(quiet=args.quiet, stream=sys.stderr)
+    if args.mode != 'build' and not args.expression:
+        parser.error(f"{args.mode} needs an expression")
+
+    started = time.perf_counter()
+    try:
+        if args.index.endswith('_permission_index.json'):
+            index = PermissionIndex.load(args.index)
+        else:
+            index = PermissionIndex.from_report(args.index)
+        if args.mode == 'build':
+            path = index.save(args.output_dir, index.organization or 'report')
+            log.info(f"✅ Permission index saved: {path} ({len(index.repositories)} repositories, "
+                     f"{len(index.principals('user'))} users, {len(index.principals('team'))} teams)")
+            return 0
+        terms = parse_expression(args.expression)
+        if args.mode == 'what':
+            bits = evaluate(terms, lambda term: index.repositories_of(*_principal(term), args.min_permission))
+            result = index.repository_names(bits)
+        else:
+            access = {}
+
+            def principals_of(repo_name: str) -> set:
+                repo_access = index.access_to(repo_name, args.min_permission)
+                for key, level in repo_access.items():
+                    if LEVEL_RANKS[level] > LEVEL_RANKS.get(access.get(key), -1):
+                        access[key] = level
+                return set(repo_access)
+
+            keys = evaluate(terms, principals_of)
+            result = [{'type': kind, 'name': name, 'permission': access[(kind, name)]}
+                      for kind, name in sorted(keys)]
+    except (OSError, ValueError, KeyError) as e:
+        log.error(f"❌ Query failed: {e.args[0] if isinstance(e, KeyError) else e}")
+        return 2
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.mode == 'what':
+        print('\n'.join(result))
+    else:
+        print('\n'.join(f"{entry['type']}:{entry['name']}\t{entry['permission']}" for entry in result))
+    log.info(f"🔍 {len(result)} results in {elapsed_ms:.1f} ms")
+    return 0
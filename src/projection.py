@@ -0,0 +1,55 @@
+"""
+Declarative field projections for GitHub payloads.
+
+GitHub objects carry dozens of *_url template fields and nested owner
+objects that nothing downstream reads. Each entity type lists the fields
+the scan, reports and sync actually use; pages are projected as they are
+decoded, so the rest never reaches listings, checkpoints or reports.
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+# A field name, or (name, fields) to project a nested object
+Field = Union[str, Tuple[str, Tuple[Any, ...]]]
+
+REPOSITORY_FIELDS: Tuple[Field, ...] = (
+    'id', 'name', 'full_name', 'description', 'size', 'language', 'default_branch',
+    'private', 'visibility', 'fork', 'archived', 'disabled', 'html_url', 'clone_url',
+    'created_at', 'updated_at', 'pushed_at', 'stargazers_count', 'watchers_count',
+    'forks_count', 'open_issues_count',
+)
+USER_FIELDS: Tuple[Field, ...] = ('id', 'login', 'type', 'site_admin')
+
+PROJECTIONS: Dict[str, Tuple[Field, ...]] = {
+    'organization': ('id', 'login', 'name', 'description', 'html_url', 'created_at', 'updated_at',
+                     'public_repos', 'total_private_repos', 'owned_private_repos', 'plan'),
+    'repository': REPOSITORY_FIELDS,
+    'user': USER_FIELDS,
+    'collaborator': USER_FIELDS + ('permissions', 'role_name'),
+    'team': ('id', 'name', 'slug', 'description', 'privacy', 'permission', ('parent', ('id', 'name', 'slug'))),
+}
+
+# --fields choices: 'minimal' applies PROJECTIONS, 'full' keeps complete GitHub payloads
+FIELD_MODES = ('minimal', 'full')
+
+
+def project(item: Dict[str, Any], fields: Tuple[Field, ...]) -> Dict[str, Any]:
+    """Keep only the listed fields that are present in item"""
+    projected = {}
+    for field in fields:
+        if isinstance(field, tuple):
+            name, nested = field
+            if name in item:
+                value = item[name]
+                projected[name] = project(value, nested) if isinstance(value, dict) else value
+        elif field in item:
+            projected[field] = item[field]
+    return projected
+
+
+def projector(entity: str, mode: str = 'minimal') -> Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    """Projection function for an entity type, or None when payloads are kept in full"""
+    if mode == 'full':
+        return None
+    fields = PROJECTIONS[entity]
+    return lambda item: project(item, fields)
@@ -0,0 +1,192 @@
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+import requests
+from console import get_logger
+
+DEFAULT_STATE_FILE = '.rate-limit-state.json'
+DEFAULT_MAX_WAIT = 3600
+DEFAULT_PACE_THRESHOLD = 0.1
+SECONDARY_LIMIT_WAIT = 60
+RATE_LIMIT_WINDOW = 3600
+SAVE_INTERVAL = 5
+
+log = get_logger('rate_limit')
+
+
+class RateLimitError(Exception):
+    """Raised when a request cannot be made within the allowed wait time"""
+
+
+class RateLimiter:
+    """Shared request scheduler that keeps a rate-limit budget per host.
+
+    Budgets are learned from X-RateLimit-Limit/Remaining/Reset and Retry-After
+    response headers, which GitHub and Azure DevOps both send. Requests are
+    paced when a budget runs low and parked until the reset time when it is
+    exhausted, instead of failing. State is persisted so that back-to-back
+    runs share what the previous run learned.
+    """
+
+    def __init__(self, state_file: Optional[str] = None, max_wait: Optional[float] = None,
+                 pace_threshold: float = DEFAULT_PACE_THRESHOLD):
+        self.state_file = state_file or os.getenv('RATE_LIMIT_STATE_FILE', DEFAULT_STATE_FILE)
+        if max_wait is None:
+            max_wait = float(os.getenv('RATE_LIMIT_MAX_WAIT', DEFAULT_MAX_WAIT))
+        self.max_wait = max_wait
+        self.pace_threshold = pace_threshold
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, Dict[str, Any]] = {}
+        self._last_saved = 0.0
+        self._load()
+
+    @staticmethod
+    def budget_key(url: str) -> str:
+        """Budget bucket for a URL: host plus the GitHub resource it draws from"""
+        parsed = urlparse(url)
+        path = parsed.path.rstrip('/')
+        if path.endswith('/graphql'):
+            resource = 'graphql'
+        elif '/search/' in path:
+            resource = 'search'
+        else:
+            resource = 'core'
+        return f"{parsed.netloc}/{resource}"
+
+    def _load(self):
+        """Load persisted budgets, dropping those whose window has reset"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, budget in state.items():
+            if max(budget.get('reset', 0), budget.get('blocked_until', 0)) > now:
+                self._budgets[key] = budget
+
+    def save(self):
+        """Persist budgets atomically"""
+        with self._lock:
+            state = json.dumps(self._budgets)
+            self._last_saved = time.time()
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_file}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(state)
+        os.replace(tmp_path, self.state_file)
+
+    def acquire(self, url: str):
+        """Block until a request to url fits the known budget"""
+        key = self.budget_key(url)
+        with self._lock:
+            budget = self._budgets.setdefault(key, {})
+            now = time.time()
+            wait_until = budget.get('blocked_until', 0)
+
+            remaining = budget.get('remaining')
+            reset = budget.get('reset', 0)
+            if remaining is not None and reset > now:
+                if remaining <= 0:
+                    wait_until = max(wait_until, reset)
+                elif budget.get('limit') and remaining < budget['limit'] * self.pace_threshold:
+                    # Spread what is left of the budget evenly over the rest of the window
+                    interval = (reset - now) / remaining
+                    slot = max(now, budget.get('next_slot', 0))
+                    budget['next_slot'] = slot + interval
+                    wait_until = max(wait_until, slot)
+                budget['remaining'] = remaining - 1
+
+        wait = wait_until - time.time()
+        if wait > self.max_wait:
+            raise RateLimitError(f"Rate limit for {key} resets in {wait:.0f}s, longer than the allowed {self.max_wait:.0f}s")
+        if wait > 0:
+            if wait >= 1:
+                log.warning(f"⏳ Rate limit budget for {key} exhausted, waiting {wait:.0f}s")
+            time.sleep(wait)
+
+    def update(self, url: str, response: requests.Response) -> float:
+        """Record rate-limit headers from a response.
+
+        Returns the number of seconds to wait before retrying when the response
+        was rejected by a rate limit, or 0 if it was not.
+        """
+        key = self.budget_key(url)
+        headers = response.headers
+        now = time.time()
+        retry_after = 0.0
+
+        with self._lock:
+            budget = self._budgets.setdefault(key, {})
+            if 'X-RateLimit-Remaining' in headers:
+                try:
+                    budget['remaining'] = int(float(headers['X-RateLimit-Remaining']))
+                    if 'X-RateLimit-Limit' in headers:
+                        budget['limit'] = int(float(headers['X-RateLimit-Limit']))
+                    if 'X-RateLimit-Reset' in headers:
+                        budget['reset'] = float(headers['X-RateLimit-Reset'])
+                except ValueError:
+                    pass
+
+            rate_limited = response.status_code == 429 or (
+                response.status_code == 403 and (
+                    'Retry-After' in headers
+                    or budget.get('remaining') == 0
+                    or 'rate limit' in response.text.lower()
+                )
+            )
+            if rate_limited:
+                if 'Retry-After' in headers:
+                    try:
+                        retry_after = float(headers['Retry-After'])
+                    except ValueError:
+                        retry_after = SECONDARY_LIMIT_WAIT
+                elif budget.get('remaining') == 0 and budget.get('reset', 0) > now:
+                    retry_after = budget['reset'] - now
+                else:
+                    retry_after = SECONDARY_LIMIT_WAIT
+                retry_after = max(retry_after, 1.0)
+                budget['blocked_until'] = now + retry_after
+            elif 'Retry-After' in headers:
+                # Azure DevOps sends Retry-After on throttled-but-served requests
+                try:
+                    budget['blocked_until'] = now + float(headers['Retry-After'])
+                except ValueError:
+                    pass
+
+            should_save = now - self._last_saved >= SAVE_INTERVAL
+        if should_save:
+            self.save()
+        return retry_after
+
+    def projected_completion(self, url: str, pending_requests: int) -> Optional[float]:
+        """Estimate seconds of rate-limit waiting needed for pending_requests, or None if unknown"""
+        key = self.budget_key(url)
+        with self._lock:
+            budget = dict(self._budgets.get(key, {}))
+        if budget.get('remaining') is None or not budget.get('limit'):
+            return None
+
+        now = time.time()
+        remaining = budget['remaining'] if budget.get('reset', 0) > now else budget['limit']
+        if pending_requests <= remaining:
+            return 0.0
+        windows = math.ceil((pending_requests - remaining) / budget['limit'])
+        return max(budget.get('reset', now) - now, 0) + (windows - 1) * RATE_LIMIT_WINDOW
+
+    def describe(self, url: str) -> str:
+        """Human-readable budget status for a URL"""
+        key = self.budget_key(url)
+        with self._lock:
+            budget = dict(self._budgets.get(key, {}))
+        if budget.get('remaining') is None:
+            return f"{key}: budget unknown"
+        reset_in = max(budget.get('reset', 0) - time.time(), 0)
+        return f"{key}: {budget['remaining']}/{budget.get('limit', '?')} remaining, resets in {reset_in:.0f}s"
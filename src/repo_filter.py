@@ -0,0 +1,142 @@
+"""
+Repository filters applied before the per-repository fan-out.
+
+Filters GitHub can evaluate are pushed into the listing request (type=sources
+on REST, isFork on GraphQL for --skip-forks); the rest are applied to the
+listing before any per-repository request. Every exclusion is counted so the
+summary records what was filtered and why.
+"""
+
+import argparse
+import re
+from datetime import datetime, timedelta, timezone
+from fnmatch import translate
+from typing import Any, Dict, List, Optional, Pattern
+
+# Prefix that marks an --include/--exclude pattern as a regular expression instead of a glob
+REGEX_PREFIX = 're:'
+
+
+def compile_pattern(pattern: str) -> Pattern:
+    """'re:EXPR' is a regular expression searched in the name; anything else is a case-insensitive glob"""
+    if pattern.startswith(REGEX_PREFIX):
+        return re.compile(pattern[len(REGEX_PREFIX):])
+    return re.compile(translate(pattern), re.IGNORECASE)
+
+
+def parse_since(value: str) -> datetime:
+    """Parse --pushed-since: an ISO date or timestamp, or a relative age such as 90d or 12h"""
+    match = re.fullmatch(r'(\d+)([dh])', value.strip())
+    if match:
+        amount = int(match.group(1))
+        delta = timedelta(days=amount) if match.group(2) == 'd' else timedelta(hours=amount)
+        return datetime.now(timezone.utc) - delta
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _pushed_at(repo: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(repo['pushed_at'].replace('Z', '+00:00'))
+    except (KeyError, AttributeError, ValueError):
+        return None
+
+
+class RepositoryFilter:
+    """Name, archived, fork, activity and size filters for the repository listing"""
+
+    def __init__(self, include: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+                 skip_archived: bool = False, skip_forks: bool = False,
+                 pushed_since: Optional[str] = None, min_size: Optional[int] = None):
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self._include = [compile_pattern(pattern) for pattern in self.include]
+        self._exclude = [compile_pattern(pattern) for pattern in self.exclude]
+        self.skip_archived = skip_archived
+        self.skip_forks = skip_forks
+        self.pushed_since = pushed_since
+        self._since = parse_since(pushed_since) if pushed_since else None
+        self.min_size = min_size
+        self.listed = 0
+        self.excluded: Dict[str, int] = {}
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> 'RepositoryFilter':
+        return cls(include=args.include, exclude=args.exclude, skip_archived=args.skip_archived,
+                   skip_forks=args.skip_forks, pushed_since=args.pushed_since, min_size=args.min_size)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.include or self.exclude or self.skip_archived or self.skip_forks
+                    or self._since or self.min_size)
+
+    @property
+    def listing_type(self) -> str:
+        """Repository type for the listing request; 'sources' leaves forks out on GitHub's side"""
+        return 'sources' if self.skip_forks else 'all'
+
+    def reason(self, repo: Dict[str, Any]) -> Optional[str]:
+        """Name of the first filter that excludes a repository, or None to keep it"""
+        name = repo.get('name', '')
+        if self._include and not any(pattern.search(name) for pattern in self._include):
+            return 'include'
+        if any(pattern.search(name) for pattern in self._exclude):
+            return 'exclude'
+        if self.skip_archived and repo.get('archived'):
+            return 'archived'
+        if self.skip_forks and repo.get('fork'):
+            return 'fork'
+        if self._since:
+            pushed_at = _pushed_at(repo)
+            if pushed_at is None or pushed_at < self._since:
+                return 'pushed_since'
+        if self.min_size and (repo.get('size') or 0) < self.min_size:
+            return 'min_size'
+        return None
+
+    def apply(self, repositories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the repositories that pass every filter, counting the rest by reason"""
+        self.listed = len(repositories)
+        self.excluded = {}
+        kept = []
+        for repo in repositories:
+            reason = self.reason(repo)
+            if reason is None:
+                kept.append(repo)
+            else:
+                self.excluded[reason] = self.excluded.get(reason, 0) + 1
+        return kept
+
+    def describe(self) -> Dict[str, Any]:
+        """Filters, what was pushed into the listing request and exclusion counts, for the reports"""
+        filters = {
+            'include': self.include,
+            'exclude': self.exclude,
+            'skip_archived': self.skip_archived,
+            'skip_forks': self.skip_forks,
+            'pushed_since': self._since.isoformat() if self._since else None,
+            'min_size': self.min_size,
+        }
+        return {
+            'filters': {key: value for key, value in filters.items() if value},
+            'pushed_down': {'type': self.listing_type} if self.listing_type != 'all' else {},
+            'listed_repositories': self.listed,
+            'excluded_repositories': sum(self.excluded.values()),
+            'excluded_by': dict(self.excluded),
+            'scanned_repositories': self.listed - sum(self.excluded.values()),
+        }
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser):
+    """Repository filter options of a scan"""
+    group = parser.add_argument_group('repository filters', 'Applied before any per-repository request')
+    group.add_argument('--include', action='append', metavar='PATTERN',
+                       help="Only scan repositories whose name matches; a glob, or 're:REGEX' (repeatable)")
+    group.add_argument('--exclude', action='append', metavar='PATTERN',
+                       help="Skip repositories whose name matches; a glob, or 're:REGEX' (repeatable)")
+    group.add_argument('--skip-archived', action='store_true', help='Skip archived repositories')
+    group.add_argument('--skip-forks', action='store_true',
+                       help='Skip forks; GitHub leaves them out of the listing (type=sources)')
+    group.add_argument('--pushed-since', metavar='WHEN',
+                       help='Skip repositories not pushed since WHEN: an ISO date/timestamp or an age such as 90d or 12h')
+    group.add_argument('--min-size', type=int, metavar='KB', help='Skip repositories smaller than KB kilobytes')
@@ -0,0 +1,262 @@
+"""
+Permission drift between two detailed reports.
+
+The older report is indexed into hash maps (repository -> user/team id ->
+permission); the newer report is then streamed record by record and compared
+against the index, so the whole diff is linear in the size of both reports.
+NDJSON reports are read one line at a time; JSON reports are loaded whole.
+"""
+
+import argparse
+import json
+from typing import Any, Dict, Iterator, List, Tuple
+
+from console import configure_logging, get_logger
+from model import PERMISSION_RANKS, canonical_permission, collaborator_permission
+from report_writer import read_ndjson_records
+from utils import save_to_json
+
+log = get_logger('diff')
+
+# Repository attributes whose change is reported alongside access changes
+TRACKED_ATTRIBUTES = ('private', 'archived', 'visibility', 'default_branch')
+
+
+def is_escalation(old: str, new: str) -> bool:
+    return PERMISSION_RANKS.get(new, 0) > PERMISSION_RANKS.get(old, 0)
+
+
+def iter_report_records(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (record_type, data) from a JSON or NDJSON detailed report, in either layout.
+
+    Users and teams of the normalized layout come before the repositories
+    that reference them; organization metadata is yielded as 'metadata'.
+    """
+    if path.endswith('.ndjson'):
+        for record in read_ndjson_records(path):
+            record_type = record.get('record_type')
+            if record_type == 'header':
+                yield 'metadata', dict(record['data'].get('metadata', {}),
+                                       organization=record['data'].get('organization', {}))
+            elif record_type == 'footer':
+                yield 'metadata', record['data'].get('analysis_metadata', {})
+            elif record_type in ('user', 'team', 'member', 'team_membership', 'repository'):
+                yield record_type, record['data']
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    yield 'metadata', dict(report.get('analysis_metadata', {}), organization=report.get('organization', {}))
+    normalized = report.get('layout') == 'normalized'
+    for user in report.get('users', []):
+        yield 'user', user
+    for team in report.get('teams', []):
+        # The normalized teams table also holds teams seen only on repositories
+        yield ('team_info' if normalized else 'team'), team
+    for member in report.get('members', []):
+        yield 'member', member if isinstance(member, dict) else {'id': member}
+    for team_id in report.get('organization_teams', []):
+        yield 'team', {'id': team_id}
+    for slug, membership in report.get('team_memberships', {}).items():
+        yield 'team_membership', dict(membership, slug=slug)
+    for repo in report.pop('repositories', []):
+        yield 'repository', repo
+
+
+class ReportReader:
+    """Resolves user and team ids to names while a report is read"""
+
+    def __init__(self):
+        self.metadata: Dict[str, Any] = {}
+        self.user_names: Dict[Any, str] = {}
+        self.team_names: Dict[Any, str] = {}
+        self.members: set = set()
+        self.teams: set = set()
+        self.team_memberships: Dict[str, Dict[str, Any]] = {}
+
+    def read(self, path: str) -> Iterator[Tuple[str, Dict[str, Dict[Any, str]], Dict[str, Any]]]:
+        """Yield (name, access, attributes) per repository.
+
+        access maps 'collaborators'/'teams' ids to permissions, plus 'effective'
+        user ids when the report was scanned with --expand-teams.
+        """
+        for record_type, data in iter_report_records(path):
+            if record_type == 'metadata':
+                self.metadata.update(data)
+            elif record_type == 'user':
+                self._user_id(data)
+            elif record_type == 'member':
+                self.members.add(self._user_id(data))
+            elif record_type == 'team':
+                self.teams.add(self._team_id(data))
+            elif record_type == 'team_info':
+                self._team_id(data)
+            elif record_type == 'team_membership':
+                self.team_memberships[data['slug']] = data
+            elif record_type == 'repository':
+                access = {
+                    'collaborators': {
+                        self._user_id(user): canonical_permission(
+                            user['permission'] if 'permission' in user else collaborator_permission(user))
+                        for user in data.get('collaborators', [])
+                    },
+                    'teams': {
+                        self._team_id(team): canonical_permission(team.get('permission'))
+                        for team in data.get('teams', [])
+                    },
+                }
+                if 'effective_access' in data:
+                    access['effective'] = {self._user_id(user): canonical_permission(user['permission'])
+                                           for user in data['effective_access']}
+                attributes = {key: data.get(key) for key in TRACKED_ATTRIBUTES if key in data}
+                yield data['name'], access, attributes
+
+    def _user_id(self, user: Dict[str, Any]) -> Any:
+        user_id = user.get('id', user.get('login'))
+        if user.get('login'):
+            self.user_names[user_id] = user['login']
+        return user_id
+
+    def _team_id(self, team: Dict[str, Any]) -> Any:
+        team_id = team.get('id') or team.get('slug')
+        if team.get('slug') or team.get('name'):
+            self.team_names[team_id] = team.get('slug') or team.get('name')
+        return team_id
+
+
+def _diff_access(old: Dict[Any, str], new: Dict[Any, str], name, key: str) -> Dict[str, List]:
+    """Added, removed and changed entries of two id -> permission maps; name resolves an id for display"""
+    added = [{key: name(i), 'permission': p} for i, p in new.items() if i not in old]
+    removed = [{key: name(i), 'permission': p} for i, p in old.items() if i not in new]
+    changed = [
+        {key: name(i), 'from': old[i], 'to': p, 'escalation': is_escalation(old[i], p)}
+        for i, p in new.items() if i in old and old[i] != p
+    ]
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def diff_reports(old_path: str, new_path: str) -> Dict[str, Any]:
+    """Compute the structured change set between two detailed reports"""
+    old_reader = ReportReader()
+    old_index = {name: (access, attributes) for name, access, attributes in old_reader.read(old_path)}
+
+    new_reader = ReportReader()
+
+    def user_name(user_id: Any) -> Any:
+        return new_reader.user_names.get(user_id) or old_reader.user_names.get(user_id, user_id)
+
+    def team_name(team_id: Any) -> Any:
+        return new_reader.team_names.get(team_id) or old_reader.team_names.get(team_id, team_id)
+
+    repositories_added = []
+    repositories_changed = []
+    for name, access, attributes in new_reader.read(new_path):
+        previous = old_index.pop(name, None)
+        if previous is None:
+            repositories_added.append(name)
+            continue
+        old_access, old_attributes = previous
+        collaborators = _diff_access(old_access['collaborators'], access['collaborators'], user_name, 'login')
+        teams = _diff_access(old_access['teams'], access['teams'], team_name, 'team')
+        # Effective access is only comparable when both reports were scanned with --expand-teams
+        effective = (_diff_access(old_access['effective'], access['effective'], user_name, 'login')
+                     if 'effective' in old_access and 'effective' in access else {})
+        attributes_changed = {
+            key: {'from': old_attributes.get(key), 'to': value}
+            for key, value in attributes.items() if old_attributes.get(key) != value
+        }
+        if any(collaborators.values()) or any(teams.values()) or any(effective.values()) or attributes_changed:
+            change = {'repository': name}
+            for prefix, section in (('collaborators', collaborators), ('teams', teams), ('effective', effective)):
+                for kind, entries in section.items():
+                    if entries:
+                        change[f"{prefix}_{kind}"] = entries
+            if attributes_changed:
+                change['attributes_changed'] = attributes_changed
+            repositories_changed.append(change)
+    repositories_removed = sorted(old_index)
+
+    def names(ids, name) -> List:
+        return sorted((name(i) for i in ids), key=str)
+
+    changes = {
+        'old': _describe(old_path, old_reader),
+        'new': _describe(new_path, new_reader),
+        'repositories_added': repositories_added,
+        'repositories_removed': repositories_removed,
+        'repositories_changed': repositories_changed,
+        'members_added': names(new_reader.members - old_reader.members, user_name),
+        'members_removed': names(old_reader.members - new_reader.members, user_name),
+        'teams_added': names(new_reader.teams - old_reader.teams, team_name),
+        'teams_removed': names(old_reader.teams - new_reader.teams, team_name),
+    }
+    return {'old': changes.pop('old'), 'new': changes.pop('new'), 'summary': _summarize(changes), **changes}
+
+
+def _describe(path: str, reader: ReportReader) -> Dict[str, Any]:
+    return {
+        'path': path,
+        'organization': reader.metadata.get('github_org') or reader.metadata.get('organization', {}).get('login'),
+        'started_at': reader.metadata.get('started_at'),
+        'total_repositories': reader.metadata.get('total_repositories'),
+    }
+
+
+def _summarize(changes: Dict[str, Any]) -> Dict[str, int]:
+    summary = {key: len(changes[key]) for key in ('repositories_added', 'repositories_removed', 'repositories_changed',
+                                                  'members_added', 'members_removed', 'teams_added', 'teams_removed')}
+    for key in ('collaborators_added', 'collaborators_removed', 'collaborators_changed',
+                'teams_added', 'teams_removed', 'teams_changed',
+                'effective_added', 'effective_removed', 'effective_changed'):
+        summary[f"repository_{key}"] = sum(len(change.get(key, [])) for change in changes['repositories_changed'])
+    # Users gaining effective access (e.g. through a team membership change) count as escalations
+    summary['permission_escalations'] = sum(
+        entry['escalation']
+        for change in changes['repositories_changed']
+        for entry in change.get('collaborators_changed', []) + change.get('teams_changed', [])
+        + change.get('effective_changed', [])
+    ) + summary['repository_effective_added']
+    return summary
+
+
+def has_changes(changes: Dict[str, Any]) -> bool:
+    return any(changes['summary'].values())
+
+
+def diff_main(argv: List[str]) -> int:
+    """diff subcommand: compare two detailed reports and write the change set"""
+    parser = argparse.ArgumentParser(prog='main.py diff', description='Compare two detailed reports for permission drift')
+    parser.add_argument('old', help='Older detailed report (.json or .ndjson)')
+    parser.add_argument('new', help='Newer detailed report (.json or .ndjson)')
+    parser.add_argument('--output-dir', default='output', help='Output directory for {org}_permission_diff.json')
+    parser.add_argument('--exit-code', action='store_true', help='Exit with status 1 when there are changes')
+    parser.add_argument('--quiet', action='store_true', help='Only show warnings and errors')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text', help='Console log format')
+    args = parser.parse_args(argv)
+    configure_logging(quiet=args.quiet, log_format=args.log_format)
+
+    try:
+        changes = diff_reports(args.old, args.new)
+    except (OSError, ValueError, KeyError) as e:
+        log.error(f"❌ Diff failed: {e}")
+        return 2
+
+    org_name = changes['new']['organization'] or changes['old']['organization'] or 'report'
+    diff_path = save_to_json(changes, f"{org_name}_permission_diff.json", args.output_dir)
+    summary = changes['summary']
+    log.info(f"🔍 {args.old} -> {args.new}")
+    log.info(f"   Repositories: +{summary['repositories_added']} -{summary['repositories_removed']} "
+             f"~{summary['repositories_changed']} changed")
+    log.info(f"   Collaborators: +{summary['repository_collaborators_added']} "
+             f"-{summary['repository_collaborators_removed']} ~{summary['repository_collaborators_changed']}")
+    log.info(f"   Team access: +{summary['repository_teams_added']} -{summary['repository_teams_removed']} "
+             f"~{summary['repository_teams_changed']}")
+    if any(summary[f"repository_effective_{kind}"] for kind in ('added', 'removed', 'changed')):
+        log.info(f"   Effective access: +{summary['repository_effective_added']} "
+                 f"-{summary['repository_effective_removed']} ~{summary['repository_effective_changed']}")
+    log.info(f"   Members: +{summary['members_added']} -{summary['members_removed']}, "
+             f"teams: +{summary['teams_added']} -{summary['teams_removed']}")
+    if summary['permission_escalations']:
+        log.warning(f"⚠️  {summary['permission_escalations']} permission escalations")
+    log.info(f"✅ Change set saved: {diff_path}")
+    return 1 if args.exit_code and has_changes(changes) else 0
@@ -0,0 +1,108 @@
+import json
+import os
+from typing import Dict, Any, Iterator, Optional
+
+
+class NDJSONReportWriter:
+    """Stream a detailed report as newline-delimited JSON records.
+
+    The file starts with a header record holding organization metadata,
+    followed by one record per member, team and repository (plus user
+    records in the normalized layout) as they become available, and ends
+    with a footer record holding the analysis metadata.
+    Every record is flushed as it is written, so an interrupted run still
+    leaves every completed record on disk.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(filepath, 'w', encoding='utf-8')
+
+    def write_record(self, record_type: str, data: Dict[str, Any]):
+        """Write a single record and flush it to disk"""
+        self._file.write(json.dumps({'record_type': record_type, 'data': data}, ensure_ascii=False))
+        self._file.write('\n')
+        self._file.flush()
+
+    def write_header(self, organization: Dict[str, Any], metadata: Dict[str, Any]):
+        """Write the header record"""
+        self.write_record('header', {'organization': organization, 'metadata': metadata})
+
+    def write_footer(self, analysis_metadata: Dict[str, Any], errors: list):
+        """Write the footer record marking a complete report"""
+        self.write_record('footer', {'analysis_metadata': analysis_metadata, 'errors': errors})
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_ndjson_records(filepath: str) -> Iterator[Dict[str, Any]]:
+    """Yield records from an NDJSON report, skipping a truncated final line"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A crash can leave a partially written last line
+                continue
+
+
+def load_ndjson_report(filepath: str, require_footer: bool = False) -> Dict[str, Any]:
+    """Load an NDJSON report into the same structure as the JSON detailed report.
+
+    With require_footer, a report without its footer record (an interrupted run) raises ValueError.
+    """
+    footer = False
+    report = {'organization': {}, 'repositories': [], 'members': [], 'teams': [], 'analysis_metadata': {}, 'errors': []}
+    collections = {'repository': 'repositories', 'member': 'members', 'team': 'teams', 'user': 'users'}
+    for record in read_ndjson_records(filepath):
+        record_type = record.get('record_type')
+        if record_type == 'header':
+            report['organization'] = record['data']['organization']
+            if record['data']['metadata'].get('layout') == 'normalized':
+                report['layout'] = 'normalized'
+                report['users'] = []
+        elif record_type == 'footer':
+            footer = True
+            report['analysis_metadata'] = record['data']['analysis_metadata']
+            report['errors'] = record['data']['errors']
+        elif record_type == 'member' and report.get('layout') == 'normalized':
+            report['members'].append(record['data']['id'])
+        elif record_type == 'team_membership':
+            membership = dict(record['data'])
+            report.setdefault('team_memberships', {})[membership.pop('slug')] = membership
+        elif record_type in collections and collections[record_type] in report:
+            report[collections[record_type]].append(record['data'])
+    if require_footer and not footer:
+        raise ValueError(f"{filepath} has no footer record; the run that wrote it did not finish")
+    return report
+
+
+def latest_detailed_report(output_dir: str, report_name: str) -> Optional[str]:
+    """Path of the newer of {report_name}_detailed_analysis.json and .ndjson, or None when neither exists.
+
+    Both can exist after switching --output-format; the older one is a stale scan.
+    """
+    paths = [os.path.join(output_dir, f"{report_name}_detailed_analysis.{extension}") for extension in ('json', 'ndjson')]
+    paths = [path for path in paths if os.path.exists(path)]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def load_detailed_report(filepath: str) -> Dict[str, Any]:
+    """Load a JSON or NDJSON detailed report"""
+    if filepath.endswith('.ndjson'):
+        return load_ndjson_report(filepath)
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
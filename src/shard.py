@@ -0,0 +1,163 @@
+import argparse
+import glob
+import os
+import re
+import zlib
+from typing import List, Dict, Any, Tuple
+from permission_index import PermissionIndex
+from utils import load_from_json, save_to_json, create_summary_report
+from report_writer import load_ndjson_report
+from console import configure_logging, get_logger
+
+log = get_logger('shard')
+
+SHARD_FILE_PATTERN = re.compile(r'_shard-(\d+)-of-(\d+)_detailed_analysis\.(json|ndjson)$')
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse an INDEX/COUNT shard spec (1-based index)"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected INDEX/COUNT such as 2/8")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{value}', INDEX must be between 1 and COUNT")
+    return index, count
+
+
+def shard_for(repo_name: str, count: int) -> int:
+    """Stable 1-based shard assignment for a repository name"""
+    return zlib.crc32(repo_name.encode('utf-8')) % count + 1
+
+
+def shard_report_name(org_name: str, index: int, count: int) -> str:
+    """Base file name of a shard's partial reports"""
+    return f"{org_name}_shard-{index}-of-{count}"
+
+
+def find_shard_reports(input_dir: str, org_name: str) -> Dict[int, Tuple[int, str]]:
+    """Find partial detailed reports for an organization: shard index -> (count, path)"""
+    reports = {}
+    for path in glob.glob(os.path.join(input_dir, '**', f"{org_name}_shard-*"), recursive=True):
+        match = SHARD_FILE_PATTERN.search(os.path.basename(path))
+        if not match:
+            continue
+        index, count = int(match.group(1)), int(match.group(2))
+        if index in reports and reports[index][1] != path:
+            raise ValueError(f"Shard {index} found more than once: {reports[index][1]} and {path}")
+        reports[index] = (count, path)
+    return reports
+
+
+def _load_report(path: str) -> Dict[str, Any]:
+    if path.endswith('.ndjson'):
+        return load_ndjson_report(path, require_footer=True)
+    return load_from_json(os.path.basename(path), os.path.dirname(path))
+
+
+def merge_shard_reports(input_dir: str, org_name: str) -> Dict[str, Any]:
+    """Merge partial shard reports into the detailed report a single-node run would produce.
+
+    Verifies that every shard of the same COUNT is present exactly once and
+    complete, and that no repository appears in, or is assigned to, more than one shard.
+    """
+    reports = find_shard_reports(input_dir, org_name)
+    if not reports:
+        raise ValueError(f"No shard reports for '{org_name}' found in {input_dir}")
+    counts = {count for count, _ in reports.values()}
+    if len(counts) != 1:
+        raise ValueError(f"Shard reports have different shard counts: {sorted(counts)}")
+    count = counts.pop()
+    missing = [index for index in range(1, count + 1) if index not in reports]
+    if missing:
+        raise ValueError(f"Missing shard reports: {', '.join(f'{i}/{count}' for i in missing)}")
+
+    partials = [_load_report(reports[index][1]) for index in range(1, count + 1)]
+    first = partials[0]
+    normalized = first.get('layout') == 'normalized'
+
+    repositories: Dict[str, Dict[str, Any]] = {}
+    errors: List[Dict[str, Any]] = []
+    users: Dict[Any, Dict[str, Any]] = {}
+    teams: Dict[Any, Dict[str, Any]] = {}
+    failed = reused = 0
+    for index, partial in enumerate(partials, 1):
+        # Every listed repository of the shard must have been scanned or recorded as failed
+        shard_listing = partial.get('analysis_metadata', {}).get('listing_order')
+        if shard_listing is None:
+            raise ValueError(f"Shard report {reports[index][1]} has no listing order; it is not a complete shard report")
+        accounted = ({repo['name'] for repo in partial.get('repositories', [])}
+                     | {error.get('repository') for error in partial.get('errors', [])})
+        unaccounted = [name for name in shard_listing if shard_for(name, count) == index and name not in accounted]
+        if unaccounted:
+            raise ValueError(f"Shard {index}/{count} is incomplete: {len(unaccounted)} repositories neither scanned "
+                             f"nor reported as errors (e.g. {', '.join(unaccounted[:5])})")
+        for repo in partial.get('repositories', []):
+            if repo['name'] in repositories:
+                raise ValueError(f"Repository '{repo['name']}' appears in more than one shard")
+            if shard_for(repo['name'], count) != index:
+                raise ValueError(f"Repository '{repo['name']}' does not belong to shard {index}/{count}")
+            repositories[repo['name']] = repo
+        errors.extend(partial.get('errors', []))
+        metadata = partial.get('analysis_metadata', {})
+        failed += metadata.get('failed_repositories', 0)
+        reused += metadata.get('reused_repositories', 0)
+        if normalized:
+            users.update((user['id'], user) for user in partial.get('users', []))
+            teams.update((team['id'], team) for team in partial.get('teams', []))
+
+    # Restore the organization listing order recorded by the shards
+    listing_order = first.get('analysis_metadata', {}).get('listing_order') or sorted(repositories, key=str.lower)
+    ordered = [repositories[name] for name in listing_order if name in repositories]
+    listed = set(listing_order)
+    ordered.extend(repo for name, repo in repositories.items() if name not in listed)
+
+    metadata = {key: value for key, value in first.get('analysis_metadata', {}).items()
+                if key not in ('shard', 'listing_order')}
+    metadata.update({
+        'total_repositories': len(listing_order),
+        'failed_repositories': failed,
+        'reused_repositories': reused,
+        'merged_shards': count,
+    })
+
+    merged = {
+        'organization': first.get('organization', {}),
+        'repositories': ordered,
+        'members': first.get('members', []),
+        'teams': list(teams.values()) if normalized else first.get('teams', []),
+        'analysis_metadata': metadata,
+        'errors': errors,
+    }
+    if 'team_memberships' in first:
+        merged['team_memberships'] = first['team_memberships']
+    if normalized:
+        merged = {'layout': 'normalized', **merged, 'users': list(users.values()),
+                  'organization_teams': first.get('organization_teams', [])}
+    return merged
+
+
+def merge_main(argv: List[str]) -> int:
+    """merge subcommand: combine shard reports into the full detailed and summary reports"""
+    parser = argparse.ArgumentParser(prog='main.py merge', description='Merge sharded scan reports')
+    parser.add_argument('--org', required=True, help='GitHub organization name')
+    parser.add_argument('--input-dir', default='output', help='Directory searched (recursively) for shard reports')
+    parser.add_argument('--output-dir', default='output', help='Output directory for the merged reports')
+    parser.add_argument('--quiet', action='store_true', help='Only show warnings and errors')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text', help='Console log format')
+    args = parser.parse_args(argv)
+    configure_logging(quiet=args.quiet, log_format=args.log_format)
+
+    try:
+        merged = merge_shard_reports(args.input_dir, args.org)
+    except ValueError as e:
+        log.error(f"❌ Merge failed: {e}")
+        return 1
+
+    detailed_report_path = save_to_json(merged, f"{args.org}_detailed_analysis.json", args.output_dir)
+    log.info(f"✅ Merged {merged['analysis_metadata']['merged_shards']} shards: {detailed_report_path}")
+    summary_report_path = save_to_json(create_summary_report(merged), f"{args.org}_summary.json", args.output_dir)
+    log.info(f"✅ Summary report saved: {summary_report_path}")
+    index_path = PermissionIndex.from_report(detailed_report_path).save(args.output_dir, args.org)
+    log.info(f"✅ Permission index saved: {index_path}")
+    return 0
@@ -1,7 +1,7 @@
 import json
 import os
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 def format_repository_details(repo):
     """Format repository details for display."""
@@ -39,6 +39,20 @@ def format_repository_info(repo: Dict[str, Any]) -> Dict[str, Any]:
         "open_issues_count": repo.get("open_issues_count", 0)
     }
 
+def process_repository(github_api, org_name: str, repo: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch teams and collaborators for a single repository"""
+    repo_teams = github_api.get_repo_teams(org_name, repo['name'])
+    collaborators = github_api.get_repo_collaborators(org_name, repo['name'])
+
+    # Format repository information
+    repo_info = format_repository_info(repo)
+    repo_info['teams'] = repo_teams
+    repo_info['collaborators'] = collaborators
+    repo_info['team_count'] = len(repo_teams)
+    repo_info['collaborator_count'] = len(collaborators)
+    repo_info['scanned_at'] = datetime.now().isoformat()
+    return repo_info
+
 def validate_repository_data(repo_data):
     """Validate the repository data structure."""
     required_keys = ["name", "url", "size"]
@@ -61,6 +75,15 @@ def save_to_json(data: Dict[str, Any], filename: str, output_dir: str = "output"
     
     return filepath
 
+def load_from_json(filename: str, output_dir: str = "output") -> Optional[Dict[str, Any]]:
+    """Load data from a JSON file, returning None if it does not exist"""
+    filepath = os.path.join(output_dir, filename)
+    if not os.path.exists(filepath):
+        return None
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 def format_size(size_kb: int) -> str:
     """Format repository size in human-readable format"""
     if size_kb < 1024:
@@ -70,30 +93,57 @@ def format_size(size_kb: int) -> str:
     else:
         return f"{size_kb / (1024 * 1024):.1f} GB"
 
-def create_summary_report(org_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a summary report of the organization analysis"""
-    repositories = org_data.get('repositories', [])
-    
-    total_size = sum(repo.get('size', 0) for repo in repositories)
-    languages = {}
-    
-    for repo in repositories:
+class SummaryAggregator:
+    """Running aggregates for the summary report, updated one repository at a time"""
+
+    def __init__(self):
+        self.total_repositories = 0
+        self.total_size = 0
+        self.private_repos = 0
+        self.archived_repos = 0
+        self.forked_repos = 0
+        self.languages: Dict[str, int] = {}
+
+    def add(self, repo: Dict[str, Any]):
+        """Fold one repository into the aggregates"""
+        self.total_repositories += 1
+        self.total_size += repo.get('size', 0)
+        if repo.get('private', False):
+            self.private_repos += 1
+        if repo.get('archived', False):
+            self.archived_repos += 1
+        if repo.get('fork', False):
+            self.forked_repos += 1
         lang = repo.get('language')
         if lang:
-            languages[lang] = languages.get(lang, 0) + 1
-    
-    return {
-        "organization": org_data.get('organization', {}).get('name', 'Unknown'),
-        "analysis_timestamp": datetime.now().isoformat(),
-        "summary": {
-            "total_repositories": len(repositories),
-            "total_size_kb": total_size,
-            "total_size_formatted": format_size(total_size),
-            "private_repos": len([r for r in repositories if r.get('private', False)]),
-            "public_repos": len([r for r in repositories if not r.get('private', False)]),
-            "archived_repos": len([r for r in repositories if r.get('archived', False)]),
-            "forked_repos": len([r for r in repositories if r.get('fork', False)]),
-            "languages": languages,
-            "most_popular_language": max(languages.items(), key=lambda x: x[1])[0] if languages else "None"
+            self.languages[lang] = self.languages.get(lang, 0) + 1
+
+    def to_report(self, organization_name: str) -> Dict[str, Any]:
+        """Build the summary report from the aggregates"""
+        languages = self.languages
+        return {
+            "organization": organization_name,
+            "analysis_timestamp": datetime.now().isoformat(),
+            "summary": {
+                "total_repositories": self.total_repositories,
+                "total_size_kb": self.total_size,
+                "total_size_formatted": format_size(self.total_size),
+                "private_repos": self.private_repos,
+                "public_repos": self.total_repositories - self.private_repos,
+                "archived_repos": self.archived_repos,
+                "forked_repos": self.forked_repos,
+                "languages": dict(languages),
+                "most_popular_language": max(languages.items(), key=lambda x: x[1])[0] if languages else "None"
+            }
         }
-    }
\ No newline at end of file
+
+def create_summary_report(org_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a summary report of the organization analysis"""
+    aggregator = SummaryAggregator()
+    for repo in org_data.get('repositories', []):
+        aggregator.add(repo)
+    report = aggregator.to_report(org_data.get('organization', {}).get('name', 'Unknown'))
+    filtering = org_data.get('analysis_metadata', {}).get('filtering')
+    if filtering:
+        report['filtering'] = filtering
+    return report
@@ -0,0 +1,760 @@
+"""
+Continuous update mode: apply GitHub webhook events to the stored scan.
+
+`serve` loads the last detailed report as the scan state and listens for
+organization webhooks. Deliveries are verified against their
+X-Hub-Signature-256 HMAC, and repository, member, membership, team, team_add
+and organization events are applied as incremental updates on a single
+worker thread. Affected repositories can be re-fetched, and a periodic light
+reconciliation re-lists repositories, members and teams (conditional
+requests, mostly 304s) to catch missed deliveries. The detailed report,
+summary and permission index are rewritten after each batch of events.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+import requests
+
+from console import configure_logging, get_logger
+from model import (OrganizationModel, PERMISSION_FLAGS, PERMISSION_RANKS, canonical_permission,
+                   collaborator_permission, descendant_teams, effective_access)
+from permission_index import PermissionIndex
+from projection import PROJECTIONS, project
+from rate_limit import RateLimitError
+from report_writer import latest_detailed_report, load_detailed_report
+from utils import create_summary_report, format_repository_info, process_repository, save_to_json
+
+log = get_logger('webhook')
+
+DEFAULT_PORT = 8787
+# Seconds to wait for more events before the reports are rewritten
+DEFAULT_SAVE_DELAY = 2.0
+# GitHub caps webhook payloads at 25 MB
+MAX_BODY_BYTES = 25 * 1024 * 1024
+# Delivery ids remembered to drop redeliveries
+RECENT_DELIVERIES = 1000
+HANDLED_EVENTS = ('repository', 'member', 'membership', 'team', 'team_add', 'organization')
+# Collaborator role names as team permissions
+TEAM_PERMISSIONS = {'read': 'pull', 'write': 'push'}
+
+
+def verify_signature(secret: bytes, body: bytes, signature: Optional[str]) -> bool:
+    """Check an X-Hub-Signature-256 header ('sha256=<hex HMAC of the body>')"""
+    if not signature or not signature.startswith('sha256='):
+        return False
+    expected = 'sha256=' + hmac.new(secret, body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def sign(secret: bytes, body: bytes) -> str:
+    """X-Hub-Signature-256 value for a body, as GitHub computes it"""
+    return 'sha256=' + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+def permission_flags(role_name: str) -> Dict[str, bool]:
+    """REST permissions flags implied by a collaborator role"""
+    rank = PERMISSION_RANKS.get(role_name, 0)
+    return {flag: rank >= PERMISSION_RANKS[name] for flag, name in PERMISSION_FLAGS}
+
+
+def team_permission(permissions: Optional[Dict[str, bool]]) -> str:
+    """Team permission (pull/triage/push/maintain/admin) from a repository's permissions flags"""
+    role_name = collaborator_permission({'permissions': permissions or {}})
+    return TEAM_PERMISSIONS.get(role_name, role_name)
+
+
+class ScanState:
+    """The stored scan as mutable maps: repositories by name, members by login, teams by slug"""
+
+    def __init__(self, org_name: str, report: Dict[str, Any], layout: str = 'full'):
+        self.org_name = org_name
+        self.layout = layout
+        self.organization: Dict[str, Any] = report.get('organization', {})
+        self.repositories: Dict[str, Dict[str, Any]] = {repo['name']: repo for repo in report.get('repositories', [])}
+        self.members: Dict[str, Dict[str, Any]] = {member['login']: member for member in report.get('members', [])}
+        self.teams: Dict[str, Dict[str, Any]] = {team['slug']: team for team in report.get('teams', [])}
+        self.team_memberships: Optional[Dict[str, Dict[str, Any]]] = report.get('team_memberships')
+        self.analysis_metadata: Dict[str, Any] = report.get('analysis_metadata', {})
+        self.errors: List[Dict[str, Any]] = report.get('errors', [])
+        # Repositories whose access changed since the last save
+        self.touched: Set[str] = set()
+        if self.team_memberships is not None:
+            self.touched.update(self.repositories)
+
+    @classmethod
+    def load(cls, org_name: str, output_dir: str) -> 'ScanState':
+        """Load the newer of {org}_detailed_analysis.json and .ndjson, in either layout"""
+        path = latest_detailed_report(output_dir, org_name)
+        if path is None:
+            raise FileNotFoundError(f"No detailed report for '{org_name}' in {output_dir}; run a scan first")
+        report = load_detailed_report(path)
+        if report.get('layout') != 'normalized':
+            return cls(org_name, report)
+
+        # Work on full payloads; the normalized layout is restored when the state is saved
+        model = OrganizationModel.from_report(report)
+        team_slugs = {team.id: team.slug for team in model.teams.values()}
+        teams = []
+        for team_id in report.get('organization_teams', []):
+            if team_id in model.teams:
+                team = model.teams[team_id].to_dict()
+                parent_id = team.pop('parent_id')
+                team['parent'] = {'id': parent_id, 'slug': team_slugs.get(parent_id)} if parent_id else None
+                teams.append(team)
+        expanded = dict(report)
+        expanded['repositories'] = [model.expand_repository(repo) for repo in report.get('repositories', [])]
+        expanded['members'] = [model.users[user_id].to_dict() for user_id in report.get('members', [])
+                               if user_id in model.users]
+        expanded['teams'] = teams
+        return cls(org_name, expanded, layout='normalized')
+
+    # Event handlers return the names of repositories that should be re-fetched
+
+    def apply_event(self, event: str, payload: Dict[str, Any]) -> Set[str]:
+        """Apply one webhook event; returns repositories whose access could not be derived from it"""
+        handler = getattr(self, f"_on_{event}", None)
+        if handler is None:
+            return set()
+        return handler(payload.get('action'), payload)
+
+    def _on_repository(self, action: str, payload: Dict[str, Any]) -> Set[str]:
+        repo = payload['repository']
+        name = repo['name']
+        if action == 'deleted':
+            self.repositories.pop(name, None)
+            return set()
+        if action in ('created', 'transferred'):
+            # Organization webhooks deliver 'transferred' to the new owner: the repository arrived here
+            if name in self.repositories:
+                self.repositories[name].update(format_repository_info(repo))
+            else:
+                self.repositories[name] = self._new_repository(repo)
+            return {name}
+        if action == 'renamed':
+            old_name = (((payload.get('changes') or {}).get('repository') or {}).get('name') or {}).get('from')
+            previous = self.repositories.pop(old_name, None)
+            if previous is not None:
+                self.repositories[name] = previous
+                self.touched.add(name)
+        existing = self.repositories.get(name)
+        if existing is None:
+            self.repositories[name] = self._new_repository(repo)
+            return {name}
+        # archived, unarchived, publicized, privatized, edited: listing fields change, access does not
+        existing.update(format_repository_info(repo))
+        return set()
+
+    def _on_member(self, action: str, payload: Dict[str, Any]) -> Set[str]:
+        """A repository collaborator was added, removed or had their permission changed"""
+        name = payload['repository']['name']
+        repo = self.repositories.get(name)
+        if repo is None:
+            self.repositories[name] = self._new_repository(payload['repository'])
+            return {name}
+        user = payload['member']
+        collaborators = [c for c in repo['collaborators'] if c['login'] != user['login']]
+        refetch = set()
+        if action != 'removed':
+            changes = payload.get('changes') or {}
+            role_name = (changes.get('role_name') or changes.get('permission') or {}).get('to')
+            if role_name is None:
+                previous = next((c for c in repo['collaborators'] if c['login'] == user['login']), None)
+                role_name = collaborator_permission(previous) if previous else 'read'
+                refetch.add(name)
+            role_name = canonical_permission(role_name)
+            collaborators.append(dict(project(user, PROJECTIONS['user']), role_name=role_name,
+                                      permissions=permission_flags(role_name)))
+        repo['collaborators'] = collaborators
+        self.touched.add(name)
+        return refetch
+
+    def _on_membership(self, action: str, payload: Dict[str, Any]) -> Set[str]:
+        """A user was added to or removed from a team"""
+        if self.team_memberships is None:
+            return set()
+        user = {'id': payload['member'].get('id'), 'login': payload['member']['login']}
+        slug = payload['team']['slug']
+        # Team member lists include the members of child teams, so ancestors change as well
+        affected = [slug] + self._ancestors(slug)
+        for team_slug in affected:
+            membership = self.team_memberships.setdefault(team_slug, {'members': [], 'child_teams': []})
+            members = [member for member in membership['members'] if member['login'] != user['login']]
+            if action == 'added':
+                members.append(user)
+            elif team_slug != slug and any(
+                    user['login'] in {m['login'] for m in self.team_memberships.get(child, {}).get('members', [])}
+                    for child in descendant_teams(team_slug, self.team_memberships)):
+                # Still a member of the ancestor through another child team
+                members.append(user)
+            membership['members'] = members
+        self._touch_teams(affected)
+        return set()
+
+    def _on_team(self, action: str, payload: Dict[str, Any]) -> Set[str]:
+        team = project(payload['team'], PROJECTIONS['team'])
+        slug = team['slug']
+        if action == 'created':
+            self.teams[slug] = team
+            if self.team_memberships is not None:
+                self.team_memberships.setdefault(slug, {'members': [], 'child_teams': []})
+                parent = self._parent_slug(team)
+                if parent in self.team_memberships:
+                    self.team_memberships[parent]['child_teams'].append(slug)
+        elif action == 'deleted':
+            self._remove_team(self._slug_for(team) or slug)
+        elif action == 'edited':
+            previous_slug = self._slug_for(team)
+            if previous_slug and previous_slug != slug:
+                self._rename_team(previous_slug, slug)
+            self.teams[slug] = dict(self.teams.get(slug, {}), **team)
+            if 'repository' in payload and 'repository' in (payload.get('changes') or {}):
+                self._grant_team(payload['repository'], team, team_permission(payload['repository'].get('permissions')))
+        elif action == 'added_to_repository':
+            self._grant_team(payload['repository'], team, team_permission(payload['repository'].get('permissions')))
+        elif action == 'removed_from_repository':
+            repo = self.repositories.get(payload['repository']['name'])
+            if repo is not None:
+                repo['teams'] = [t for t in repo['teams'] if t.get('slug') != slug]
+                self.touched.add(repo['name'])
+        return set()
+
+    def _on_team_add(self, action: str, payload: Dict[str, Any]) -> Set[str]:
+        team = project(payload['team'], PROJECTIONS['team'])
+        permission = team.get('permission') or team_permission(payload['repository'].get('permissions'))
+        return self._grant_team(payload['repository'], team, permission)
+
+    def _on_organization(self, action: str, payload: Dict[str, Any]) -> Set[str]:
+        if action == 'member_added':
+            user = project(payload['membership']['user'], PROJECTIONS['user'])
+            self.members[user['login']] = user
+            return set()
+        if action == 'member_removed':
+            login = payload['membership']['user']['login']
+            self.members.pop(login, None)
+            # Leaving the organization removes team memberships and repository access
+            refetch = set()
+            for repo in self.repositories.values():
+                if any(c['login'] == login for c in repo['collaborators']):
+                    repo['collaborators'] = [c for c in repo['collaborators'] if c['login'] != login]
+                    self.touched.add(repo['name'])
+                    refetch.add(repo['name'])
+            if self.team_memberships is not None:
+                for slug, membership in self.team_memberships.items():
+                    if any(m['login'] == login for m in membership['members']):
+                        membership['members'] = [m for m in membership['members'] if m['login'] != login]
+                        self._touch_teams([slug])
+            return refetch
+        if action == 'renamed':
+            self.organization = dict(self.organization, **project(payload['organization'], PROJECTIONS['organization']))
+            log.warning(f"⚠️  Organization renamed to '{payload['organization']['login']}'; "
+                        f"reports keep the name '{self.org_name}'")
+        return set()
+
+    # Helpers
+
+    def _new_repository(self, repo: Dict[str, Any]) -> Dict[str, Any]:
+        repo_info = format_repository_info(repo)
+        repo_info.update({'teams': [], 'collaborators': [], 'team_count': 0, 'collaborator_count': 0, 'scanned_at': None})
+        self.touched.add(repo_info['name'])
+        return repo_info
+
+    def _grant_team(self, repository: Dict[str, Any], team: Dict[str, Any], permission: str) -> Set[str]:
+        name = repository['name']
+        repo = self.repositories.get(name)
+        if repo is None:
+            self.repositories[name] = self._new_repository(repository)
+            return {name}
+        repo['teams'] = [t for t in repo['teams'] if t.get('slug') != team['slug']] + [dict(team, permission=permission)]
+        self.touched.add(name)
+        return set()
+
+    def _slug_for(self, team: Dict[str, Any]) -> Optional[str]:
+        """Current slug of a team by id; a rename changes the slug but not the id"""
+        if team['slug'] in self.teams:
+            return team['slug']
+        return next((slug for slug, known in self.teams.items() if known.get('id') == team.get('id')), None)
+
+    def _parent_slug(self, team: Dict[str, Any]) -> Optional[str]:
+        parent = team.get('parent')
+        return parent.get('slug') if isinstance(parent, dict) else None
+
+    def _ancestors(self, slug: str) -> List[str]:
+        ancestors = []
+        parent = self._parent_slug(self.teams.get(slug, {}))
+        while parent and parent not in ancestors:
+            ancestors.append(parent)
+            parent = self._parent_slug(self.teams.get(parent, {}))
+        return ancestors
+
+    def _touch_teams(self, slugs: List[str]):
+        """Mark repositories that the teams can access, so their effective access is recomputed"""
+        slugs = set(slugs)
+        for repo in self.repositories.values():
+            if any(team.get('slug') in slugs for team in repo['teams']):
+                self.touched.add(repo['name'])
+
+    def _remove_team(self, slug: str):
+        self.teams.pop(slug, None)
+        for repo in self.repositories.values():
+            if any(team.get('slug') == slug for team in repo['teams']):
+                repo['teams'] = [team for team in repo['teams'] if team.get('slug') != slug]
+                self.touched.add(repo['name'])
+        if self.team_memberships is not None:
+            self.team_memberships.pop(slug, None)
+            for membership in self.team_memberships.values():
+                if slug in membership['child_teams']:
+                    membership['child_teams'].remove(slug)
+
+    def _rename_team(self, old_slug: str, new_slug: str):
+        self.teams[new_slug] = self.teams.pop(old_slug)
+        for repo in self.repositories.values():
+            for team in repo['teams']:
+                if team.get('slug') == old_slug:
+                    team['slug'] = new_slug
+                    self.touched.add(repo['name'])
+        for team in self.teams.values():
+            if self._parent_slug(team) == old_slug:
+                team['parent'] = dict(team['parent'], slug=new_slug)
+        if self.team_memberships is not None and old_slug in self.team_memberships:
+            self.team_memberships[new_slug] = self.team_memberships.pop(old_slug)
+            for membership in self.team_memberships.values():
+                membership['child_teams'] = [new_slug if child == old_slug else child
+                                             for child in membership['child_teams']]
+
+    def refresh_touched(self):
+        """Recompute counts and effective access of repositories changed since the last save"""
+        for name in self.touched:
+            repo = self.repositories.get(name)
+            if repo is None:
+                continue
+            repo['team_count'] = len(repo['teams'])
+            repo['collaborator_count'] = len(repo['collaborators'])
+            if self.team_memberships is not None:
+                repo['effective_access'] = effective_access(repo, self.team_memberships)
+                repo['effective_user_count'] = len(repo['effective_access'])
+        self.touched.clear()
+
+    def to_report(self) -> Dict[str, Any]:
+        """Render the state as a detailed report in its original layout"""
+        self.refresh_touched()
+        repositories = list(self.repositories.values())
+        metadata = dict(self.analysis_metadata, total_repositories=len(repositories),
+                        total_members=len(self.members), total_teams=len(self.teams))
+        extra = {'team_memberships': self.team_memberships} if self.team_memberships is not None else {}
+        if self.layout != 'normalized':
+            return {'organization': self.organization, 'repositories': repositories,
+                    'members': list(self.members.values()), 'teams': list(self.teams.values()),
+                    **extra, 'analysis_metadata': metadata, 'errors': self.errors}
+        model = OrganizationModel()
+        member_ids = [model.intern_user(member) for member in self.members.values()]
+        team_ids = [model.intern_team(team) for team in self.teams.values()]
+        for repo in repositories:
+            model.add_repository(repo)
+        return {'layout': 'normalized', 'organization': self.organization, **model.to_report(),
+                'members': member_ids, 'organization_teams': team_ids, **extra,
+                'analysis_metadata': metadata, 'errors': self.errors}
+
+    def save(self, output_dir: str) -> str:
+        """Rewrite the detailed report, summary and permission index; the report is replaced atomically"""
+        report = self.to_report()
+        filename = f"{self.org_name}_detailed_analysis.json"
+        tmp_path = save_to_json(report, f"{filename}.tmp", output_dir)
+        path = os.path.join(output_dir, filename)
+        os.replace(tmp_path, path)
+        save_to_json(create_summary_report(report), f"{self.org_name}_summary.json", output_dir)
+        index = PermissionIndex(self.org_name)
+        for repo in self.repositories.values():
+            index.add_repository(repo, self.team_memberships)
+        index.save(output_dir, self.org_name)
+        return path
+
+
+class WebhookService:
+    """Verifies deliveries and applies them to the scan state on one worker thread"""
+
+    def __init__(self, state: ScanState, output_dir: str, secret: Optional[bytes], github_api=None,
+                 refetch: bool = False, reconcile_interval: float = 0, save_delay: float = DEFAULT_SAVE_DELAY):
+        self.state = state
+        self.output_dir = output_dir
+        self.secret = secret
+        self.github_api = github_api
+        self.refetch = refetch and github_api is not None
+        self.reconcile_interval = reconcile_interval if github_api is not None else 0
+        self.save_delay = save_delay
+        self.events_applied = 0
+        self.last_saved: Optional[str] = None
+        self._queue: queue.Queue = queue.Queue()
+        self._recent: deque = deque(maxlen=RECENT_DELIVERIES)
+        self._recent_ids: Set[str] = set()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._worker: Optional[threading.Thread] = None
+
+    def handle_delivery(self, headers: Mapping[str, str], body: bytes) -> Tuple[int, str, Optional[Tuple]]:
+        """Check one delivery; returns (HTTP status, message, (event, delivery, payload) to apply or None).
+
+        Header names are matched case-insensitively; HTTP/2 proxies forward them lower-cased.
+        """
+        headers = {name.lower(): value for name, value in headers.items()}
+        if self.secret is not None and not verify_signature(self.secret, body, headers.get('x-hub-signature-256')):
+            return 401, 'invalid signature', None
+        event = headers.get('x-github-event', '')
+        if event == 'ping':
+            return 200, 'pong', None
+        if event not in HANDLED_EVENTS:
+            return 202, f"ignored event '{event}'", None
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, 'invalid JSON body', None
+        return self.accept(event, headers.get('x-github-delivery', ''), payload)
+
+    def accept(self, event: str, delivery: str, payload: Dict[str, Any]) -> Tuple[int, str, Optional[Tuple]]:
+        """Drop events of other organizations and redeliveries"""
+        owner = (payload.get('organization') or (payload.get('repository') or {}).get('owner') or {}).get('login', '')
+        if event == 'organization' and payload.get('action') == 'renamed':
+            # Carries the new login; the previous one identifies the served organization
+            owner = ((payload.get('changes') or {}).get('login') or {}).get('from', owner)
+        if owner.lower() != self.state.org_name.lower():
+            return 202, f"ignored event for '{owner}'", None
+        if self._applied(delivery):
+            return 202, 'duplicate delivery', None
+        return 202, 'accepted', (event, delivery, payload)
+
+    def _applied(self, delivery: str) -> bool:
+        with self._lock:
+            return bool(delivery) and delivery in self._recent_ids
+
+    def _remember(self, delivery: str):
+        """Record an applied delivery; failed ones are not recorded, so GitHub's redelivery is applied"""
+        if not delivery:
+            return
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                self._recent_ids.discard(self._recent[0])
+            self._recent.append(delivery)
+            self._recent_ids.add(delivery)
+
+    def submit(self, event: str, delivery: str, payload: Dict[str, Any]):
+        self._queue.put((event, delivery, payload))
+
+    def process(self, event: str, delivery: str, payload: Dict[str, Any]) -> bool:
+        """Apply one event now (worker thread or replay); returns False when it could not be applied"""
+        if self._applied(delivery):
+            # A redelivery queued while the first delivery was still pending
+            return True
+        action = payload.get('action')
+        try:
+            refetch = self.state.apply_event(event, payload)
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            log.error(f"❌ Could not apply {event}.{action} ({delivery}): {e!r}", exc_info=True)
+            return False
+        self._remember(delivery)
+        subject = payload.get('repository') or payload.get('team') or (payload.get('membership') or {}).get('user') or {}
+        target = subject.get('name') or subject.get('login', '')
+        self.events_applied += 1
+        self._dirty = True
+        log.info(f"📨 {event}.{action} {target}", extra={'event': event, 'action': action, 'delivery': delivery})
+        if refetch and self.refetch:
+            for name in sorted(refetch):
+                self.refetch_repository(name)
+        return True
+
+    def refetch_repository(self, name: str):
+        """Re-fetch one repository with its teams and collaborators"""
+        org_name = self.state.org_name
+        try:
+            repo = self.github_api.get_repository(org_name, name)
+            self.state.repositories[name] = process_repository(self.github_api, org_name, repo)
+            self.state.touched.add(name)
+            self._dirty = True
+            log.info(f"   🔄 Re-fetched {name}")
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                self.state.repositories.pop(name, None)
+                self._dirty = True
+                log.info(f"   🗑️  {name} no longer exists")
+            else:
+                log.warning(f"   ⚠️  Could not re-fetch {name}: {e}")
+        except (requests.exceptions.RequestException, RateLimitError) as e:
+            log.warning(f"   ⚠️  Could not re-fetch {name}: {e}")
+
+    def reconcile(self):
+        """Light reconciliation: re-list repositories, members and teams and fold in the differences"""
+        state = self.state
+        org_name = state.org_name
+        try:
+            listing = {repo['name']: repo for repo in self.github_api.get_organization_repos(org_name)}
+            members = self.github_api.get_organization_members(org_name)
+            teams = self.github_api.get_organization_teams(org_name)
+            memberships = (self.github_api.expand_teams(org_name, teams, refresh=True)
+                           if state.team_memberships is not None else None)
+        except (requests.exceptions.RequestException, RateLimitError) as e:
+            log.warning(f"⚠️  Reconciliation failed: {e}")
+            return
+        added = [name for name in listing if name not in state.repositories]
+        removed = [name for name in state.repositories if name not in listing]
+        changed = bool(added or removed)
+        for name in removed:
+            state.repositories.pop(name)
+        for name, repo in listing.items():
+            if name not in state.repositories:
+                state.repositories[name] = state._new_repository(repo)
+                continue
+            fields = format_repository_info(repo)
+            existing = state.repositories[name]
+            if any(existing.get(key) != value for key, value in fields.items()):
+                existing.update(fields)
+                changed = True
+        members = {member['login']: member for member in members}
+        changed = changed or members != state.members
+        state.members = members
+        for team in teams:
+            # A missed rename keeps the team id; follow it instead of dropping the team's access
+            previous_slug = state._slug_for(team)
+            if previous_slug and previous_slug != team['slug']:
+                state._rename_team(previous_slug, team['slug'])
+        listed_slugs = {team['slug'] for team in teams}
+        for slug in [slug for slug in state.teams if slug not in listed_slugs]:
+            state._remove_team(slug)
+        teams = {team['slug']: team for team in teams}
+        changed = changed or teams != state.teams
+        state.teams = teams
+        if memberships is not None and memberships != state.team_memberships:
+            state.team_memberships = memberships
+            state.touched.update(state.repositories)
+            changed = True
+        self._dirty = self._dirty or changed or bool(state.touched)
+        log.info(f"🔁 Reconciled: +{len(added)} -{len(removed)} repositories, "
+                 f"{len(members)} members, {len(teams)} teams{'' if changed else ' (no changes)'}")
+        if self.refetch:
+            for name in added:
+                self.refetch_repository(name)
+
+    def flush(self):
+        if not self._dirty:
+            return
+        self.state.analysis_metadata['updated_at'] = datetime.now().isoformat()
+        self.state.analysis_metadata['webhook_events_applied'] = (
+            self.state.analysis_metadata.get('webhook_events_applied', 0) + self.events_applied)
+        self.events_applied = 0
+        path = self.state.save(self.output_dir)
+        self._dirty = False
+        self.last_saved = datetime.now().isoformat()
+        log.info(f"💾 Saved {path}")
+
+    def start(self):
+        self._worker = threading.Thread(target=self._run, name='webhook-worker', daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._queue.put(None)
+        if self._worker:
+            self._worker.join()
+
+    def _run(self):
+        """Apply queued events; save once no event arrived for save_delay seconds, and reconcile on schedule"""
+        next_reconcile = time.monotonic() + self.reconcile_interval if self.reconcile_interval else None
+        save_due = None
+        while True:
+            now = time.monotonic()
+            deadlines = [deadline for deadline in (save_due, next_reconcile) if deadline is not None]
+            try:
+                item = self._queue.get(timeout=max(0.0, min(deadlines) - now) if deadlines else None)
+            except queue.Empty:
+                item = ()
+            try:
+                if item is None:
+                    self.flush()
+                    return
+                if item:
+                    self.process(*item)
+                    save_due = time.monotonic() + self.save_delay
+                now = time.monotonic()
+                if next_reconcile is not None and now >= next_reconcile:
+                    next_reconcile = now + self.reconcile_interval
+                    self.reconcile()
+                    save_due = now
+                if save_due is not None and now >= save_due and self._queue.empty():
+                    save_due = None
+                    self.flush()
+            except Exception as e:
+                # The HTTP side keeps accepting deliveries, so one bad event, listing or save must not stop the worker
+                log.error(f"❌ Webhook worker error: {e!r}", exc_info=True)
+                if item is None:
+                    return
+
+    def stats(self) -> Dict[str, Any]:
+        return {'repositories': len(self.state.repositories), 'queued': self._queue.qsize(),
+                'pending_events': self.events_applied, 'last_saved': self.last_saved}
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    service: WebhookService = None
+    server_version = 'GitHubOrgScanner/1.0'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            return self._reply(413, 'payload too large')
+        body = self.rfile.read(length)
+        status, message, delivery = self.service.handle_delivery(self.headers, body)
+        if delivery:
+            self.service.submit(*delivery)
+        elif status >= 400:
+            log.warning(f"⚠️  Rejected delivery {self.headers.get('X-GitHub-Delivery', '')}: {message}")
+        self._reply(status, message)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/health':
+            return self._reply(200, 'ok', self.service.stats())
+        self._reply(404, 'not found')
+
+    def _reply(self, status: int, message: str, extra: Optional[Dict[str, Any]] = None):
+        body = json.dumps({'message': message, **(extra or {})}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        log.debug(format % args)
+
+
+def iter_fixtures(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """Yield recorded deliveries from JSON (object or list) or NDJSON files, or directories of them.
+
+    A fixture is either {"event", "payload"[, "delivery"]}, applied as is, or
+    {"headers", "body"} with the raw body, which is verified like a live delivery.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            yield from iter_fixtures(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                            if name.endswith(('.json', '.ndjson'))))
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.endswith('.ndjson'):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                data = json.load(f)
+                yield from data if isinstance(data, list) else [data]
+
+
+def replay(service: WebhookService, fixtures: Iterator[Dict[str, Any]]) -> int:
+    """Apply recorded deliveries in order; returns the number rejected or not applied"""
+    rejected = 0
+    for fixture in fixtures:
+        if 'body' in fixture:
+            body = fixture['body'].encode('utf-8') if isinstance(fixture['body'], str) else fixture['body']
+            status, message, delivery = service.handle_delivery(fixture.get('headers', {}), body)
+        else:
+            status, message, delivery = service.accept(fixture['event'], fixture.get('delivery', ''), fixture['payload'])
+        if delivery:
+            if not service.process(*delivery):
+                rejected += 1
+        elif status >= 400:
+            rejected += 1
+            headers = {name.lower(): value for name, value in fixture.get('headers', {}).items()}
+            log.warning(f"⚠️  Rejected fixture {headers.get('x-github-delivery', '')}: {message}")
+    return rejected
+
+
+def serve_main(argv: List[str]) -> int:
+    """serve subcommand: keep the stored scan current from GitHub webhooks"""
+    parser = argparse.ArgumentParser(prog='main.py serve',
+                                     description='Apply GitHub organization webhooks to the stored scan')
+    parser.add_argument('--org', required=True, help='GitHub organization name')
+    parser.add_argument('--output-dir', default='output', help='Directory with the detailed report to keep current')
+    parser.add_argument('--host', default='127.0.0.1', help='Listen address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Listen port (default: {DEFAULT_PORT})")
+    parser.add_argument('--no-verify', action='store_true',
+                        help='Accept deliveries without a valid signature (local testing only)')
+    parser.add_argument('--refetch', action='store_true',
+                        help='Re-fetch a repository when an event does not carry its new access (needs GITHUB_TOKEN)')
+    parser.add_argument('--reconcile-minutes', type=float, default=60,
+                        help='Re-list repositories, members and teams this often to catch missed deliveries '
+                             '(needs GITHUB_TOKEN, off without it; 0 disables; default: 60)')
+    parser.add_argument('--save-delay', type=float, default=DEFAULT_SAVE_DELAY,
+                        help=f"Seconds without events before the reports are rewritten (default: {DEFAULT_SAVE_DELAY})")
+    parser.add_argument('--replay', action='append', metavar='PATH',
+                        help='Apply recorded deliveries from a JSON/NDJSON file or directory, save and exit')
+    parser.add_argument('--quiet', action='store_true', help='Only show warnings and errors')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text', help='Console log format')
+    args = parser.parse_args(argv)
+    configure_logging(quiet=args.quiet, log_format=args.log_format)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    secret = os.getenv('GITHUB_WEBHOOK_SECRET')
+    if not secret and not args.no_verify:
+        log.error("❌ GITHUB_WEBHOOK_SECRET is required to verify deliveries (or pass --no-verify for local testing)")
+        return 1
+
+    try:
+        state = ScanState.load(args.org, args.output_dir)
+    except (OSError, ValueError) as e:
+        log.error(f"❌ Could not load the scan state: {e}")
+        return 1
+    log.info(f"📂 Loaded {len(state.repositories)} repositories, {len(state.members)} members, "
+             f"{len(state.teams)} teams from {args.output_dir}")
+
+    if args.reconcile_minutes and not args.replay and not args.refetch and not os.getenv('GITHUB_TOKEN'):
+        log.warning("⚠️  GITHUB_TOKEN is not set; reconciliation is off, missed deliveries will not be caught")
+        args.reconcile_minutes = 0
+
+    github_api = None
+    if args.refetch or (args.reconcile_minutes and not args.replay):
+        from github_api import GitHubAPI
+        from http_cache import ResponseCache
+        from rate_limit import RateLimiter
+        try:
+            github_api = GitHubAPI(cache=ResponseCache(), rate_limiter=RateLimiter())
+        except ValueError as e:
+            log.error(f"❌ Could not create the GitHub client: {e}")
+            return 1
+
+    service = WebhookService(state, args.output_dir, None if args.no_verify else secret.encode('utf-8'),
+                             github_api=github_api, refetch=args.refetch,
+                             reconcile_interval=args.reconcile_minutes * 60, save_delay=args.save_delay)
+
+    if args.replay:
+        try:
+            rejected = replay(service, iter_fixtures(args.replay))
+        except (OSError, ValueError, KeyError) as e:
+            log.error(f"❌ Could not read fixtures: {e}")
+            return 1
+        service.flush()
+        return 1 if rejected else 0
+
+    handler = type('BoundWebhookHandler', (WebhookHandler,), {'service': service})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    service.start()
+    # Service managers stop with SIGTERM; shut down like Ctrl+C so pending events are saved
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    log.info(f"👂 Listening for webhooks on http://{args.host}:{server.server_address[1]}/ "
+             f"(refetch {'on' if service.refetch else 'off'}, "
+             f"reconcile {'every ' + str(args.reconcile_minutes) + ' min' if service.reconcile_interval else 'off'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        log.info("🛑 Stopping")
+        server.server_close()
+        service.stop()
+    return 0
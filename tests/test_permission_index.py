@@ -0,0 +1,139 @@
+"""Bitset encoding of the permission index and the query set operations"""
+
+import random
+
+import pytest
+
+from permission_index import (PermissionIndex, _bit_positions, _decode_bits, _encode_bits, _has_bit, evaluate,
+                              parse_expression)
+
+SPARSE = [1, 1 << 7, 1 << 8, (1 << 5000) | (1 << 3), sum(1 << p for p in (0, 999, 65535))]
+DENSE = [(1 << 64) - 1, (1 << 1000) - 1, int('5' * 300, 16), (1 << 4096) - 1 - (1 << 17)]
+
+
+def bitset_id(bits):
+    return f"{bin(bits).count('1')}-of-{bits.bit_length()}"
+
+
+def random_bitsets(count=50, seed=7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        size = rng.randint(1, 3000)
+        density = rng.choice((0.001, 0.01, 0.1, 0.5, 0.95))
+        bits = sum(1 << position for position in range(size) if rng.random() < density)
+        yield bits or 1 << (size - 1)
+
+
+@pytest.mark.parametrize('bits', SPARSE, ids=bitset_id)
+def test_sparse_encoding(bits):
+    encoded = _encode_bits(bits)
+    assert encoded.startswith('#')
+    assert encoded[1:].split(',') == [format(position, 'x') for position in _bit_positions(bits)]
+    assert _decode_bits(encoded) == bits
+
+
+@pytest.mark.parametrize('bits', DENSE, ids=bitset_id)
+def test_dense_encoding(bits):
+    encoded = _encode_bits(bits)
+    assert not encoded.startswith('#')
+    assert _decode_bits(encoded) == bits
+
+
+def test_encoding_picks_the_shorter_form():
+    for bits in random_bitsets():
+        encoded = _encode_bits(bits)
+        assert _decode_bits(encoded) == bits
+        sparse = '#' + ','.join(format(position, 'x') for position in _bit_positions(bits))
+        assert len(encoded) <= len(sparse)
+
+
+def test_empty_bitset():
+    assert _decode_bits(_encode_bits(0)) == 0
+
+
+@pytest.mark.parametrize('bits', SPARSE + DENSE + list(random_bitsets(10, seed=11)), ids=bitset_id)
+def test_has_bit(bits):
+    encoded = _encode_bits(bits)
+    for position in range(bits.bit_length() + 24):
+        expected = bool(bits >> position & 1)
+        assert _has_bit(bits, position) is expected
+        assert _has_bit(encoded, position) is expected, (encoded, position)
+
+
+def test_has_bit_does_not_match_id_prefixes():
+    # 0x1 and 0x10 share a prefix in the sparse form
+    assert _has_bit('#10,100', 0x10)
+    assert not _has_bit('#10,100', 0x1)
+    assert not _has_bit('#10,100', 0x1000)
+
+
+def test_bit_positions():
+    assert _bit_positions(0) == []
+    assert _bit_positions(0b101001) == [0, 3, 5]
+
+
+def test_index_round_trip(tmp_path):
+    index = PermissionIndex('acme')
+    repositories = [f"repo-{i}" for i in range(300)]
+    for name in repositories:
+        index.repository_id(name)
+    # alice is dense at read, sparse at admin; the platform team is sparse
+    for repo_id in range(0, 300, 2):
+        index.grant('user', 'alice', repo_id, 'pull')
+    index.grant('user', 'alice', 299, 'admin')
+    index.grant('team', 'platform', 7, 'push')
+    index.grant('team', 'platform', 250, 'maintain')
+    expected = {
+        ('user', 'alice'): index.repositories_of('user', 'alice'),
+        ('team', 'platform'): index.repositories_of('team', 'platform'),
+    }
+
+    loaded = PermissionIndex.load(index.save(str(tmp_path), 'acme'))
+    # Encoded principals answer point queries before they are decoded
+    assert loaded.permission_on('user', 'alice', 4) == 'read'
+    assert loaded.permission_on('user', 'alice', 5) is None
+    assert loaded.permission_on('user', 'alice', 299) == 'admin'
+    assert loaded.permission_on('team', 'platform', 250) == 'maintain'
+    assert loaded.access_to('repo-7') == {('team', 'platform'): 'write'}
+    for (kind, name), bits in expected.items():
+        assert loaded.repositories_of(kind, name) == bits
+    assert loaded.repository_names(loaded.repositories_of('user', 'alice', 'admin')) == ['repo-299']
+    assert loaded.repository_names(loaded.repositories_of('team', 'platform', 'write')) == ['repo-7', 'repo-250']
+
+
+@pytest.mark.parametrize('expression, terms', [
+    ('alice', [('|', 'alice')]),
+    ('a & b | c - d', [('|', 'a'), ('&', 'b'), ('|', 'c'), ('-', 'd')]),
+    ('  team:platform-core - user:bob-smith ', [('|', 'team:platform-core'), ('-', 'user:bob-smith')]),
+    ('api&web|docs', [('|', 'api'), ('&', 'web'), ('|', 'docs')]),
+    ('my-repo-1', [('|', 'my-repo-1')]),
+])
+def test_parse_expression(expression, terms):
+    assert parse_expression(expression) == terms
+
+
+@pytest.mark.parametrize('expression', ['', 'a &', '| a', 'a & & b', 'a -  ', 'a b'])
+def test_parse_expression_rejects_missing_operands(expression):
+    with pytest.raises(ValueError):
+        parse_expression(expression)
+
+
+BITS = {'a': 0b1100, 'b': 0b1010, 'c': 0b0001, 'd': 0b1000}
+SETS = {name: set(_bit_positions(bits)) for name, bits in BITS.items()}
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('a', 0b1100),
+    ('a & b', 0b1000),
+    ('a | b', 0b1110),
+    ('a - b', 0b0100),
+    ('a | c - d', 0b0101),
+    # Left to right, no precedence
+    ('c | a & b', 0b1000),
+    ('a - d | d', 0b1100),
+])
+def test_evaluate(expression, expected):
+    terms = parse_expression(expression)
+    assert evaluate(terms, BITS.__getitem__) == expected
+    # Sets of principals (who queries) fold the same way
+    assert evaluate(terms, SETS.__getitem__) == set(_bit_positions(expected))
@@ -0,0 +1,313 @@
+"""Replay recorded webhook deliveries against a small stored report (tests/fixtures/webhooks)"""
+
+import json
+import os
+import shutil
+
+import pytest
+import requests
+
+from permission_index import index_filename
+from rate_limit import RateLimitError
+from report_writer import NDJSONReportWriter
+from webhook_server import ScanState, WebhookService, iter_fixtures, replay, serve_main, sign
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'webhooks')
+REPORT_DIR = os.path.join(FIXTURES, 'report')
+SECRET = b'fixture-secret'
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, f"{name}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def access(state, repo_name):
+    """Effective access of a repository as {login: permission} after recomputing touched repositories"""
+    state.refresh_touched()
+    return {entry['login']: entry['permission'] for entry in state.repositories[repo_name]['effective_access']}
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    shutil.copy(os.path.join(REPORT_DIR, 'acme_detailed_analysis.json'), tmp_path)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def service(output_dir):
+    return WebhookService(ScanState.load('acme', output_dir), output_dir, SECRET)
+
+
+def apply(service, name):
+    fixture = load_fixture(name)
+    status, message, delivery = service.accept(fixture['event'], fixture['delivery'], fixture['payload'])
+    assert delivery is not None, message
+    assert service.process(*delivery)
+    return service.state
+
+
+def check_repository_created(state):
+    assert state.repositories['docs']['collaborators'] == []
+    assert state.repositories['docs']['teams'] == []
+
+
+def check_repository_deleted(state):
+    assert 'legacy' not in state.repositories
+
+
+def check_repository_transferred(state):
+    assert 'incoming-repo' in state.repositories
+
+
+def check_repository_renamed(state):
+    assert 'api' not in state.repositories
+    assert access(state, 'api-gateway') == {'alice': 'write', 'carol': 'write', 'dave': 'write'}
+
+
+def check_repository_archived(state):
+    assert state.repositories['legacy']['archived'] is True
+
+
+def check_repository_unarchived(state):
+    assert state.repositories['legacy']['archived'] is False
+    assert state.repositories['legacy']['description'] == 'Revived'
+
+
+def check_repository_publicized(state):
+    assert state.repositories['legacy']['private'] is False
+
+
+def check_repository_privatized(state):
+    assert state.repositories['web']['private'] is True
+
+
+def check_repository_edited(state):
+    assert state.repositories['api']['description'] == 'Public API'
+    assert access(state, 'api')['alice'] == 'write'
+
+
+def check_member_added(state):
+    assert access(state, 'legacy') == {'frank': 'write', 'erin': 'read'}
+
+
+def check_member_edited(state):
+    assert access(state, 'api')['alice'] == 'admin'
+
+
+def check_member_removed(state):
+    assert access(state, 'web') == {'dave': 'read'}
+
+
+def check_membership_added(state):
+    # Child team members are listed as members of the parent team as well
+    assert access(state, 'web')['grace'] == 'read'
+    assert access(state, 'api')['grace'] == 'write'
+
+
+def check_membership_removed(state):
+    assert 'dave' not in access(state, 'web')
+    assert access(state, 'api') == {'alice': 'write', 'carol': 'write'}
+
+
+def check_team_created(state):
+    assert 'design' in state.team_memberships['platform']['child_teams']
+    assert state.team_memberships['design'] == {'members': [], 'child_teams': []}
+
+
+def check_team_deleted(state):
+    assert 'security' not in state.teams
+    assert access(state, 'legacy') == {}
+
+
+def check_team_edited(state):
+    assert 'frontend' not in state.teams
+    assert state.team_memberships['platform']['child_teams'] == ['web-team']
+    assert [team['slug'] for team in state.repositories['web']['teams']] == ['web-team']
+    assert access(state, 'web')['dave'] == 'read'
+
+
+def check_team_added_to_repository(state):
+    assert access(state, 'api')['erin'] == 'write'
+
+
+def check_team_removed_from_repository(state):
+    assert access(state, 'api') == {'alice': 'write'}
+
+
+def check_team_add(state):
+    assert access(state, 'web')['erin'] == 'admin'
+
+
+def check_organization_member_added(state):
+    assert 'henry' in state.members
+
+
+def check_organization_member_removed(state):
+    assert 'alice' not in state.members
+    assert 'alice' not in access(state, 'api')
+
+
+def check_organization_renamed(state):
+    assert state.organization['login'] == 'acme-inc'
+    assert state.org_name == 'acme'
+
+
+CHECKS = {
+    'repository.created': check_repository_created,
+    'repository.deleted': check_repository_deleted,
+    'repository.transferred': check_repository_transferred,
+    'repository.renamed': check_repository_renamed,
+    'repository.archived': check_repository_archived,
+    'repository.unarchived': check_repository_unarchived,
+    'repository.publicized': check_repository_publicized,
+    'repository.privatized': check_repository_privatized,
+    'repository.edited': check_repository_edited,
+    'member.added': check_member_added,
+    'member.edited': check_member_edited,
+    'member.removed': check_member_removed,
+    'membership.added': check_membership_added,
+    'membership.removed': check_membership_removed,
+    'team.created': check_team_created,
+    'team.deleted': check_team_deleted,
+    'team.edited': check_team_edited,
+    'team.added_to_repository': check_team_added_to_repository,
+    'team.removed_from_repository': check_team_removed_from_repository,
+    'team_add': check_team_add,
+    'organization.member_added': check_organization_member_added,
+    'organization.member_removed': check_organization_member_removed,
+    'organization.renamed': check_organization_renamed,
+}
+
+
+def test_every_fixture_is_checked():
+    names = {name[:-len('.json')] for name in os.listdir(FIXTURES)
+             if name.endswith('.json') and 'body' not in load_fixture(name[:-len('.json')])}
+    assert names == set(CHECKS)
+
+
+@pytest.mark.parametrize('name', sorted(CHECKS))
+def test_fixture(service, name):
+    CHECKS[name](apply(service, name))
+
+
+def test_replay_directory(output_dir, monkeypatch):
+    monkeypatch.setenv('GITHUB_WEBHOOK_SECRET', SECRET.decode('utf-8'))
+    assert serve_main(['--org', 'acme', '--output-dir', output_dir, '--replay', FIXTURES, '--quiet']) == 0
+
+    with open(os.path.join(output_dir, 'acme_detailed_analysis.json'), 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    # Files apply in name order; an event for a repository missing from the state adds it for re-fetch
+    assert sorted(repo['name'] for repo in report['repositories']) == [
+        'api', 'api-gateway', 'docs', 'incoming-repo', 'legacy', 'web']
+    assert report['analysis_metadata']['webhook_events_applied'] == len(CHECKS) + 1
+    assert os.path.exists(os.path.join(output_dir, 'acme_summary.json'))
+    assert os.path.exists(os.path.join(output_dir, index_filename('acme')))
+
+
+def test_replay_normalized_layout(output_dir):
+    state = ScanState.load('acme', output_dir)
+    state.layout = 'normalized'
+    state.save(output_dir)
+
+    service = WebhookService(ScanState.load('acme', output_dir), output_dir, SECRET)
+    assert service.state.layout == 'normalized'
+    assert replay(service, iter_fixtures([os.path.join(FIXTURES, f"{name}.json")
+                                          for name in ('member.edited', 'membership.added')])) == 0
+    service.flush()
+
+    state = ScanState.load('acme', output_dir)
+    assert state.layout == 'normalized'
+    assert access(state, 'api') == {'alice': 'admin', 'carol': 'write', 'dave': 'write', 'grace': 'write'}
+
+
+def test_signed_delivery_with_lower_case_headers(service):
+    fixture = load_fixture('signed.repository.deleted')
+    status, message, delivery = service.handle_delivery(fixture['headers'], fixture['body'].encode('utf-8'))
+    assert (status, message) == (202, 'accepted')
+    assert service.process(*delivery)
+    assert 'web' not in service.state.repositories
+
+    status, message, delivery = service.handle_delivery(fixture['headers'], fixture['body'].encode('utf-8'))
+    assert (status, message, delivery) == (202, 'duplicate delivery', None)
+
+
+def test_invalid_signature(service):
+    fixture = load_fixture('signed.repository.deleted')
+    headers = dict(fixture['headers'], **{'x-hub-signature-256': sign(b'other-secret', fixture['body'].encode())})
+    assert service.handle_delivery(headers, fixture['body'].encode('utf-8')) == (401, 'invalid signature', None)
+
+
+def test_ping(service):
+    fixture = load_fixture('ping')
+    assert service.handle_delivery(fixture['headers'], fixture['body'].encode('utf-8'))[:2] == (200, 'pong')
+
+
+def test_other_organization_ignored(service):
+    fixture = load_fixture('repository.deleted')
+    payload = dict(fixture['payload'], organization={'login': 'other-org'})
+    assert service.accept('repository', 'other', payload) == (202, "ignored event for 'other-org'", None)
+
+
+def test_failed_delivery_is_applied_on_redelivery(service):
+    fixture = load_fixture('member.edited')
+    broken = dict(fixture['payload'], member=None)
+    assert service.process('member', fixture['delivery'], broken) is False
+    # GitHub redelivers with the same delivery id
+    status, message, delivery = service.accept('member', fixture['delivery'], fixture['payload'])
+    assert message == 'accepted'
+    assert service.process(*delivery)
+    assert access(service.state, 'api')['alice'] == 'admin'
+
+
+class RateLimitedAPI:
+    def get_repository(self, org_name, name):
+        raise RateLimitError('rate limit exhausted')
+
+
+class MissingRepositoryAPI:
+    def get_repository(self, org_name, name):
+        response = requests.Response()
+        response.status_code = 404
+        raise requests.exceptions.HTTPError('404 Not Found', response=response)
+
+
+def test_worker_survives_bad_events(output_dir):
+    service = WebhookService(ScanState.load('acme', output_dir), output_dir, SECRET,
+                             github_api=RateLimitedAPI(), refetch=True, save_delay=0)
+    service.start()
+    service.submit('member', 'broken', dict(load_fixture('member.edited')['payload'], member=None))
+    # Refetching the new repository hits the rate limit; the event itself is applied
+    service.submit('repository', 'created', load_fixture('repository.created')['payload'])
+    service.submit('repository', 'deleted', load_fixture('repository.deleted')['payload'])
+    service.stop()
+
+    state = ScanState.load('acme', output_dir)
+    assert 'docs' in state.repositories
+    assert 'legacy' not in state.repositories
+
+
+def test_refetch_of_deleted_repository(service):
+    service.github_api = MissingRepositoryAPI()
+    service.refetch = True
+    apply(service, 'repository.transferred')
+    assert 'incoming-repo' not in service.state.repositories
+
+
+def test_refetch_without_token(output_dir, monkeypatch):
+    monkeypatch.delenv('GITHUB_TOKEN', raising=False)
+    monkeypatch.setenv('GITHUB_WEBHOOK_SECRET', SECRET.decode('utf-8'))
+    assert serve_main(['--org', 'acme', '--output-dir', output_dir, '--refetch', '--quiet',
+                       '--replay', os.path.join(FIXTURES, 'repository.created.json')]) == 1
+
+
+def test_load_prefers_newer_ndjson_report(output_dir):
+    json_path = os.path.join(output_dir, 'acme_detailed_analysis.json')
+    with open(json_path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    with NDJSONReportWriter(os.path.join(output_dir, 'acme_detailed_analysis.ndjson')) as writer:
+        writer.write_header(report['organization'], {'github_org': 'acme', 'layout': 'full'})
+        writer.write_record('repository', report['repositories'][0])
+        writer.write_footer(report['analysis_metadata'], [])
+    os.utime(json_path, (0, 0))
+    assert list(ScanState.load('acme', output_dir).repositories) == ['api']